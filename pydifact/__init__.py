@@ -23,17 +23,24 @@
 
 __version__ = "0.2.3"
 
-from .control.characters import Characters
-from .parser import Parser
-from .segments import Segment
-from .serializer import Serializer
-from .token import Token
-from .tokenizer import Tokenizer
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from . import serializer
+    from .control.characters import Characters
+    from .definitions import preload
+    from .parser import Parser
+    from .segments import Segment
+    from .serializer import Serializer
+    from .token import Token
+    from .tokenizer import Tokenizer
 
 __all__ = [
     "__version__",
     "Characters",
     "Parser",
+    "preload",
     "Segment",
     "Serializer",
     "serializer",
@@ -41,6 +48,35 @@ __all__ = [
     "Tokenizer",
 ]
 
+# Public names are imported on first access, so that `import pydifact` stays cheap
+# for short-lived processes (CLI tools, serverless functions).
+_lazy_attributes = {
+    "Characters": ".control.characters",
+    "Parser": ".parser",
+    "preload": ".definitions",
+    "Segment": ".segments",
+    "Serializer": ".serializer",
+    "Token": ".token",
+    "Tokenizer": ".tokenizer",
+}
+
+
+def __getattr__(name: str):
+    if name == "serializer":
+        return importlib.import_module(".serializer", __name__)
+    try:
+        module_name = _lazy_attributes[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
 # up-to-date information for newest standard
 # https://www.unece.org/tradewelcome/un-centre-for-trade-facilitation-and-e-business-uncefact/outputs/standards/unedifact/directories/2011-present.html
 
@@ -0,0 +1,118 @@
+# Pydifact - a python edifact library
+#
+# Copyright (c) 2017-2024 Christian González
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Parse many interchanges concurrently on threads.
+
+Threads avoid the pickling of processes: the parsed interchanges are returned
+as they are, and all threads share the compiled definitions. With the GIL,
+parsing is CPU bound and does not get faster on more threads; on free-threaded
+Python (3.13t+) it scales with the number of cores::
+
+    for interchange in parse_interchanges(paths, max_workers=8):
+        ...
+
+Each interchange is parsed by its own `Parser`, so no parser state is shared
+between threads.
+"""
+
+import os
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from pydifact.parser import Parser
+from pydifact.segmentcollection import Interchange
+
+if TYPE_CHECKING:
+    from pydifact.parsecache import ParseCache
+
+# the path of a file, or the content itself
+InterchangeSource = str | os.PathLike | bytes
+
+
+def parse_interchange(
+    source: InterchangeSource,
+    encoding: str = "iso8859-1",
+    parser_factory: Callable[[], Parser] = Parser,
+    cache: "ParseCache | None" = None,
+) -> Interchange:
+    """Parse one interchange from a file path or from bytes, with a new parser."""
+    parser = parser_factory()
+    if isinstance(source, bytes):
+        return Interchange.from_str(source.decode(encoding), parser=parser, cache=cache)
+    return Interchange.from_file(
+        os.fspath(source), encoding=encoding, parser=parser, cache=cache
+    )
+
+
+def parse_interchanges(
+    sources: Iterable[InterchangeSource],
+    max_workers: int | None = None,
+    encoding: str = "iso8859-1",
+    parser_factory: Callable[[], Parser] = Parser,
+    cache: "ParseCache | None" = None,
+    return_exceptions: bool = False,
+) -> Iterator[Interchange | Exception]:
+    """Parse interchanges on a thread pool, and yield them in the order of sources.
+
+    Only a limited number of sources is parsed ahead, so that `sources` can be
+    a long (or endless) iterable.
+
+    Args:
+        sources: File paths, or the contents of interchanges as bytes.
+        max_workers: The number of threads, see `ThreadPoolExecutor`.
+        encoding: The encoding of the interchanges.
+        parser_factory: Creates the parser for each interchange.
+        cache: A `~pydifact.parsecache.ParseCache` shared by all threads.
+        return_exceptions: If True, the exception raised for an invalid
+            interchange is yielded in its place, instead of being raised.
+    """
+    if max_workers is None:
+        # the default of ThreadPoolExecutor
+        max_workers = min(32, (os.cpu_count() or 1) + 4)
+    futures: deque[Future[Interchange]] = deque()
+    sources_iterator = iter(sources)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            while True:
+                for source in sources_iterator:
+                    futures.append(
+                        executor.submit(
+                            parse_interchange, source, encoding, parser_factory, cache
+                        )
+                    )
+                    if len(futures) >= 2 * max_workers:
+                        break
+                if not futures:
+                    return
+                result: Interchange | Exception
+                try:
+                    result = futures.popleft().result()
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    result = e
+                yield result
+        finally:
+            # e.g. after an error, or if the caller stopped iterating early
+            for future in futures:
+                future.cancel()
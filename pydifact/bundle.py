@@ -0,0 +1,579 @@
+# Pydifact - a python edifact library
+#
+# Copyright (c) 2017-2024 Christian González
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Pre-resolved directory bundles.
+
+A bundle contains all definitions of an EDIFACT directory (segments, composite
+data elements, data elements, code lists and messages, and a manifest of the
+message types) in one file. Definitions
+reference each other by id, e.g. a segment lists the ids of its composite data
+elements, which list the ids of their data elements.
+
+File layout::
+
+    MAGIC (8 bytes) | format version (uint32) | table length (uint32)
+    source fingerprint (16 bytes)
+    table of contents (JSON) | entries (JSON, one per definition)
+
+The table of contents maps each section and id to the offset and length of its
+entry, so a `DirectoryBundle` only reads and decodes the definitions that are
+actually requested.
+
+Bundles are built from the XML files of a directory by the generator, and at
+packaging time (see `setup.py`), so wheels ship one bundle per directory. They
+are not part of the repository: in a source tree, build them with::
+
+    python -m pydifact.bundle [<data-dir>...]
+
+e.g. `python -m pydifact.bundle pydifact/syntax/d24a/data`, or without arguments
+for all directories. The fingerprint of the XML files (names, sizes and
+modification times) is stored in the bundle. `load_directory_bundle()` never
+writes into the package: if a bundle is missing or its sources changed, it is
+rebuilt in memory only.
+"""
+
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+import tempfile
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+if TYPE_CHECKING:
+    from xml.etree.ElementTree import Element
+
+BUNDLE_MAGIC = b"PYDIFACT"
+BUNDLE_VERSION = 3
+BUNDLE_FILENAME = "directory.bundle"
+
+SEGMENTS = "segments"
+COMPOSITE_DATA_ELEMENTS = "composite_data_elements"
+DATA_ELEMENTS = "data_elements"
+CODES = "codes"
+MESSAGES = "messages"
+MANIFEST = "manifest"
+SECTIONS = (SEGMENTS, COMPOSITE_DATA_ELEMENTS, DATA_ELEMENTS, CODES, MESSAGES, MANIFEST)
+
+_header = struct.Struct("<8sII16s")
+
+# Attributes that describe a position of an element in its parent, not the element.
+_position_attributes = ("id", "required", "repeat")
+
+
+def get_data_dir(directory: str) -> Path:
+    """Return the data directory of a directory, e.g. "d24a" or "service/v402"."""
+    return Path(__file__).parent / "syntax" / directory / "data"
+
+
+def get_data_dirs() -> list[Path]:
+    """Return the data directories of all directories in the package."""
+    syntax_dir = Path(__file__).parent / "syntax"
+    return sorted(
+        data_dir
+        for data_dir in [*syntax_dir.glob("*/data"), *syntax_dir.glob("*/*/data")]
+        if bundle_sources(data_dir)
+    )
+
+
+def get_bundle_path(directory: str) -> Path:
+    """Return the path of the bundle of a directory, e.g. "d24a" or "service/v402"."""
+    return get_data_dir(directory) / BUNDLE_FILENAME
+
+
+def bundle_sources(data_dir: str | os.PathLike) -> list[Path]:
+    """Return the XML files of a data directory a bundle is built from."""
+    data_dir = Path(data_dir)
+    sources = [
+        data_dir / name
+        for name in (
+            "data_elements.xml",
+            "codes.xml",
+            "composite_data_elements.xml",
+            "segments.xml",
+            "simple_segments.xml",
+        )
+        if (data_dir / name).is_file()
+    ]
+    return sources + sorted((data_dir / "messages").glob("*.xml"))
+
+
+def source_fingerprint(data_dir: str | os.PathLike) -> bytes:
+    """Return a fingerprint of the names, sizes and modification times of the
+    XML files of a data directory."""
+    return _fingerprint(bundle_sources(data_dir))
+
+
+def _fingerprint(sources: list[Path]) -> bytes:
+    fingerprint = hashlib.blake2b(digest_size=16)
+    for source in sources:
+        stat = source.stat()
+        fingerprint.update(f"{source.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return fingerprint.digest()
+
+
+def encode_bundle(
+    sections: dict[str, dict[str, Any]], fingerprint: bytes = bytes(16)
+) -> bytes:
+    """Encode definitions as bundle.
+
+    Args:
+        sections: A dict of section names (see `SECTIONS`) and their definitions,
+            keyed by id. Definitions must be JSON serializable.
+        fingerprint: The fingerprint of the sources, see `source_fingerprint()`.
+    """
+    toc: dict[str, dict[str, tuple[int, int]]] = {}
+    entries: list[bytes] = []
+    offset = 0
+    for section in SECTIONS:
+        toc[section] = {}
+        for key, definition in sections.get(section, {}).items():
+            entry = json.dumps(
+                definition, ensure_ascii=False, separators=(",", ":")
+            ).encode("utf-8")
+            toc[section][key] = (offset, len(entry))
+            entries.append(entry)
+            offset += len(entry)
+
+    table = json.dumps(toc, separators=(",", ":")).encode("utf-8")
+    header = _header.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(table), fingerprint)
+    return b"".join([header, table, *entries])
+
+
+def write_bundle(
+    path: str | os.PathLike,
+    sections: dict[str, dict[str, Any]],
+    fingerprint: bytes = bytes(16),
+) -> None:
+    """Write definitions into a bundle file, see `encode_bundle()`.
+
+    The file is replaced atomically, so concurrent readers never see a partially
+    written bundle. It is readable by everyone, like the other package files.
+    """
+    _write_atomic(Path(path), encode_bundle(sections, fingerprint))
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # mkstemp() creates the file with mode 0600
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def _definition(element: "Element") -> dict[str, Any]:
+    return {
+        key: value
+        for key, value in element.attrib.items()
+        if key not in _position_attributes
+    }
+
+
+def _position(element: "Element") -> dict[str, Any]:
+    position: dict[str, Any] = {
+        "kind": "composite"
+        if element.tag == "composite_data_element"
+        else "data_element",
+        "id": element.get("id"),
+        "required": element.get("required") == "true",
+    }
+    if element.get("repeat"):
+        position["repeat"] = int(element.get("repeat"))
+    return position
+
+
+def _message_structure(element: "Element") -> list[dict[str, Any]]:
+    structure = []
+    for child in element:
+        if child.tag not in ("segment", "group"):
+            continue
+        node: dict[str, Any] = {
+            child.tag: child.get("id"),
+            "maxrepeat": int(child.get("maxrepeat", 1)),
+            "required": child.get("required") == "true",
+        }
+        if child.tag == "group":
+            node["children"] = _message_structure(child)
+        structure.append(node)
+    return structure
+
+
+def build_bundle_sections(data_dir: str | os.PathLike) -> dict[str, dict[str, Any]]:
+    """Collect all definitions of a generated directory, keyed by section and id.
+
+    Args:
+        data_dir: The data directory containing the generated XML files, like
+            `pydifact/syntax/d24a/data`.
+    """
+    # ElementTree is expensive to import, and only needed for building bundles
+    from xml.etree import ElementTree
+
+    data_dir = Path(data_dir)
+    segments: dict[str, Any] = {}
+    composites: dict[str, Any] = {}
+    data_elements: dict[str, Any] = {}
+    codes: dict[str, Any] = {}
+    messages: dict[str, Any] = {}
+
+    def add_codes(element: "Element") -> None:
+        entries = {
+            code.get("id"): [code.get("title", ""), code.get("desc", "")]
+            for code in element.findall("code")
+        }
+        if entries:
+            codes.setdefault(element.get("id"), {}).update(entries)
+
+    data_elements_file = data_dir / "data_elements.xml"
+    if data_elements_file.exists():
+        for element in ElementTree.parse(data_elements_file).getroot():
+            data_elements[element.get("id")] = _definition(element)
+            add_codes(element)
+
+    codes_file = data_dir / "codes.xml"
+    if codes_file.exists():
+        for element in ElementTree.parse(codes_file).getroot():
+            add_codes(element)
+
+    composites_file = data_dir / "composite_data_elements.xml"
+    if composites_file.exists():
+        for element in ElementTree.parse(composites_file).getroot():
+            composites[element.get("id")] = {
+                **_definition(element),
+                "components": [_position(child) for child in element],
+            }
+
+    segments_file = data_dir / "segments.xml"
+    if not segments_file.exists():
+        segments_file = data_dir / "simple_segments.xml"
+    if segments_file.exists():
+        for segment in ElementTree.parse(segments_file).getroot():
+            segments[segment.get("id")] = {
+                **_definition(segment),
+                "elements": [_position(element) for element in segment],
+            }
+            # The merged segments.xml carries the resolved composites with the
+            # required flags of their components, which the composite
+            # definitions lack.
+            for element in segment:
+                if element.tag == "composite_data_element" and len(element):
+                    composite = composites.setdefault(
+                        element.get("id"), _definition(element)
+                    )
+                    composite["components"] = [
+                        _position(component) for component in element
+                    ]
+                for data_element in element.iter("data_element"):
+                    data_elements.setdefault(
+                        data_element.get("id"), _definition(data_element)
+                    )
+
+    # version and release of messages whose defaults lack them, e.g. "D", "24A"
+    match = re.fullmatch(r"d(\d\d[a-z])", data_dir.parent.name)
+    version, release = ("D", match.group(1).upper()) if match else ("", "")
+    manifest: dict[str, Any] = {}
+    messages_dir = data_dir / "messages"
+    if messages_dir.is_dir():
+        for message_file in sorted(messages_dir.glob("*.xml")):
+            root = ElementTree.parse(message_file).getroot()
+            defaults = {
+                element.get("id"): element.get("value")
+                for element in root.findall("defaults/data_element")
+            }
+            message_type = defaults.get("0065", message_file.stem.upper())
+            messages[message_type] = {
+                "defaults": defaults,
+                "structure": _message_structure(root),
+            }
+            manifest[message_type] = {
+                "file": message_file.name,
+                "version": defaults.get("0052", version),
+                "release": defaults.get("0054", release),
+                "agency": defaults.get("0051", ""),
+                "size": message_file.stat().st_size,
+            }
+
+    return {
+        SEGMENTS: segments,
+        COMPOSITE_DATA_ELEMENTS: composites,
+        DATA_ELEMENTS: data_elements,
+        CODES: codes,
+        MESSAGES: messages,
+        MANIFEST: {MESSAGES: manifest},
+    }
+
+
+def build_bundle(
+    data_dir: str | os.PathLike, path: str | os.PathLike | None = None
+) -> Path:
+    """Build the bundle of a generated directory.
+
+    Args:
+        data_dir: The data directory containing the XML files.
+        path: The bundle file to write. By default, it is written next to the
+            XML files.
+
+    Returns:
+        The path of the written bundle file.
+    """
+    path = Path(path) if path is not None else Path(data_dir) / BUNDLE_FILENAME
+    write_bundle(path, build_bundle_sections(data_dir), source_fingerprint(data_dir))
+    return path
+
+
+class DirectoryBundle:
+    """Lazy reader for a directory bundle.
+
+    Only the header and the table of contents are read on creation. Each
+    definition is read from the file (by the offset and length in the table of
+    contents) and decoded on first access, and memoized. A bundle holds no open
+    file, so it can be cached and shared freely. If the file was replaced since,
+    its table of contents is read again.
+
+    Args:
+        path: The bundle file.
+
+    Raises:
+        FileNotFoundError: If the bundle file does not exist.
+        ValueError: If the file is not a bundle of a supported format version.
+    """
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path: Path | None = Path(path)
+        self._data: bytes | None = None
+        with open(self.path, "rb") as f:
+            self._load_table(f)
+
+    @classmethod
+    def from_bytes(
+        cls, data: bytes, path: str | os.PathLike | None = None
+    ) -> "DirectoryBundle":
+        """Create a bundle from its encoded data, see `encode_bundle()`."""
+        bundle = cls.__new__(cls)
+        bundle.path = Path(path) if path is not None else None
+        bundle._data = data
+        bundle._parse_table(
+            data[: _header.size],
+            lambda length: data[_header.size : _header.size + length],
+        )
+        return bundle
+
+    def _load_table(self, f: BinaryIO) -> None:
+        # the file it was read from, to notice when it is replaced
+        self._file_id = _file_id(os.fstat(f.fileno()))
+        self._parse_table(f.read(_header.size), f.read)
+
+    def _parse_table(self, header: bytes, read_table: Callable[[int], bytes]) -> None:
+        if len(header) < _header.size or not header.startswith(BUNDLE_MAGIC):
+            raise ValueError(f"{self.path} is not a pydifact directory bundle.")
+        _, version, table_length, fingerprint = _header.unpack(header)
+        if version != BUNDLE_VERSION:
+            raise ValueError(f"Unsupported bundle format version {version}.")
+        # the fingerprint of the sources the bundle was built from
+        self.fingerprint: bytes = fingerprint
+        self._base = _header.size + table_length
+        self._toc: dict[str, dict[str, list[int]]] = json.loads(
+            read_table(table_length)
+        )
+        self._loaded: dict[tuple[str, str], Any] = {}
+
+    def _read(self, section: str, key: str) -> bytes | None:
+        if self._data is not None:
+            position = self._toc.get(section, {}).get(key)
+            if position is None:
+                return None
+            start = self._base + position[0]
+            return self._data[start : start + position[1]]
+        assert self.path is not None
+        with open(self.path, "rb") as f:
+            if _file_id(os.fstat(f.fileno())) != self._file_id:
+                self._load_table(f)
+            position = self._toc.get(section, {}).get(key)
+            if position is None:
+                return None
+            f.seek(self._base + position[0])
+            return f.read(position[1])
+
+    @classmethod
+    def for_directory(cls, directory: str) -> "DirectoryBundle":
+        """Open the bundle of a directory, e.g. "d24a".
+
+        Raises:
+            FileNotFoundError: If the directory does not exist.
+        """
+        bundle = load_directory_bundle(directory)
+        if bundle is None:
+            raise FileNotFoundError(f"Directory '{directory}' not found.")
+        return bundle
+
+    def ids(self, section: str) -> list[str]:
+        """Return all ids of a section, without decoding any definitions."""
+        return list(self._toc.get(section, {}))
+
+    def get(self, section: str, key: str) -> Any | None:
+        """Return the definition with the given id of a section, or None."""
+        try:
+            return self._loaded[(section, key)]
+        except KeyError:
+            pass
+        entry = self._read(section, key)
+        if entry is None:
+            return None
+        definition = json.loads(entry)
+        self._loaded[(section, key)] = definition
+        return definition
+
+    def segment(self, tag: str) -> dict | None:
+        """Return the definition of a segment, e.g. "BGM"."""
+        return self.get(SEGMENTS, tag)
+
+    def composite_data_element(self, key: str) -> dict | None:
+        """Return the definition of a composite data element, e.g. "C002"."""
+        return self.get(COMPOSITE_DATA_ELEMENTS, key)
+
+    def data_element(self, key: str) -> dict | None:
+        """Return the definition of a data element, e.g. "1001"."""
+        return self.get(DATA_ELEMENTS, key)
+
+    def codes(self, key: str) -> dict[str, list[str]]:
+        """Return the code list of a data element, as dict of code: [title, desc]."""
+        return self.get(CODES, key) or {}
+
+    def message(self, message_type: str) -> dict | None:
+        """Return the structure of a message type, e.g. "ORDERS"."""
+        return self.get(MESSAGES, message_type.upper())
+
+    def message_manifest(self) -> dict[str, dict]:
+        """Return the manifest of the message types of the directory.
+
+        It maps each message type to its "file" (the XML file it was built from),
+        "version" and "release" (e.g. "D", "24A"), controlling "agency" and the
+        "size" of the XML file in bytes. It is one entry, so reading it decodes
+        no message definitions.
+        """
+        return self.get(MANIFEST, MESSAGES) or {}
+
+    def resolve_segment(self, tag: str) -> dict | None:
+        """Return the definition of a segment with all references resolved.
+
+        Each element of the segment is merged with its composite or data element
+        definition, and composites get their resolved `components`.
+        """
+        segment = self.segment(tag)
+        if segment is None:
+            return None
+        return {
+            **segment,
+            "elements": [self._resolve(element) for element in segment["elements"]],
+        }
+
+    def _resolve(self, element: dict) -> dict:
+        if element["kind"] == "composite":
+            definition = self.composite_data_element(element["id"]) or {}
+            return {
+                **definition,
+                **element,
+                "components": [
+                    self._resolve(component)
+                    for component in definition.get("components", [])
+                ],
+            }
+        return {**(self.data_element(element["id"]) or {}), **element}
+
+    def close(self) -> None:
+        """Release the data of the bundle."""
+        if self._data is not None:
+            self._data = b""
+        self._toc = {}
+        self._loaded = {}
+
+    def __enter__(self) -> "DirectoryBundle":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def load_bundle(data_dir: str | os.PathLike) -> DirectoryBundle | None:
+    """Load the bundle of a data directory.
+
+    Nothing is written: if the XML files of the data directory are present and
+    the bundle file is missing, of an older format, or was built from other
+    sources, the bundle is built from the XML files and kept in memory only.
+    Without XML files (e.g. in an installed wheel), the bundle file is used as
+    it is.
+
+    Args:
+        data_dir: The data directory of the bundle, like
+            `pydifact/syntax/d24a/data`.
+
+    Returns:
+        The bundle, or None if there is neither a bundle nor XML files in the data
+        directory.
+    """
+    data_dir = Path(data_dir)
+    path = data_dir / BUNDLE_FILENAME
+    sources = bundle_sources(data_dir)
+    if not sources:
+        try:
+            return DirectoryBundle(path)
+        except FileNotFoundError:
+            return None
+
+    fingerprint = _fingerprint(sources)
+    try:
+        bundle = DirectoryBundle(path)
+        if bundle.fingerprint == fingerprint:
+            return bundle
+    except (OSError, ValueError):
+        pass
+    data = encode_bundle(build_bundle_sections(data_dir), fingerprint)
+    return DirectoryBundle.from_bytes(data, path)
+
+
+def load_directory_bundle(directory: str) -> DirectoryBundle | None:
+    """Load the bundle of a directory, e.g. "d24a" or "service/v402", see
+    `load_bundle()`."""
+    return load_bundle(get_data_dir(directory))
+
+
+def _file_id(stat_result: os.stat_result) -> tuple[int, int, int]:
+    return stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns
+
+
+def main() -> None:
+    if any(arg.startswith("-") for arg in sys.argv[1:]):
+        print(__doc__)
+        sys.exit(1)
+    for data_dir in sys.argv[1:] or get_data_dirs():
+        path = build_bundle(data_dir)
+        print(f"Written {path} ({path.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
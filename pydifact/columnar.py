@@ -0,0 +1,212 @@
+# Pydifact - a python edifact library
+#
+# Copyright (c) 2017-2024 Christian González
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Columnar export of segments, e.g. for DataFrames or Parquet files.
+
+Each segment becomes one row. Besides the fixed columns (see `SegmentTable`), there
+is one column per element and component position: `e<element>_<component>`, e.g.
+`e0_1` for the second component of the first element. Simple elements are stored in
+component 0.
+
+Export to Apache Arrow and NumPy needs the optional `pyarrow` and `numpy` packages.
+"""
+
+from collections.abc import Iterable
+from typing import Any
+
+from pydifact.segments import Segment
+from pydifact.structure import GroupTracker, get_message_structure
+from pydifact.utils import get_message_directory
+
+INDEX_COLUMNS = ("index", "message_index", "message_position")
+COLUMNS = ("tag",) + INDEX_COLUMNS + ("group_path",)
+
+
+def element_column(element: int, component: int = 0) -> str:
+    """Return the name of the column of an element/component position."""
+    return f"e{element}_{component}"
+
+
+class SegmentTable:
+    """Builds columns of segments incrementally.
+
+    Segments can be appended while they are parsed, so no segment container needs
+    to be built, e.g.::
+
+        table = SegmentTable.from_segments(Parser().parse(edi_string))
+
+    Columns:
+        tag: The segment tag.
+        index: The position of the segment in the input, starting at 0.
+        message_index: The number of the message the segment is in, starting at 0,
+            or None outside of messages.
+        message_position: The position of the segment within its message, starting
+            with 1 for UNH (like the UNT segment count), or None outside of messages.
+        group_path: The segment groups of the segment within its message, like
+            "SG2/SG3", "" for segments outside of groups, or None if the message
+            structure is unknown or the segment is not expected there.
+
+    Args:
+        directory: The directory to look up message structures (for `group_path`),
+            e.g. "d24a". By default, the directory is taken from each message
+            header (UNH).
+    """
+
+    def __init__(self, directory: str | None = None) -> None:
+        self.directory = directory
+        self.columns: dict[str, list[Any]] = {name: [] for name in COLUMNS}
+        self._rows = 0
+        self._message_index = -1
+        self._message_position: int | None = None
+        self._tracker: GroupTracker | None = None
+
+    def __len__(self) -> int:
+        return self._rows
+
+    @classmethod
+    def from_segments(
+        cls, segments: Iterable[Segment], directory: str | None = None
+    ) -> "SegmentTable":
+        table = cls(directory)
+        table.extend(segments)
+        return table
+
+    def extend(self, segments: Iterable[Segment]) -> None:
+        for segment in segments:
+            self.append(segment)
+
+    def append(self, segment: Segment) -> None:
+        """Add a segment as new row."""
+        row = self._rows
+        columns = self.columns
+        tag = segment.tag
+
+        if tag == "UNH":
+            self._start_message(segment)
+        if self._message_position is not None:
+            self._message_position += 1
+            message_index: int | None = self._message_index
+            group_path = None
+            if self._tracker is not None:
+                path = self._tracker.feed(tag)
+                if path is not None:
+                    group_path = "/".join(path)
+        else:
+            message_index = group_path = None
+
+        columns["tag"].append(tag)
+        columns["index"].append(row)
+        columns["message_index"].append(message_index)
+        columns["message_position"].append(self._message_position)
+        columns["group_path"].append(group_path)
+
+        for position, element in enumerate(segment.elements):
+            if isinstance(element, str):
+                self._set(element_column(position), row, element)
+            else:
+                for component, value in enumerate(element):
+                    self._set(element_column(position, component), row, value)
+
+        if tag == "UNT":
+            self._message_position = None
+            self._tracker = None
+        self._rows = row + 1
+
+    def _start_message(self, segment: Segment) -> None:
+        self._message_index += 1
+        self._message_position = 0
+        self._tracker = None
+        identifier = segment[1]
+        if not isinstance(identifier, list):
+            return
+        directory = self.directory or get_message_directory(identifier)
+        if directory:
+            structure = get_message_structure(directory, identifier[0])
+            if structure is not None:
+                self._tracker = GroupTracker(structure)
+
+    def _set(self, name: str, row: int, value: str | None) -> None:
+        column = self.columns.get(name)
+        if column is None:
+            column = self.columns[name] = []
+        if len(column) < row:
+            column.extend([None] * (row - len(column)))
+        column.append(value)
+
+    def to_dict(self) -> dict[str, list[Any]]:
+        """Return all columns as lists of equal length.
+
+        Element columns are sorted by element and component position.
+        """
+        rows = self._rows
+        for column in self.columns.values():
+            if len(column) < rows:
+                column.extend([None] * (rows - len(column)))
+        element_columns = sorted(
+            (name for name in self.columns if name not in COLUMNS),
+            key=lambda name: tuple(int(part) for part in name[1:].split("_")),
+        )
+        return {name: self.columns[name] for name in COLUMNS + tuple(element_columns)}
+
+    def to_numpy(self) -> dict[str, Any]:
+        """Return all columns as NumPy arrays.
+
+        Index columns are integer arrays, with -1 for missing values, all others are
+        object arrays.
+
+        Raises:
+            ImportError: If numpy is not installed.
+        """
+        try:
+            import numpy as np
+        except ImportError as e:
+            raise ImportError(
+                "NumPy export needs numpy: pip install pydifact[numpy]"
+            ) from e
+        return {
+            name: (
+                np.array([-1 if v is None else v for v in column], dtype=np.int64)
+                if name in INDEX_COLUMNS
+                else np.array(column, dtype=object)
+            )
+            for name, column in self.to_dict().items()
+        }
+
+    def to_arrow(self) -> Any:
+        """Return all columns as `pyarrow.Table`, e.g. to write Parquet files.
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError(
+                "Arrow export needs pyarrow: pip install pydifact[arrow]"
+            ) from e
+        return pa.table(
+            {
+                name: pa.array(
+                    column, type=pa.int64() if name in INDEX_COLUMNS else pa.string()
+                )
+                for name, column in self.to_dict().items()
+            }
+        )
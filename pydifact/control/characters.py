@@ -21,13 +21,50 @@
 # THE SOFTWARE.
 
 
+import re
 from copy import copy
+from functools import lru_cache
 
 from pydifact.exceptions import ValidationError
 
 
+@lru_cache(maxsize=32)
+def _escape_translation(
+    escape_character: str,
+    component_separator: str,
+    data_separator: str,
+    segment_terminator: str,
+) -> dict[int, str]:
+    """Build (and cache) a `str.translate` table escaping the control characters."""
+    return str.maketrans(
+        {
+            char: escape_character + char
+            for char in (
+                component_separator,
+                data_separator,
+                segment_terminator,
+                escape_character,
+            )
+        }
+    )
+
+
+@lru_cache(maxsize=32)
+def _escape_regexp(*control_characters: str) -> re.Pattern[str]:
+    """Build (and cache) a regular expression matching any of the given characters."""
+    # Thanks to "Bor González Usach" for this wonderful piece of code:
+    # https://gist.github.com/bgusach/a967e0587d6e01e889fd1d776c5f3729
+    substrs = sorted(control_characters, key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, substrs)))
+
+
 class Characters:
-    """A set of control characters to use."""
+    """A set of control characters to use.
+
+    Tables derived from the control characters (like `escape_translation`) are
+    cached by their values, and shared between all instances with the same
+    control characters.
+    """
 
     def __init__(
         self,
@@ -116,6 +153,31 @@ class Characters:
             self.segment_terminator: self.escape_character + self.segment_terminator,
         }
 
+    @property
+    def escape_translation(self) -> dict[int, str]:
+        """A (cached) `str.translate` table that escapes all control characters.
+
+        Raises:
+            ValueError: if a control character is not exactly one character.
+        """
+        return _escape_translation(
+            self.escape_character,
+            self.component_separator,
+            self.data_separator,
+            self.segment_terminator,
+        )
+
+    @property
+    def escape_regexp(self) -> re.Pattern[str]:
+        """A (cached) compiled regular expression matching all control characters
+        that have to be escaped."""
+        return _escape_regexp(
+            self.escape_character,
+            self.component_separator,
+            self.data_separator,
+            self.segment_terminator,
+        )
+
     def __str__(self) -> str:
         return str(
             self.component_separator
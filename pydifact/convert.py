@@ -0,0 +1,498 @@
+# Pydifact - a python edifact library
+#
+# Copyright (c) 2017-2024 Christian González
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Conversion of segments into dicts and JSON, keyed by element names or ids.
+
+A segment like `DTM+137:20240131:102'` is converted into::
+
+    {"tag": "DTM", "DateOrTimeOrPeriod": {"DateOrTimeOrPeriodFunctionCodeQualifier":
+     "137", "DateOrTimeOrPeriodText": "20240131", "DateOrTimeOrPeriodFormatCode": "102"}}
+
+Empty elements are omitted. If a name occurs more than once at the same level (like
+the five address lines of C090), its values are collected in a list. Elements that
+are not defined get their position as key, e.g. "3".
+
+Messages are converted into a dict with their segments, where segment groups are
+nested as `{"group": "SG2", "segments": [...]}`.
+
+`EdifactBuilder` does the reverse: it maps dicts of the same format back to
+element positions and serializes them.
+"""
+
+import json
+from collections.abc import Iterable, Iterator
+from decimal import Decimal
+from typing import Any, NamedTuple, TextIO
+
+from pydifact.constants import (
+    EDI_DEFAULT_DIRECTORY,
+    EDI_DEFAULT_VERSION,
+    Element,
+    Elements,
+    service_segments,
+)
+from pydifact.control import Characters
+from pydifact.definitions import (
+    ElementDefinition,
+    SegmentDefinition,
+    load_segment_definitions,
+)
+from pydifact.exceptions import ValidationError
+from pydifact.segments import Segment
+from pydifact.serializer import Serializer
+from pydifact.structure import GroupTracker, get_message_structure
+from pydifact.utils import get_message_directory, get_syntax_release_version
+
+# A plan to convert the elements at each position: (key, repeated, component plan)
+Plan = tuple[tuple[str, bool, "Plan | None"], ...]
+
+
+def _plan(elements: tuple[ElementDefinition, ...], keys: str) -> Plan:
+    names = [element.id if keys == "id" else element.name for element in elements]
+    return tuple(
+        (
+            name,
+            names.count(name) > 1,
+            _plan(element.components, keys)
+            if element.kind == "composite_data_element" and element.components
+            else None,
+        )
+        for name, element in zip(names, elements)
+    )
+
+
+def _convert(values: list[Element], plan: Plan, out: dict[str, Any]) -> dict:
+    for (key, repeated, components), value in zip(plan, values):
+        if not value:
+            continue
+        if components is not None:
+            value = _convert(
+                [value] if isinstance(value, str) else value, components, {}
+            )
+        if repeated:
+            out.setdefault(key, []).append(value)
+        else:
+            out[key] = value
+    # elements that are not defined
+    for position in range(len(plan), len(values)):
+        if values[position]:
+            out[str(position)] = values[position]
+    return out
+
+
+class DictConverter:
+    """Converts segments into dicts, using the compiled directory definitions.
+
+    Args:
+        keys: "name" to use element names (like "DocumentNameCode") as keys, or
+            "id" for data element ids (like "1001").
+        directory: The directory to use for all messages, e.g. "d24a". By default,
+            the directory is taken from each message header (UNH).
+    """
+
+    def __init__(self, keys: str = "name", directory: str | None = None) -> None:
+        if keys not in ("name", "id"):
+            raise ValueError(f"keys must be 'name' or 'id', not '{keys}'.")
+        self.keys = keys
+        self.directory = directory
+        self._plans: dict[tuple[str, str], Plan | None] = {}
+        self._service_directory = self._get_service_directory(EDI_DEFAULT_VERSION)
+
+    @staticmethod
+    def _get_service_directory(syntax_version: str) -> str:
+        return f"service/v{get_syntax_release_version(syntax_version)}"
+
+    def _get_plan(self, tag: str, directory: str | None) -> Plan | None:
+        if tag in service_segments:
+            directory = self._service_directory
+        if directory is None:
+            return None
+        try:
+            return self._plans[(directory, tag)]
+        except KeyError:
+            pass
+        definition: SegmentDefinition | None
+        try:
+            definition = load_segment_definitions(directory).get(tag)
+        except FileNotFoundError:
+            definition = None
+        plan = _plan(definition.elements, self.keys) if definition else None
+        self._plans[(directory, tag)] = plan
+        return plan
+
+    def segment_to_dict(
+        self, segment: Segment, directory: str | None = None
+    ) -> dict[str, Any]:
+        """Convert a single segment.
+
+        Args:
+            segment: The segment.
+            directory: The directory of the segment definitions, e.g. "d24a".
+        """
+        out: dict[str, Any] = {"tag": segment.tag}
+        return _convert(
+            segment.elements, self._get_plan(segment.tag, directory) or (), out
+        )
+
+    def iter_items(self, segments: Iterable[Segment]) -> Iterator[tuple[str, dict]]:
+        """Convert segments into (kind, dict) tuples, message by message.
+
+        `kind` is "message" for complete messages, and "segment" for segments
+        outside of messages (like UNB and UNZ). UNA segments are skipped.
+        """
+        message: dict[str, Any] | None = None
+        stack: list[list] = []
+        tracker: GroupTracker | None = None
+        directory = self.directory
+
+        for segment in segments:
+            tag = segment.tag
+            if tag == "UNA":
+                continue
+            if tag == "UNB":
+                syntax_identifier = segment[0]
+                if isinstance(syntax_identifier, list) and len(syntax_identifier) > 1:
+                    self._service_directory = self._get_service_directory(
+                        syntax_identifier[1]
+                    )
+            if tag == "UNH":
+                identifier = segment[1]
+                if not isinstance(identifier, list):
+                    identifier = [identifier or ""]
+                directory = self.directory or get_message_directory(identifier)
+                structure = (
+                    get_message_structure(directory, identifier[0])
+                    if directory
+                    else None
+                )
+                tracker = GroupTracker(structure) if structure else None
+                message = {
+                    "reference_number": segment[0],
+                    "type": identifier[0],
+                    "directory": directory,
+                    "segments": [],
+                }
+                stack = [message["segments"]]
+
+            if message is None:
+                yield "segment", self.segment_to_dict(segment)
+                continue
+
+            converted = self.segment_to_dict(segment, directory)
+            path = tracker.feed(tag) if tracker is not None else None
+            if path is not None:
+                if tracker.entered is not None:
+                    # a new group (or repetition) starts
+                    del stack[tracker.entered :]
+                    group = {"group": path[-1], "segments": []}
+                    stack[-1].append(group)
+                    stack.append(group["segments"])
+                else:
+                    del stack[len(path) + 1 :]
+            stack[-1].append(converted)
+
+            if tag == "UNT":
+                yield "message", message
+                message = None
+                directory = self.directory
+
+        if message is not None:
+            # unterminated message
+            yield "message", message
+
+    def iter_messages(self, segments: Iterable[Segment]) -> Iterator[dict[str, Any]]:
+        """Convert segments into one dict per message."""
+        for kind, item in self.iter_items(segments):
+            if kind == "message":
+                yield item
+
+    def to_dict(self, segments: Iterable[Segment]) -> dict[str, Any]:
+        """Convert an interchange into a dict with "header", "messages" and
+        "trailer"."""
+        result: dict[str, Any] = {"header": None, "messages": [], "trailer": None}
+        for kind, item in self.iter_items(segments):
+            if kind == "message":
+                result["messages"].append(item)
+            elif item["tag"] == "UNB":
+                result["header"] = item
+            elif item["tag"] == "UNZ":
+                result["trailer"] = item
+        return result
+
+    def write_json(self, segments: Iterable[Segment], stream: TextIO) -> int:
+        """Write an interchange as JSON into a stream, message by message.
+
+        The JSON has the same structure as `to_dict()`, but only one message is kept
+        in memory at a time, so `segments` should be a generator like
+        `Parser.parse()`. Segments outside of messages other than UNB and UNZ (like
+        functional group headers) are not written.
+
+        Returns:
+            The number of written messages.
+        """
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        started = False
+        trailer = None
+        count = 0
+        for kind, item in self.iter_items(segments):
+            if not started:
+                header = item if kind == "segment" and item["tag"] == "UNB" else None
+                stream.write(f'{{"header":{dumps(header)},"messages":[')
+                started = True
+                if header is not None:
+                    continue
+            if kind == "message":
+                if count:
+                    stream.write(",")
+                stream.write(dumps(item))
+                count += 1
+            elif item["tag"] == "UNZ":
+                trailer = item
+        if not started:
+            stream.write('{"header":null,"messages":[')
+        stream.write(f'],"trailer":{dumps(trailer)}}}')
+        return count
+
+
+class BuildPlan(NamedTuple):
+    """Maps keys to the element positions of a segment or composite."""
+
+    positions: dict[str, list[int]]
+    elements: tuple[ElementDefinition, ...]
+    components: tuple["BuildPlan | None", ...]
+
+
+def _build_plan(elements: tuple[ElementDefinition, ...], keys: str) -> BuildPlan:
+    positions: dict[str, list[int]] = {}
+    for position, element in enumerate(elements):
+        key = element.id if keys == "id" else element.name
+        positions.setdefault(key, []).append(position)
+    return BuildPlan(
+        positions=positions,
+        elements=elements,
+        components=tuple(
+            _build_plan(element.components, keys)
+            if element.kind == "composite_data_element" and element.components
+            else None
+            for element in elements
+        ),
+    )
+
+
+class EdifactBuilder:
+    """Builds EDIFACT segments from dicts with named fields.
+
+    The dicts have the format created by `DictConverter`: a "tag" key and the
+    element names (or ids) as keys. Composites are dicts themselves, and elements
+    that occur more than once at the same level are lists. Values may be strings or
+    numbers; numbers are written with the decimal mark of `characters`.
+
+    Each data element is validated against the directory definition on the way:
+    required elements, maximum lengths and numeric/alphabetic types.
+
+    Args:
+        keys: "name" if the dicts use element names as keys, "id" for ids.
+        directory: The directory of the segment definitions, e.g. "d24a".
+        characters: The control characters to serialize with.
+        syntax_version: The syntax version, used for the service segments.
+        validate: Set to False to skip validation of the values.
+    """
+
+    def __init__(
+        self,
+        keys: str = "name",
+        directory: str = EDI_DEFAULT_DIRECTORY,
+        characters: Characters | None = None,
+        syntax_version: str = EDI_DEFAULT_VERSION,
+        validate: bool = True,
+    ) -> None:
+        if keys not in ("name", "id"):
+            raise ValueError(f"keys must be 'name' or 'id', not '{keys}'.")
+        self.keys = keys
+        self.directory = directory
+        self.serializer = Serializer(characters)
+        self.characters = self.serializer.characters
+        self.service_directory = (
+            f"service/v{get_syntax_release_version(syntax_version)}"
+        )
+        self.validate = validate
+        self._plans: dict[str, BuildPlan] = {}
+
+    def _get_plan(self, tag: str) -> BuildPlan:
+        try:
+            return self._plans[tag]
+        except KeyError:
+            pass
+        definition = None
+        if tag in service_segments:
+            definition = load_segment_definitions(self.service_directory).get(tag)
+        if definition is None:
+            definition = load_segment_definitions(self.directory).get(tag)
+        if definition is None:
+            raise ValidationError(
+                f"No definition found for segment {tag} in directory {self.directory}."
+            )
+        plan = self._plans[tag] = _build_plan(definition.elements, self.keys)
+        return plan
+
+    def _value(self, value: Any, definition: ElementDefinition, where: str) -> str:
+        if isinstance(value, int) and not isinstance(value, bool):
+            value = str(value)
+        elif isinstance(value, (float, Decimal)):
+            value = format(Decimal(str(value)), "f")
+            value = value.replace(".", self.characters.decimal_point)
+        elif not isinstance(value, str):
+            raise ValidationError(f"{where}: expected a simple value, got {value!r}")
+        if not self.validate or definition.kind != "data_element":
+            return value
+        if definition.type == "n":
+            digits = value.lstrip("-").replace(self.characters.decimal_point, "", 1)
+            if not digits.isdigit():
+                raise ValidationError(f"{where}: should be numeric, got {value!r}")
+            # signs and decimal marks don't count for the length
+            length = len(digits)
+        else:
+            if definition.type == "a" and any(char.isdigit() for char in value):
+                raise ValidationError(
+                    f"{where}: should not contain digits, got {value!r}"
+                )
+            length = len(value)
+        if definition.maxlength and length > definition.maxlength:
+            raise ValidationError(
+                f"{where}: exceeds maximum length of {definition.maxlength}: {value!r}"
+            )
+        if definition.length and length != definition.length:
+            raise ValidationError(
+                f"{where}: should be {definition.length} characters long: {value!r}"
+            )
+        return value
+
+    def _build(self, data: dict[str, Any], plan: BuildPlan, where: str) -> list:
+        elements: list[Any] = [""] * len(plan.elements)
+        for key, value in data.items():
+            if key == "tag" or value is None or value == "":
+                continue
+            positions = plan.positions.get(key)
+            if positions is None:
+                if not key.isdigit():
+                    raise ValidationError(f"{where}: unknown element {key!r}")
+                # an element that is not defined, given by position
+                position = int(key)
+                elements.extend([""] * (position + 1 - len(elements)))
+                elements[position] = value
+                continue
+            values = (
+                value if isinstance(value, list) and len(positions) > 1 else [value]
+            )
+            if len(values) > len(positions):
+                raise ValidationError(
+                    f"{where}: {key!r} occurs at most {len(positions)} times"
+                )
+            for position, value in zip(positions, values):
+                definition = plan.elements[position]
+                components = plan.components[position]
+                name = f"{where}, {definition.id} ({definition.name})"
+                if components is not None and isinstance(value, dict):
+                    elements[position] = self._build(value, components, name)
+                elif isinstance(value, list):
+                    # composite without component definitions, given by position
+                    elements[position] = [str(v) for v in value]
+                else:
+                    elements[position] = self._value(value, definition, name)
+
+        if self.validate:
+            for position, definition in enumerate(plan.elements):
+                if definition.required and not elements[position]:
+                    raise ValidationError(
+                        f"{where}: element {definition.id} ({definition.name}) "
+                        f"is required."
+                    )
+        while elements and not elements[-1]:
+            elements.pop()
+        return elements
+
+    def to_elements(self, data: dict[str, Any]) -> tuple[str, Elements]:
+        """Map a segment dict to its tag and positional elements.
+
+        Raises:
+            ValidationError: If the segment is not defined, a key is unknown, or a
+                value is not valid.
+        """
+        tag = data["tag"]
+        return tag, self._build(data, self._get_plan(tag), f"{tag} Segment")
+
+    def serialize_segment(self, data: dict[str, Any], break_lines: bool = False) -> str:
+        """Serialize a segment dict, including its segment terminator."""
+        tag, elements = self.to_elements(data)
+        return self.serializer.serialize_elements(tag, elements, break_lines)
+
+    def write_segments(
+        self,
+        items: Iterable[dict[str, Any]],
+        stream: TextIO,
+        break_lines: bool = False,
+    ) -> int:
+        """Serialize segment dicts into a stream.
+
+        Segment groups (`{"group": ..., "segments": [...]}`) are written in place.
+
+        Returns:
+            The number of written segments.
+        """
+        count = 0
+        for item in items:
+            if "group" in item:
+                count += self.write_segments(item["segments"], stream, break_lines)
+            else:
+                stream.write(self.serialize_segment(item, break_lines))
+                count += 1
+        return count
+
+    def write_message(
+        self, message: dict[str, Any], stream: TextIO, break_lines: bool = False
+    ) -> int:
+        """Serialize a message dict, as created by `DictConverter`, into a stream.
+
+        If the segments don't start with UNH, or don't end with UNT, these are
+        created from "reference_number" and "type" of the message dict.
+
+        Returns:
+            The number of written segments.
+        """
+        segments = message["segments"]
+        count = 0
+        if not segments or segments[0].get("tag") != "UNH":
+            identifier = [message["type"], "D", self.directory[1:].upper(), "UN"]
+            stream.write(
+                self.serializer.serialize_elements(
+                    "UNH", [message["reference_number"], identifier], break_lines
+                )
+            )
+            count += 1
+        count += self.write_segments(segments, stream, break_lines)
+        if not segments or segments[-1].get("tag") != "UNT":
+            count += 1
+            stream.write(
+                self.serializer.serialize_elements(
+                    "UNT", [str(count), message["reference_number"]], break_lines
+                )
+            )
+        return count
@@ -0,0 +1,482 @@
+# Pydifact - a python edifact library
+#
+# Copyright (c) 2017-2024 Christian González
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Compiled segment definitions of EDIFACT directories.
+
+The segments.xml file of a directory is parsed once and compiled into immutable
+`SegmentDefinition`s, which are used for validation. The XML tree itself is not kept.
+
+Compiled definitions are kept in a `DefinitionsCache`. The default `LRUDefinitionsCache`
+can be bounded by number of directories and by (estimated) memory; use
+`set_definitions_cache()` to configure or replace it.
+
+Message definitions are taken from the directory bundles, see
+`pydifact.structure.get_message_definition()` and, for the list of message types,
+`pydifact.structure.get_message_manifest()`.
+"""
+
+import copy
+import gc
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+from types import MappingProxyType
+from typing import TYPE_CHECKING, NamedTuple
+
+from pydifact.constants import EDI_DEFAULT_DIRECTORY, EDI_DEFAULT_VERSION
+from pydifact.utils import get_syntax_release_version
+
+if TYPE_CHECKING:
+    import xml.etree.ElementTree as ET
+
+
+class ElementDefinition(NamedTuple):
+    """A (composite) data element at a position of a segment or composite."""
+
+    kind: str  # "data_element" or "composite_data_element"
+    id: str
+    name: str
+    required: bool
+    repeat: str
+    type: str
+    length: int
+    maxlength: int
+    components: tuple["ElementDefinition", ...] = ()
+
+
+class SegmentDefinition(NamedTuple):
+    """The definition of a segment, with all its elements in order."""
+
+    tag: str
+    name: str
+    elements: tuple[ElementDefinition, ...]
+    required_count: int
+
+
+def get_segments_xml_path(directory: str) -> Path:
+    """Return the path of segments.xml (or simple_segments.xml) of a directory.
+
+    Args:
+        directory: The directory name under pydifact.syntax (e.g., 'd00a', 'd96a')
+
+    Raises:
+        FileNotFoundError: If segments.xml cannot be found in the directory
+    """
+    data_path = Path(__file__).parent / "syntax" / directory / "data"
+    for filename in ("segments.xml", "simple_segments.xml"):
+        if (data_path / filename).exists():
+            return data_path / filename
+    raise FileNotFoundError(f"segments.xml not found in directory: {directory}")
+
+
+def _compile_element(xml_element: "ET.Element") -> ElementDefinition:
+    return ElementDefinition(
+        kind=xml_element.tag,
+        id=xml_element.get("id", ""),
+        name=xml_element.get("name", ""),
+        required=xml_element.get("required", "false").lower() == "true",
+        repeat=xml_element.get("repeat", ""),
+        type=xml_element.get("type", ""),
+        length=int(xml_element.get("length", "0")),
+        maxlength=int(xml_element.get("maxlength", "0")),
+        components=tuple(_compile_element(child) for child in xml_element),
+    )
+
+
+def compile_segments_xml(root: "ET.Element") -> Mapping[str, SegmentDefinition]:
+    """Compile the root element of a segments.xml file into segment definitions.
+
+    Returns:
+        A read-only mapping of segment tags to their definitions.
+    """
+    definitions = {}
+    for segment in root.iter("segment"):
+        tag = segment.get("id", "")
+        elements = tuple(_compile_element(child) for child in segment)
+        definitions.setdefault(
+            tag,
+            SegmentDefinition(
+                tag=tag,
+                name=segment.get("name", ""),
+                elements=elements,
+                required_count=sum(element.required for element in elements),
+            ),
+        )
+    return MappingProxyType(definitions)
+
+
+class CacheStats(NamedTuple):
+    """A snapshot of the statistics of a `DefinitionsCache`."""
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int  # estimated size of all entries in bytes
+    load_time: float  # total seconds spent loading definitions
+
+
+class DefinitionsCache:
+    """Base class for caches of compiled segment definitions, keyed by directory.
+
+    Subclasses must implement `get()`, `put()`, `pin()`, `invalidate()` and
+    `stats()`, and must be thread-safe.
+    """
+
+    def get(self, directory: str) -> Mapping[str, SegmentDefinition] | None:
+        """Return the cached definitions of a directory, or None."""
+        raise NotImplementedError
+
+    def put(
+        self,
+        directory: str,
+        definitions: Mapping[str, SegmentDefinition],
+        load_time: float,
+    ) -> None:
+        """Store the definitions of a directory, which took `load_time` seconds to
+        load."""
+        raise NotImplementedError
+
+    def pin(self, directory: str, definitions: Mapping[str, SegmentDefinition]) -> None:
+        """Store the definitions of a directory, and never evict them, until they
+        are invalidated. Used by `preload()`.
+
+        Raises:
+            ValueError: If the pinned directories do not fit into the cache.
+        """
+        raise NotImplementedError
+
+    def invalidate(self, directory: str | None = None) -> None:
+        """Remove the definitions of a directory, or of all directories if None."""
+        raise NotImplementedError
+
+    def stats(self) -> CacheStats:
+        raise NotImplementedError
+
+
+def estimate_size(definitions: Mapping[str, SegmentDefinition]) -> int:
+    """Estimate the memory used by compiled definitions, in bytes.
+
+    Strings shared between definitions (like element names) are counted once.
+    """
+    seen: set[int] = set()
+
+    def sizeof(obj) -> int:
+        if id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        size = sys.getsizeof(obj)
+        if isinstance(obj, tuple):
+            size += sum(sizeof(item) for item in obj)
+        return size
+
+    return sys.getsizeof(definitions) + sum(
+        sizeof(tag) + sizeof(definition) for tag, definition in definitions.items()
+    )
+
+
+class LRUDefinitionsCache(DefinitionsCache):
+    """Keeps the least recently used directories, within the given limits.
+
+    Pinned directories (see `preload()`) are never evicted, and count against the
+    limits, so other directories are only kept in the remaining space.
+
+    Args:
+        max_entries: The maximum number of directories. None means no limit.
+        max_size: The maximum estimated memory of all definitions in bytes. None
+            means no limit. A directory bigger than that is still cached, as long as
+            it is the only one.
+    """
+
+    def __init__(self, max_entries: int | None = 32, max_size: int | None = None):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[Mapping[str, SegmentDefinition], int]] = (
+            OrderedDict()
+        )
+        self._pinned: set[str] = set()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._load_time = 0.0
+
+    def get(self, directory: str) -> Mapping[str, SegmentDefinition] | None:
+        with self._lock:
+            entry = self._entries.get(directory)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(directory)
+            self._hits += 1
+            return entry[0]
+
+    def put(
+        self,
+        directory: str,
+        definitions: Mapping[str, SegmentDefinition],
+        load_time: float,
+    ) -> None:
+        size = estimate_size(definitions)
+        with self._lock:
+            self._load_time += load_time
+            self._remove(directory)
+            self._entries[directory] = (definitions, size)
+            self._size += size
+            while len(self._entries) > 1 and (
+                (self.max_entries is not None and len(self._entries) > self.max_entries)
+                or (self.max_size is not None and self._size > self.max_size)
+            ):
+                evicted = next(
+                    (entry for entry in self._entries if entry not in self._pinned),
+                    None,
+                )
+                if evicted is None:
+                    break
+                self._remove(evicted)
+                self._evictions += 1
+
+    def pin(self, directory: str, definitions: Mapping[str, SegmentDefinition]) -> None:
+        size = estimate_size(definitions)
+        with self._lock:
+            pinned = self._pinned | {directory}
+            pinned_size = size + sum(
+                self._entries[entry][1]
+                for entry in pinned
+                if entry != directory and entry in self._entries
+            )
+            if self.max_entries is not None and len(pinned) > self.max_entries:
+                raise ValueError(
+                    f"Cannot pin {directory}: {len(pinned)} pinned directories "
+                    f"exceed max_entries={self.max_entries} of the cache."
+                )
+            if (
+                self.max_size is not None
+                and len(pinned) > 1
+                and pinned_size > self.max_size
+            ):
+                raise ValueError(
+                    f"Cannot pin {directory}: the pinned directories "
+                    f"(~{pinned_size} bytes) exceed max_size={self.max_size} of the "
+                    f"cache."
+                )
+            self._remove(directory)
+            self._entries[directory] = (definitions, size)
+            self._size += size
+            self._pinned.add(directory)
+
+    def _remove(self, directory: str) -> None:
+        entry = self._entries.pop(directory, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+    def invalidate(self, directory: str | None = None) -> None:
+        """Remove the definitions of a directory, or of all directories if None.
+
+        This also unpins them.
+        """
+        with self._lock:
+            if directory is None:
+                self._entries.clear()
+                self._pinned.clear()
+                self._size = 0
+            else:
+                self._remove(directory)
+                self._pinned.discard(directory)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                size=self._size,
+                load_time=self._load_time,
+            )
+
+
+_definitions_cache: DefinitionsCache = LRUDefinitionsCache()
+
+
+def get_definitions_cache() -> DefinitionsCache:
+    """Return the cache used for compiled segment definitions."""
+    return _definitions_cache
+
+
+def set_definitions_cache(cache: DefinitionsCache) -> None:
+    """Replace the cache used for compiled segment definitions.
+
+    E.g. `set_definitions_cache(LRUDefinitionsCache(max_size=50_000_000))` keeps
+    the definitions of as many directories as fit into ~50 MB.
+    """
+    global _definitions_cache
+    _definitions_cache = cache
+
+
+class _PendingLoad:
+    """A directory being loaded by one thread, which others wait for."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.definitions: Mapping[str, SegmentDefinition] | None = None
+        self.error: BaseException | None = None
+
+    def raise_error(self, directory: str) -> None:
+        """Raise a new exception for the failed load, chained from its error.
+
+        Each waiting thread gets its own exception object, so that threads do
+        not share (and append to) the traceback of one exception. It is a copy
+        of the error, so callers can catch the same type (e.g.
+        FileNotFoundError), or a RuntimeError if the load was interrupted.
+        """
+        error = self.error
+        assert error is not None
+        if isinstance(error, Exception):
+            try:
+                copied = copy.copy(error)
+            except Exception:
+                pass
+            else:
+                raise copied from error
+        raise RuntimeError(
+            f"Loading the segment definitions of '{directory}' failed"
+        ) from error
+
+
+# directories currently being loaded, so that concurrent threads wait for one
+# load instead of each compiling the same segments.xml
+_pending_loads: dict[str, _PendingLoad] = {}
+_pending_loads_lock = threading.Lock()
+
+
+def load_segment_definitions(directory: str) -> Mapping[str, SegmentDefinition]:
+    """Load the compiled segment definitions of a directory, using the cache.
+
+    Thread-safe: if several threads need the same directory at once, it is
+    loaded only once.
+
+    Args:
+        directory: The directory name under pydifact.syntax (e.g., 'd00a', 'd96a')
+
+    Raises:
+        FileNotFoundError: If segments.xml cannot be found in the directory
+        xml.etree.ElementTree.ParseError: If the XML file cannot be parsed
+    """
+    cache = _definitions_cache
+    definitions = cache.get(directory)
+    if definitions is not None:
+        return definitions
+
+    with _pending_loads_lock:
+        pending = _pending_loads.get(directory)
+        loading = pending is None
+        if pending is None:
+            pending = _pending_loads[directory] = _PendingLoad()
+    if not loading:
+        pending.done.wait()
+        if pending.error is not None:
+            pending.raise_error(directory)
+        assert pending.definitions is not None
+        return pending.definitions
+
+    try:
+        # imported here, as ElementTree is only needed once segments get validated
+        import xml.etree.ElementTree as ET
+
+        start = time.perf_counter()
+        definitions = compile_segments_xml(
+            ET.parse(get_segments_xml_path(directory)).getroot()
+        )
+        cache.put(directory, definitions, time.perf_counter() - start)
+        pending.definitions = definitions
+        return definitions
+    except BaseException as e:
+        pending.error = e
+        raise
+    finally:
+        with _pending_loads_lock:
+            del _pending_loads[directory]
+        pending.done.set()
+
+
+def preload(
+    directories: Iterable[str] | None = None,
+    syntax_versions: Iterable[str] | None = None,
+    freeze: bool = False,
+    message_types: Iterable[str] | None = None,
+) -> None:
+    """Eagerly load all definitions needed for parsing and validation.
+
+    Call this in the master process of a pre-forking server (gunicorn, multiprocessing
+    with the "fork" start method) before forking: the children then share the
+    loaded definitions copy-on-write instead of loading them each on their own.
+
+    The loaded definitions are pinned: the definitions cache and the cache of
+    directory bundles never evict them, so the children never load them again.
+
+    Args:
+        directories: The EDIFACT directories to load, e.g. ["d96a", "d24a"]. Defaults
+            to the default directory.
+        syntax_versions: The syntax versions whose service segments are loaded, e.g.
+            ["3", "4"]. Defaults to the default syntax version.
+        freeze: Move all objects allocated so far into the permanent generation of
+            the garbage collector (`gc.freeze()`), so that collections in the
+            children don't touch, and thus copy, their memory pages.
+        message_types: The message types whose definitions are loaded from the
+            bundle of each directory, e.g. ["ORDERS", "INVOIC"]. By default,
+            message definitions are loaded when they are first needed.
+
+    Raises:
+        FileNotFoundError: If a directory or syntax version has no segments.xml.
+        ValueError: If the directories do not fit into the definitions cache, see
+            `DefinitionsCache.pin()`.
+    """
+    # make sure children don't need to import the modules used for parsing either
+    import xml.etree.ElementTree  # noqa: F401
+
+    import pydifact.parser  # noqa: F401
+    import pydifact.segmentcollection  # noqa: F401
+    from pydifact.structure import get_message_definition, pin_directory_bundle
+
+    if directories is None:
+        directories = [EDI_DEFAULT_DIRECTORY]
+    if syntax_versions is None:
+        syntax_versions = [EDI_DEFAULT_VERSION]
+
+    cache = _definitions_cache
+    for directory in directories:
+        cache.pin(directory, load_segment_definitions(directory))
+        if message_types:
+            pin_directory_bundle(directory)
+            for message_type in message_types:
+                get_message_definition(directory, message_type)
+    for syntax_version in syntax_versions:
+        release_version = get_syntax_release_version(syntax_version)
+        service_directory = f"service/v{release_version}"
+        cache.pin(service_directory, load_segment_definitions(service_directory))
+
+    if freeze:
+        gc.freeze()
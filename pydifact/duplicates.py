@@ -0,0 +1,183 @@
+# Pydifact - a python edifact library
+#
+# Copyright (c) 2017-2024 Christian González
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Indexes of received interchanges, to detect duplicates before parsing them.
+
+An interchange is identified by its sender, recipient and control reference
+(UNB), see `pydifact.probe.InterchangeHeader.key`::
+
+    index = SQLiteDuplicateIndex("received.sqlite")
+    for path in incoming:
+        if not index.add(read_header(path).key):
+            continue  # duplicate, skip it
+        interchange = Interchange.from_file(path)
+
+`MemoryDuplicateIndex` keeps the keys of one process; `SQLiteDuplicateIndex`
+persists them, and can be shared by several processes. Other storages can be
+plugged in by subclassing `DuplicateIndex`.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+InterchangeKey = tuple[str, str, str]
+
+
+class DuplicateIndex:
+    """Base class for indexes of interchange keys (sender, recipient, control
+    reference).
+
+    Subclasses must implement `add()`, `__contains__()`, `discard()` and
+    `__len__()`, and must be thread-safe.
+    """
+
+    def add(self, key: InterchangeKey) -> bool:
+        """Record an interchange key.
+
+        Returns:
+            True if the key is new, False if it was recorded before (a duplicate).
+            Checking and recording is atomic.
+        """
+        raise NotImplementedError
+
+    def __contains__(self, key: object) -> bool:
+        raise NotImplementedError
+
+    def discard(self, key: InterchangeKey) -> None:
+        """Forget an interchange key, e.g. if its processing failed."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release the resources of the index."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class MemoryDuplicateIndex(DuplicateIndex):
+    """Keeps the interchange keys in memory."""
+
+    def __init__(self) -> None:
+        self._keys: set[InterchangeKey] = set()
+        self._lock = threading.Lock()
+
+    def add(self, key: InterchangeKey) -> bool:
+        with self._lock:
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+            return True
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+    def discard(self, key: InterchangeKey) -> None:
+        with self._lock:
+            self._keys.discard(key)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class SQLiteDuplicateIndex(DuplicateIndex):
+    """Keeps the interchange keys in an SQLite database.
+
+    The keys are unique in the database, so several processes can share an index
+    file: of concurrent `add()` calls with the same key, exactly one returns True.
+
+    Args:
+        path: The database file, or ":memory:".
+        timeout: Seconds to wait for a lock held by another process.
+    """
+
+    def __init__(self, path: str | os.PathLike, timeout: float = 30.0) -> None:
+        self._connection = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS interchanges ("
+                "sender TEXT NOT NULL, "
+                "recipient TEXT NOT NULL, "
+                "control_reference TEXT NOT NULL, "
+                "received REAL NOT NULL, "
+                "PRIMARY KEY (sender, recipient, control_reference)"
+                ") WITHOUT ROWID"
+            )
+
+    def add(self, key: InterchangeKey) -> bool:
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT OR IGNORE INTO interchanges VALUES (?, ?, ?, ?)",
+                (*key, time.time()),
+            )
+            return cursor.rowcount == 1
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, tuple) or len(key) != 3:
+            return False
+        with self._lock:
+            cursor = self._connection.execute(
+                "SELECT 1 FROM interchanges "
+                "WHERE sender = ? AND recipient = ? AND control_reference = ?",
+                key,
+            )
+            return cursor.fetchone() is not None
+
+    def discard(self, key: InterchangeKey) -> None:
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM interchanges "
+                "WHERE sender = ? AND recipient = ? AND control_reference = ?",
+                key,
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM interchanges"
+            ).fetchone()[0]
+
+    def prune(self, older_than: float) -> int:
+        """Forget all keys recorded more than `older_than` seconds ago.
+
+        Returns:
+            The number of removed keys.
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                "DELETE FROM interchanges WHERE received < ?",
+                (time.time() - older_than,),
+            )
+            return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -1,14 +1,36 @@
+import io
 import re
 from os import PathLike
-from typing import List
-from xml.dom import minidom
+from typing import List, TextIO
 from xml.etree import ElementTree
 
+from pydifact.generator.xmlwriter import XMLWriter
+
+#: The DOS box-drawing characters of the UNTDID text files (code page 437, read as
+#: Latin-1) and their replacements: horizontal and vertical lines and corners.
+BOX_DRAWING_CHARACTERS = {
+    "\xc4": "-",
+    "\xb3": "|",
+    "\xd9": "+",
+    "\xc1": "+",
+    "\xbf": "+",
+}
+
+#: Only the horizontal line character and its replacement.
+HORIZONTAL_LINE_CHARACTERS = {"\xc4": "-"}
+
+LINE_SPLIT_RE = re.compile(r"[\r\n]+")
+REPR_RE = re.compile(r"^(a?n?)(\.\.)?(\d+)")
+REPR_LINE_RE = re.compile(r"^.?\s{0,4}Repr: (a?n?(?:\.\.)?\d+).*")
+
 
 class UntidBaseParser:
     name: str = ""
     msg_xml: ElementTree.Element
 
+    #: The special characters replaced in the source file before parsing.
+    special_characters: dict[str, str] = HORIZONTAL_LINE_CHARACTERS
+
     def __init__(self) -> None:
         self.errors: List[str] = []
         self.warnings: List[str] = []
@@ -31,9 +53,15 @@ class UntidBaseParser:
 
     def get_xml(self) -> str:
         """Return a formatted XML string."""
-        rough_string = ElementTree.tostring(self.msg_xml, encoding="utf-8")
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ", encoding="utf-8").decode("utf-8")
+        stream = io.StringIO()
+        self.write_xml(stream)
+        return stream.getvalue()
+
+    def write_xml(self, stream: TextIO) -> None:
+        """Write the formatted XML into a text stream, element by element."""
+        writer = XMLWriter(stream)
+        writer.declaration()
+        writer.element(self.msg_xml)
 
     def _validate_input(self, file_path: PathLike | str) -> None:
         raise NotImplementedError
@@ -41,9 +69,22 @@ class UntidBaseParser:
     def _process(self, file_path: PathLike | str) -> None:
         raise NotImplementedError
 
+    def _read_source(self, file_path: PathLike | str) -> str:
+        """Read the source file and replace its special characters.
+
+        The whole file is cleaned up at once. `str.replace` is used instead of
+        `str.translate`, as the latter is about a hundred times slower on
+        non-ASCII text.
+        """
+        with open(file_path, "r", errors="replace") as f:
+            text = f.read()
+        for char, replacement in self.special_characters.items():
+            text = text.replace(char, replacement)
+        return text
+
     def parse_repr(self, repr: str) -> tuple[str, bool, str]:
         """Parse representation string and return type, is_range, and number."""
-        match = re.match(r"^(a?n?)(\.\.)?(\d+)", repr)
+        match = REPR_RE.match(repr)
         if not match:
             return "", False, ""
         else:
@@ -56,7 +97,7 @@ class UntidBaseParser:
 
     def parse_repr_line(self, row: str) -> tuple[str, bool, str]:
         """Parse representation string and return type, is_range, and number."""
-        match = re.match(r"^.?\s{0,4}Repr: (a?n?(?:\.\.)?\d+).*", row)
+        match = REPR_LINE_RE.match(row)
         if not match:
             return "", False, ""
         else:
@@ -0,0 +1,120 @@
+"""Benchmark the UNTDID parsers on an extracted directory release.
+
+The release must have been extracted by the generator before, see
+`pydifact.generator.runner`. Each parser is run `repeat` times over its input
+files, and the best run is reported, so the numbers are comparable across
+changes of the parsers.
+
+Usage:
+    python -m pydifact.generator.benchmark [--repeat=N] release...
+
+Example:
+    python -m pydifact.generator.benchmark --repeat=5 d24a
+"""
+
+import contextlib
+import io
+import sys
+import time
+from os import PathLike
+from pathlib import Path
+
+from pydifact.generator.base import UntidBaseParser
+from pydifact.generator.edcd import EDCDParser
+from pydifact.generator.eded import EDEDParser
+from pydifact.generator.edmd import EDMDParser
+from pydifact.generator.edsd import EDSDParser
+from pydifact.generator.uncl import UNCLParser
+from pydifact.generator.utils import is_prehistoric
+
+extracted_directory = Path(__file__).parent / "extracted"
+
+
+def benchmark_parser(
+    parser_class: type[UntidBaseParser],
+    files: list[PathLike | str],
+    repeat: int = 3,
+    *args,
+) -> float:
+    """Return the best time in seconds to parse all files with the parser class.
+
+    The parsers' console output is discarded.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            for file in files:
+                parser_class(file, *args)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_release(release: str, repeat: int = 3) -> dict[str, float]:
+    """Benchmark all parsers on an extracted directory release.
+
+    Args:
+        release: The directory release, e.g. "d24a".
+        repeat: How often each parser is run, the best time is reported.
+
+    Returns:
+        A dict of parser names and their best time in seconds.
+    """
+    release_upper = release.upper().replace(".", "").replace("-", "")
+    if release_upper.startswith("D"):
+        release_upper = release_upper[1:]
+    source_dir = extracted_directory / f"d{release_upper.lower()}"
+    if not source_dir.is_dir():
+        raise FileNotFoundError(
+            f"Release '{release}' is not extracted, run the generator first."
+        )
+    prehistoric = is_prehistoric(release_upper)
+
+    messages = [
+        file
+        for file in sorted((source_dir / "MESSAGES").iterdir())
+        if file.name[:6] not in ["EDMDI1", "EDMDI2"]
+    ]
+    return {
+        "UNCL": benchmark_parser(
+            UNCLParser, [source_dir / f"UNCL.{release_upper}"], repeat, prehistoric
+        ),
+        "EDED": benchmark_parser(
+            EDEDParser,
+            [source_dir / f"EDED.{release_upper}"],
+            repeat,
+            None,
+            prehistoric,
+        ),
+        "EDCD": benchmark_parser(
+            EDCDParser, [source_dir / f"EDCD.{release_upper}"], repeat
+        ),
+        "EDSD": benchmark_parser(
+            EDSDParser, [source_dir / f"EDSD.{release_upper}"], repeat, prehistoric
+        ),
+        "EDMD": benchmark_parser(EDMDParser, messages, repeat),
+    }
+
+
+def main(argv: list[str]) -> None:
+    repeat = 3
+    releases = []
+    for arg in argv:
+        if arg.startswith("--repeat="):
+            repeat = int(arg.split("=", 1)[1])
+        else:
+            releases.append(arg)
+    if not releases:
+        print(__doc__)
+        sys.exit(1)
+
+    for release in releases:
+        timings = benchmark_release(release, repeat)
+        print(f"Release {release} (best of {repeat}):")
+        for name, seconds in timings.items():
+            print(f"  {name:<6}{seconds * 1000:10.1f} ms")
+        print(f"  {'total':<6}{sum(timings.values()) * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+from os import PathLike
+from pathlib import Path
+from types import ModuleType
+
+# Increase this to invalidate all existing caches, e.g. if the cache format changes.
+CACHE_VERSION = 1
+
+
+def file_digest(path: PathLike | str) -> str:
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class GeneratorCache:
+    """Records the inputs of each generator step, to skip steps that are up to date.
+
+    A step is identified by a name, and is considered fresh if the content hashes of
+    all its input files and of the generator code it uses are the same as when it
+    last ran, and all its output files still exist.
+
+    Args:
+        path: The JSON file to store the cache in.
+    """
+
+    def __init__(self, path: PathLike | str) -> None:
+        self.path = Path(path)
+        self.steps: dict[str, dict[str, str]] = {}
+        self._digests: dict[str, str] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == CACHE_VERSION:
+                    self.steps = data.get("steps", {})
+            except (OSError, ValueError):
+                print(f"WARNING: Ignoring unreadable generator cache '{self.path}'")
+
+    def _digest(self, path: PathLike | str) -> str:
+        key = os.path.realpath(path)
+        if key not in self._digests:
+            self._digests[key] = file_digest(path)
+        return self._digests[key]
+
+    def _fingerprint(
+        self, inputs: list[PathLike | str], code: list[ModuleType]
+    ) -> dict[str, str]:
+        fingerprint = {}
+        for path in inputs:
+            fingerprint[str(path)] = (
+                self._digest(path) if os.path.exists(path) else "missing"
+            )
+        for module in code:
+            assert module.__file__ is not None
+            fingerprint[f"code:{module.__name__}"] = self._digest(module.__file__)
+        return fingerprint
+
+    def is_fresh(
+        self,
+        step: str,
+        inputs: list[PathLike | str],
+        outputs: list[PathLike | str],
+        code: list[ModuleType],
+    ) -> bool:
+        """Check if a step can be skipped.
+
+        Args:
+            step: The name of the step.
+            inputs: The input files of the step.
+            outputs: The output files of the step, which must all exist.
+            code: The generator modules the step uses.
+        """
+        if not all(os.path.exists(output) for output in outputs):
+            return False
+        return self.steps.get(step) == self._fingerprint(inputs, code)
+
+    def update(
+        self,
+        step: str,
+        inputs: list[PathLike | str],
+        code: list[ModuleType],
+    ) -> None:
+        """Record the current inputs of a step after it ran successfully."""
+        # inputs could have been changed by the step itself (e.g. renamed)
+        for path in inputs:
+            self._digests.pop(os.path.realpath(path), None)
+        self.steps[step] = self._fingerprint(inputs, code)
+
+    def invalidate(self, step: str) -> None:
+        """Forget a step, so it runs again next time."""
+        self.steps.pop(step, None)
+
+    def save(self) -> None:
+        """Write the cache to its JSON file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "steps": self.steps}, f, indent=1)
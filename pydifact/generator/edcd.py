@@ -4,7 +4,23 @@ from pathlib import Path
 from typing import Any, Dict, List
 from xml.etree import ElementTree
 
-from pydifact.generator.base import UntidBaseParser
+from pydifact.generator.base import LINE_SPLIT_RE, UntidBaseParser
+
+SECTION_SPLIT_RE = re.compile(r"(?= +[CS]\d{3} +[A-Z/ ]+ *)")
+SEPARATOR_RE = re.compile(r"[-─\xc4]{70,}")
+
+HEADER_RE = re.compile(r"[*+ |X]*([A-Z][0-9]{3}) +([A-Z /]+)")
+DESC_RE = re.compile(r" +Desc: (.*)")
+DESC_CONTINUATION_RE = re.compile(r"^ {12,17}(.+)")
+
+# 010    8179  Transport means description code          C      an..8
+ELEMENT_RE = re.compile(
+    r"[\d]{3}.{4}([\w]{4})\s([\w\s\/]{10,43})(?:([\w]{1})([\d\s]{5}))?"
+    r"(?:\s{1}([\w\d\.]{2,8}))*"
+)
+ELEMENT_CONTINUATION_RE = re.compile(
+    r"[\s]{12}([\w\s]{43})([\w]{1})([\d\s]{5})(?:\s{1}([\w\d\.]{2,8}))*"
+)
 
 
 class EDCDParser(UntidBaseParser):
@@ -59,17 +75,13 @@ class EDCDParser(UntidBaseParser):
 
     def _process(self, file_path: PathLike | str) -> None:
         """Process EDCD file and build XML structure."""
-        with open(file_path, "r", errors="replace") as f:
-            file_lines = f.read()
-
-        # Replace special characters
-        file_lines = file_lines.replace("\xc4", "-")
+        file_lines = self._read_source(file_path)
 
         # Split by S000/C000 lines
-        edcd_list = re.split(r"(?= +[CS]\d{3} +[A-Z/ ]+ *)", file_lines)
+        edcd_list = SECTION_SPLIT_RE.split(file_lines)
 
         if len(edcd_list) < 2:
-            edcd_list = re.split(r"[-─\xc4]{70,}", file_lines)
+            edcd_list = SEPARATOR_RE.split(file_lines)
             if len(edcd_list) < 2:
                 self.warnings.append(
                     f"File '{file_path}' may not be properly formatted - found only {len(edcd_list)} sections"
@@ -79,7 +91,7 @@ class EDCDParser(UntidBaseParser):
         edcd_list = edcd_list[1:]
 
         for edcd_element in edcd_list:
-            parts = re.split(r"[\r\n]+", edcd_element)
+            parts = LINE_SPLIT_RE.split(edcd_element)
 
             composite_code = ""
             composite_title = ""
@@ -98,9 +110,7 @@ class EDCDParser(UntidBaseParser):
 
                 # Parse segment name and change indicator
                 if composite_code == "":
-                    match = re.match(
-                        r"[*+ |X]*([A-Z][0-9]{3}) +([A-Z /]+)", row.strip()
-                    )
+                    match = HEADER_RE.match(row.strip())
                     if not match:
                         self.warnings.append(f"Could not parse segment header: {row}")
                         break
@@ -112,12 +122,12 @@ class EDCDParser(UntidBaseParser):
 
                 # Parse function/description
                 if composite_function == "":
-                    match = re.match(r" +Desc: (.*)", row)
+                    match = DESC_RE.match(row)
                     if match:
                         composite_function = match.group(1).strip()
                         i += 1
                         while i < len(parts) and len(parts[i]) > 1:
-                            match2 = re.match(r"^ {12,17}(.+)", parts[i])
+                            match2 = DESC_CONTINUATION_RE.match(parts[i])
                             if match2:
                                 composite_function += " " + match2.group(1).strip()
                                 i += 1
@@ -126,10 +136,7 @@ class EDCDParser(UntidBaseParser):
                         continue
 
                 # Parse element list
-                match = re.match(
-                    r"[\d]{3}.{4}([\w]{4})\s([\w\s\/]{10,43})(?:([\w]{1})([\d\s]{5}))?(?:\s{1}([\w\d\.]{2,8}))*",
-                    parts[i],
-                )
+                match = ELEMENT_RE.match(parts[i])
                 if match:
                     data_element = {
                         "elementId": match.group(1),
@@ -150,10 +157,7 @@ class EDCDParser(UntidBaseParser):
                         if i >= len(parts) or len(parts[i]) < 1:
                             continue
 
-                        match2 = re.match(
-                            r"[\s]{12}([\w\s]{43})([\w]{1})([\d\s]{5})(?:\s{1}([\w\d\.]{2,8}))*",
-                            parts[i],
-                        )
+                        match2 = ELEMENT_CONTINUATION_RE.match(parts[i])
                         if not match2:
                             i += 1
                             continue
@@ -3,7 +3,19 @@ from os import PathLike
 from pathlib import Path
 from xml.etree import ElementTree
 
-from pydifact.generator.base import UntidBaseParser
+from pydifact.generator.base import LINE_SPLIT_RE, UntidBaseParser
+
+SECTION_SPLIT_RE = re.compile(r"(?=^\s{0,5}\d{4}\s+\S.+)", re.M)
+
+HEADER_RE = re.compile(r"^(.{5})([\d]{4}\s{2})(.{56})\[([A-Z]?)\]")
+PREHISTORIC_HEADER_RE = re.compile(r"^()([\d]{4}\s)(.+?)\s{4,}(.*)")
+INDENTED_HEADER_RE = re.compile(r"^ {2,5}([\d]{4})\s{2}(.*)")
+SHORT_HEADER_RE = re.compile(r"^(.{5})([\d]{4}\s{2})(.*)")
+USAGE_RE = re.compile(r"^[\s]{11}(.*)\[([A-Z]?)]")
+
+DESC_RE = re.compile(r"^[*+ |X]*Desc:\s(.*)")
+NOTE_RE = re.compile(r"^\s{0,5}Note: (.*)")
+CONTINUATION_RE = re.compile(r"^\s{6,11}(.*)")
 
 
 class EDEDParser(UntidBaseParser):
@@ -63,14 +75,10 @@ class EDEDParser(UntidBaseParser):
 
     def _process(self, file_path: PathLike | str) -> None:
         """Process EDED file and build XML structure."""
-        with open(file_path, "r", errors="replace") as f:
-            file_lines = f.read()
-
-        # Replace special characters
-        file_lines = file_lines.replace("\xc4", "-")
+        file_lines = self._read_source(file_path)
 
         # Split by separator line (70 dashes)
-        eded_list = re.split(r"(?=^\s{0,5}\d{4}\s+\S.+)", file_lines, flags=re.M)
+        eded_list = SECTION_SPLIT_RE.split(file_lines)
 
         if len(eded_list) < 2:
             self.warnings.append(
@@ -81,7 +89,7 @@ class EDEDParser(UntidBaseParser):
         eded_list = eded_list[1:]
 
         for eded_element in eded_list:
-            parts = re.split(r"[\r\n]+", eded_element)
+            parts = LINE_SPLIT_RE.split(eded_element)
 
             element_status = ""
             element_code = ""
@@ -103,20 +111,18 @@ class EDEDParser(UntidBaseParser):
                 # Parse element header
                 if element_code == "":
                     if self.is_prehistoric:
-                        match = re.match(r"^()([\d]{4}\s)(.+?)\s{4,}(.*)", row)
+                        match = PREHISTORIC_HEADER_RE.match(row)
                     else:
-                        match = re.match(
-                            r"^(.{5})([\d]{4}\s{2})(.{56})\[([A-Z]?)\]", row
-                        )
+                        match = HEADER_RE.match(row)
                     if not match:
-                        match = re.match(r"^ {2,5}([\d]{4})\s{2}(.*)", row)
+                        match = INDENTED_HEADER_RE.match(row)
                         if match:
                             element_code = match.group(1).strip()
                             element_title = match.group(2).strip()
                             i += 1
                             continue
 
-                        match = re.match(r"^(.{5})([\d]{4}\s{2})(.*)", row)
+                        match = SHORT_HEADER_RE.match(row)
                         if not match:
                             self.warnings.append(
                                 f"Could not parse element header: {row}"
@@ -134,7 +140,7 @@ class EDEDParser(UntidBaseParser):
                             )
                             break
 
-                        match2 = re.match(r"^[\s]{11}(.*)\[([A-Z]?)]", parts[i])
+                        match2 = USAGE_RE.match(parts[i])
                         if not match2:
                             self.warnings.append(
                                 f"Could not parse element usage: {parts[i]}"
@@ -164,12 +170,12 @@ class EDEDParser(UntidBaseParser):
 
                 # Parse description
                 if element_description == "":
-                    match = re.match(r"^[*+ |X]*Desc:\s(.*)", row)
+                    match = DESC_RE.match(row)
                     if match:
                         element_description = match.group(1).strip()
                         i += 1
                         while i < len(parts) and len(parts[i]) > 1:
-                            match2 = re.match(r"^\s{6,11}(.*)", parts[i])
+                            match2 = CONTINUATION_RE.match(parts[i])
                             if match2:
                                 element_description += " " + match2.group(1).strip()
                                 i += 1
@@ -203,12 +209,12 @@ class EDEDParser(UntidBaseParser):
 
                 # Parse note
                 if element_note == "":
-                    match = re.match(r"^\s{0,5}Note: (.*)", row)
+                    match = NOTE_RE.match(row)
                     if match:
                         element_note = match.group(1).strip()
                     i += 1
                     while i < len(parts) and len(parts[i]) > 1:
-                        match = re.match(r"^[\s]{6,11}(.*)", parts[i])
+                        match = CONTINUATION_RE.match(parts[i])
                         if match:
                             if element_note:
                                 element_note += " "
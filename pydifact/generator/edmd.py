@@ -4,13 +4,31 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 from xml.etree import ElementTree
 
-from pydifact.generator.base import UntidBaseParser
+from pydifact.generator.base import BOX_DRAWING_CHARACTERS, UntidBaseParser
+
+# Classifies the message metadata lines of the EDMD header in one pass. The group
+# names are the ids of the data elements the values are defaults for, prefixed
+# with "e".
+DEFAULTS_RE = re.compile(
+    r"^ {,43}(?:"
+    r"Message [Tt]ype {,7}: (?P<e0065>[A-Z]{6}) *$"
+    r"|(?:Message )?[Vv]ersion(?: [Nn]umber){,7}: (?P<e0052>[A-Z]{1}) *$"
+    r"|(?:Message )?[Rr]elease(?: [Nn]umber){,7}: (?P<e0054>[A-Z0-9]{3}).*$"
+    r"|(?:Contr.|Controlling) [Aa]gency{,7}: (?P<e0051>[A-Z]{2}).*$"
+    r")"
+)
+TABLE_HEADER_RE = re.compile(r"Pos\s+Tag Name\s+S\s+R")
+SEGMENT_RE = re.compile(
+    r"(\d{4,5})[X\*\+\|\s]+([\w\s]{4})(.{41})(.{2})\s+(\d{1,5})(.*)"
+)
+NUMBER_RE = re.compile(r"\d+")
 
 
 class EDMDParser(UntidBaseParser):
     """Parser for EDIFACT Message Directory (EDMD) files."""
 
     name = "EDMD"
+    special_characters = BOX_DRAWING_CHARACTERS
 
     def __init__(self, file_path: PathLike | str):
         super().__init__()
@@ -100,8 +118,7 @@ class EDMDParser(UntidBaseParser):
             self.errors.append(f"{file_path} is a directory")
             return
 
-        with open(file_path, "r", errors="replace") as f:
-            file_lines = f.readlines()
+        file_lines = self._read_source(file_path).split("\n")
 
         skip = True
         current_level = 0
@@ -114,53 +131,19 @@ class EDMDParser(UntidBaseParser):
         def_xml = ElementTree.SubElement(self.msg_xml, "defaults")
 
         for line in file_lines:
-            # Replace special characters
-            line = line.replace("\xc4", "-")
-            line = line.replace("\xb3", "|")
-            line = line.replace("\xd9", "+").replace("\xc1", "+").replace("\xbf", "+")
-
-            # Parse message metadata
-            match = re.match(r"^ {,43}Message [Tt]ype {,7}: ([A-Z]{6}) *$", line)
-            if match:
-                defaults["0065"] = match.group(1)
+            # Parse message metadata: message type (0065), version (0052),
+            # release (0054) and controlling agency (0051)
+            match = DEFAULTS_RE.match(line)
+            if match and match.lastgroup:
+                element_id = match.lastgroup[1:]
+                defaults[element_id] = match[match.lastgroup]
                 cdef_xml = ElementTree.SubElement(def_xml, "data_element")
-                cdef_xml.set("id", "0065")  # Message type
-                cdef_xml.set("value", match.group(1))
-
-            match = re.match(
-                r"^ {,43}(?:Message )?[Vv]ersion(?: [Nn]umber){,7}: ([A-Z]{1}) *$",
-                line,
-            )
-            if match:
-                defaults["0052"] = match.group(1)
-                cdef_xml = ElementTree.SubElement(def_xml, "data_element")
-                cdef_xml.set("id", "0052")  # Message version number
-                cdef_xml.set("value", match.group(1))
-
-            match = re.match(
-                r"^ {,43}(?:Message )?[Rr]elease(?: [Nn]umber){,7}: ([A-Z0-9]{"
-                r"3}).*$",
-                line,
-            )
-            if match:
-                defaults["0054"] = match.group(1)
-                cdef_xml = ElementTree.SubElement(def_xml, "data_element")
-                cdef_xml.set("id", "0054")  # Message type release number
-                cdef_xml.set("value", match.group(1))
-
-            match = re.match(
-                r"^ {,43}(?:Contr.|Controlling) [Aa]gency{,7}: ([A-Z]{2}).*$",
-                line,
-            )
-            if match:
-                defaults["0051"] = match.group(1)
-                cdef_xml = ElementTree.SubElement(def_xml, "data_element")
-                cdef_xml.set("id", "0051")  # Controlling agency
-                cdef_xml.set("value", match.group(1))
+                cdef_xml.set("id", element_id)
+                cdef_xml.set("value", defaults[element_id])
 
             # Skip until we find the header line
             if skip:
-                if re.search(r"Pos\s+Tag Name\s+S\s+R", line):
+                if TABLE_HEADER_RE.search(line):
                     skip = False
                 continue
 
@@ -169,15 +152,13 @@ class EDMDParser(UntidBaseParser):
                 continue
 
             # Parse segment line
-            match = re.match(
-                r"(\d{4,5})[X\*\+\|\s]+([\w\s]{4})(.{41})(.{2})\s+(\d{1,5})(.*)", line
-            )
+            match = SEGMENT_RE.match(line)
             if not match:
                 continue
 
             parts = [match.group(i).strip() for i in range(1, 7)]
 
-            if not parts[0] or not re.match(r"\d+", parts[0]):
+            if not parts[0] or not NUMBER_RE.match(parts[0]):
                 continue
 
             # Handle segment groups
@@ -189,9 +170,9 @@ class EDMDParser(UntidBaseParser):
                 while len(current_index) <= current_level:
                     current_index.append(None)
 
-                sg_match = re.search(r"(\d+)", parts[2])
+                sg_match = NUMBER_RE.search(parts[2])
                 if sg_match:
-                    sg_index = f"SG{sg_match.group(1)}"
+                    sg_index = f"SG{sg_match.group()}"
                     if sg_index not in groups:
                         parts[1] = sg_index
                         groups[sg_index] = self._create_segment(parts, False)
@@ -4,7 +4,30 @@ from pathlib import Path
 from typing import Any, Dict, List
 from xml.etree import ElementTree
 
-from pydifact.generator.base import UntidBaseParser
+from pydifact.generator.base import LINE_SPLIT_RE, UntidBaseParser
+
+PREHISTORIC_INTRO_RE = re.compile(r"SEGMENTS SPECIFICATIONS", re.M | re.I)
+PREHISTORIC_SECTION_SPLIT_RE = re.compile(
+    r"(?=^[ +*#|X]+[A-Z]{3} {1,3}[\w -,/]+(?: {4,}[()\d.][()\d. ]{2,11})?$)", re.M
+)
+SECTION_SPLIT_RE = re.compile(r"(?=^ {2,7}[A-Z]{3}  +\S*)", re.M)
+
+HEADER_RE = re.compile(r"[ +*#|X]+([A-Z]{3}) +(.+)")
+PREHISTORIC_HEADER_RE = re.compile(r"^[+*| ]*([A-Z]{3}) +([\w -,/]+?)(?: {4,}.*)?$")
+FUNCTION_RE = re.compile(r"[\s|]?\s{,7}Function: (.*)")
+FUNCTION_CONTINUATION_RE = re.compile(r"^[\s]{10,17}(.*)")
+
+ELEMENT_RE = re.compile(r"[*+|X ]{0,5}(\d{3}|) *([CS\d]\d{3}) .+")
+ELEMENT_CONTINUATION_RE = re.compile(r"^ {11,14}(.+)$")
+TOP_LEVEL_ELEMENT_RE = re.compile(
+    r"^(\d{3}|)[*+|X ]*[CS\d]\d{3} +([A-Z,\- '\/]{7,}) +([MC])"
+    r"( *\d{1,3}|) *([an]+\.*\d{1,3}|) *(.+|)$"
+)
+SUB_ELEMENT_RE = re.compile(
+    r"^(\d{3}|)[*+|X ]*[CS\d]\d{3} +(.+) *([MC]) *"
+    r"(?:(\d{,3})?([an]+\.*\d{1,3})?(.*)?)?"
+)
+TOP_LEVEL_NAME_RE = re.compile(r"^[A-Z,\- '\/]+$")
 
 
 class EDSDParser(UntidBaseParser):
@@ -46,30 +69,17 @@ class EDSDParser(UntidBaseParser):
 
     def _process(self, file_path: PathLike | str) -> None:
         """Process EDSD file and build XML structure."""
-        with open(file_path, "r", errors="replace") as f:
-            file_lines = f.read()
-
-        # Replace special characters
-        file_lines = file_lines.replace("\xc4", "-")  # replace "─" with "-"
+        file_lines = self._read_source(file_path)
 
         # Split by Segment headers
         if self.is_prehistoric:
             # snip preceeding blabla
-            file_lines = re.split(
-                r"SEGMENTS SPECIFICATIONS",
-                file_lines,
-                flags=re.MULTILINE | re.IGNORECASE,
-            )[1]
+            file_lines = PREHISTORIC_INTRO_RE.split(file_lines)[1]
             # split files at Segment headers, preserving them
-            edsd_list = re.split(
-                r"(?=^[ +*#|X]+[A-Z]{3} {1,3}[\w -,/]+(?: {4,}[()\d.][()\d. "
-                r"]{2,11})?$)",
-                file_lines,
-                flags=re.M,
-            )
+            edsd_list = PREHISTORIC_SECTION_SPLIT_RE.split(file_lines)
         else:
             # split files at Segment headers, preserving them
-            edsd_list = re.split(r"(?=^ {2,7}[A-Z]{3}  +\S*)", file_lines, flags=re.M)
+            edsd_list = SECTION_SPLIT_RE.split(file_lines)
 
         if len(edsd_list) < 2:
             self.warnings.append(
@@ -80,7 +90,7 @@ class EDSDParser(UntidBaseParser):
         edsd_list = edsd_list[1:]
 
         for edsd_item in edsd_list:
-            parts = re.split(r"[\r\n]+", edsd_item)
+            parts = LINE_SPLIT_RE.split(edsd_item)
 
             segment_code = ""
             segment_title = ""
@@ -97,12 +107,9 @@ class EDSDParser(UntidBaseParser):
                 # Parse segment name
                 if segment_code == "":
                     if self.is_prehistoric:
-                        match = re.match(
-                            r"^[+*| ]*([A-Z]{3}) +([\w -,/]+?)(?: {4,}.*)?$",
-                            row,
-                        )
+                        match = PREHISTORIC_HEADER_RE.match(row)
                     else:
-                        match = re.match(r"[ +*#|X]+([A-Z]{3}) +(.+)", row)
+                        match = HEADER_RE.match(row)
                     if not match:
                         self.warnings.append(f"Could not parse segment header: '{row}'")
                         break
@@ -114,12 +121,12 @@ class EDSDParser(UntidBaseParser):
 
                 # Parse function
                 if segment_function == "":
-                    match = re.match(r"[\s|]?\s{,7}Function: (.*)", row)
+                    match = FUNCTION_RE.match(row)
                     if match:
                         segment_function = match.group(1)
                         i += 1
                         while i < len(parts) and len(parts[i]) > 1:
-                            match_second_line = re.match(r"^[\s]{10,17}(.*)", parts[i])
+                            match_second_line = FUNCTION_CONTINUATION_RE.match(parts[i])
                             if match_second_line:
                                 segment_function += (
                                     " " + match_second_line.group(1).strip()
@@ -142,9 +149,7 @@ class EDSDParser(UntidBaseParser):
                 #       1131  Code list identification code             C      an..17
 
                 # first check if it matches generally a data/composite element:
-                match_generic = re.match(
-                    r"[*+|X ]{0,5}(\d{3}|) *([CS\d]\d{3}) .+", parts[i]
-                )
+                match_generic = ELEMENT_RE.match(parts[i])
                 if match_generic:
                     # we can be sure this is a composite/data element row.
                     element_pos = match_generic.group(1)
@@ -160,20 +165,15 @@ class EDSDParser(UntidBaseParser):
                             and i + 1 < len(parts)
                             and len(parts[i + 1]) > 0
                         ):
-                            match_second_line = re.match(
-                                r"^ {11,14}(.+)$",
-                                parts[i + 1],
+                            match_second_line = ELEMENT_CONTINUATION_RE.match(
+                                parts[i + 1]
                             )
                             if match_second_line:
                                 i += 1
                                 row = row + " " + parts[i].lstrip()
 
                     # First, try to match the top level data 1-line rows
-                    if match := re.match(
-                        r"^(\d{3}|)[*+|X ]*[CS\d]\d{3} +([A-Z,\- '\/]{7,}) +([MC])"
-                        r"( *\d{1,3}|) *([an]+\.*\d{1,3}|) *(.+|)$",
-                        row,
-                    ):
+                    if match := TOP_LEVEL_ELEMENT_RE.match(row):
                         # Extract composite data element attributes from matched row
                         element_pos = match.group(1)
                         element_repitition = (
@@ -198,10 +198,7 @@ class EDSDParser(UntidBaseParser):
                         #            qualifier
                         i += 1
                         if i < len(parts) and parts[i].strip():
-                            match_second_line = re.match(
-                                r"^ {11,14}(.+)$",
-                                parts[i],
-                            )
+                            match_second_line = ELEMENT_CONTINUATION_RE.match(parts[i])
                             if match_second_line:
                                 data_element["elementName"] += (
                                     " " + match_second_line.group(1).strip()
@@ -209,7 +206,7 @@ class EDSDParser(UntidBaseParser):
 
                         # if name consists only of CAPITALS, this is a top level
                         # element.
-                        if re.match(r"^[A-Z,\- '\/]+$", data_element["elementName"]):
+                        if TOP_LEVEL_NAME_RE.match(data_element["elementName"]):
                             if data_element["composite"]:
                                 data_element["children"] = []
                             data_elements.append(data_element)
@@ -220,11 +217,7 @@ class EDSDParser(UntidBaseParser):
                         continue
 
                     # Then find the sub elements
-                    elif match := re.match(
-                        r"^(\d{3}|)[*+|X ]*[CS\d]\d{3} +(.+) *([MC]) *"
-                        r"(?:(\d{,3})?([an]+\.*\d{1,3})?(.*)?)?",
-                        row,
-                    ):
+                    elif match := SUB_ELEMENT_RE.match(row):
                         i += 1
                         continue
                         element_pos = match.group(1)
@@ -2,11 +2,16 @@ import os
 import re
 import sys
 import zipfile
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
 from os import PathLike
 from pathlib import Path
+from types import ModuleType
 from xml.etree import ElementTree
 
+from pydifact.bundle import build_bundle
+from pydifact.generator import constants
 from pydifact.generator.base import UntidBaseParser
+from pydifact.generator.cache import GeneratorCache
 from pydifact.generator.constants import (
     V3_SERVICE_CODE_LISTS,
     V4_SERVICE_CODE_LISTS,
@@ -21,6 +26,7 @@ from pydifact.generator.edsd import EDSDParser
 from pydifact.generator.uncl import UNCLParser
 from pydifact.generator.unsl import UNSLParser
 from pydifact.generator.utils import download_file, is_prehistoric
+from pydifact.generator.xmlwriter import XMLWriter
 
 V4_RELEASE_NUMBER = "40219"
 zips_directory = Path(__file__).parent / "zips"
@@ -28,9 +34,14 @@ zips_directory = Path(__file__).parent / "zips"
 
 def print_usage() -> None:
     print("""
-Usage: python edifact_generator.py  ( release | "service" syntax-version ) 
+Usage: python edifact_generator.py  [--jobs=N] [--force] ( release... | "service" syntax-version ) 
 Options:
-    release             EDIFACT Directory release, e.g. 'd24a', 'D21B', '90-1', 'service'
+    --jobs=N            Number of worker processes (default: number of CPUs,
+                        1 = no parallelization)
+    --force             Regenerate all files of a directory release, even if the
+                        sources did not change since the last run
+    release             EDIFACT Directory release, e.g. 'd24a', 'D21B', '90-1', 'service'.
+                        Multiple releases are generated concurrently.
     service-release     If release is 'service', you have to provide a service release 
                         or syntax version like
                             '1', '2'          (for syntax v1+2)
@@ -38,6 +49,7 @@ Options:
                             '40100', '40219'  (for syntax v4)
 Examples:
     pydifact-generator d24a
+    pydifact-generator --jobs=4 d21a d23a d24a
     pydifact-generator 90-1
     pydifact-generator service 19A
     pydifact-generator service 40219
@@ -45,25 +57,27 @@ Examples:
 """)
 
 
-def xml_adopt(root: ElementTree.Element, new: ElementTree.Element) -> None:
-    """
-    Recursively adopt a new XML element into a root element.
+class SerialExecutor(Executor):
+    """An executor that runs all submitted jobs immediately in the calling process."""
 
-    Args:
-        root: The parent element to adopt into
-        new: The new element to be adopted
-    """
-    # Create a new child node
-    node = ElementTree.SubElement(root, new.tag)
-    node.text = new.text
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
 
-    # Copy attributes
-    for attr, value in new.attrib.items():
-        node.set(attr, value)
 
-    # Recursively copy children
-    for child in new:
-        xml_adopt(node, child)
+def get_executor(jobs: int | None = None) -> Executor:
+    """Return a process pool with `jobs` workers, or a `SerialExecutor` if jobs is 1.
+
+    Args:
+        jobs: The number of worker processes. `None` means the number of CPUs.
+    """
+    if jobs == 1:
+        return SerialExecutor()
+    return ProcessPoolExecutor(max_workers=jobs)
 
 
 def _is_within_directory(
@@ -188,7 +202,7 @@ def extract_edifact_data(
     print(f"Parsing {parser.name}... for release '{release}'")
     try:
         with open(output_file, "w", encoding="utf-8") as f:
-            f.write(parser.get_xml())
+            parser.write_xml(f)
 
         if parser.has_warnings():
             print(f"{parser.name} parser warnings:")
@@ -209,6 +223,27 @@ def extract_edifact_data(
         raise e
 
 
+def code_of(*parser_classes: type[UntidBaseParser]) -> list[ModuleType]:
+    """Return the generator modules the given parser classes depend on."""
+    modules = [sys.modules[UntidBaseParser.__module__], sys.modules[constants.__name__]]
+    return modules + [sys.modules[cls.__module__] for cls in parser_classes]
+
+
+def run_parser(
+    parser_class: type[UntidBaseParser],
+    input_file: PathLike | str,
+    output_file: str,
+    release: str,
+    *args,
+) -> None:
+    """Create a parser for the input file and write its XML output to a file.
+
+    This is a picklable job for worker processes: the parser is created and
+    used in the worker, only the output file is shared.
+    """
+    extract_edifact_data(parser_class(input_file, *args), output_file, release)
+
+
 def get_syntax_version(argv: list) -> tuple[str, str, str]:
     """Parses service/syntax_version foo_release from command line argument"""
     if len(argv) > 1:
@@ -258,13 +293,35 @@ def get_syntax_version(argv: list) -> tuple[str, str, str]:
     sys.exit(1)
 
 
-def parse_messages(source_dir, target_dir) -> None:
-    # Parse EDMD (messages)
-    print("Parsing EDMD... (Messages directory)")
-    message_parse_errors = 0
-    message_parse_warnings = 0
+def parse_message_file(
+    source_file: PathLike | str, target_file: PathLike | str
+) -> tuple[list[str], list[str]]:
+    """Parse a single EDMD file and write its XML output to target_file.
+
+    Returns:
+        A tuple of the parser's warnings and errors.
+    """
+    p = EDMDParser(source_file)
+    with open(target_file, "w", encoding="utf-8") as f:
+        p.write_xml(f)
+    return p.get_warnings(), p.get_errors()
+
 
-    for file in os.listdir(source_dir):
+def submit_message_jobs(
+    source_dir, target_dir, executor: Executor, cache: GeneratorCache | None = None
+) -> dict[str, Future]:
+    """Submit one parsing job per EDMD (message) file in source_dir to the executor.
+
+    If a `cache` is given, files that did not change since the last run are
+    skipped. The caller has to update the cache after the jobs succeeded.
+
+    Returns:
+        A dict of file names and their job futures, to be passed to
+        `report_message_jobs`.
+    """
+    print("Parsing EDMD... (Messages directory)")
+    jobs: dict[str, Future] = {}
+    for file in sorted(os.listdir(source_dir)):
         if file in [".", ".."]:
             continue
 
@@ -272,32 +329,43 @@ def parse_messages(source_dir, target_dir) -> None:
         if name in ["EDMDI1", "EDMDI2"]:
             continue
 
+        source_file = os.path.join(source_dir, file)
+        target_file = f"{target_dir}/{name.lower()}.xml"
+        if cache and cache.is_fresh(
+            f"EDMD:{file}", [source_file], [target_file], code_of(EDMDParser)
+        ):
+            continue
+
+        jobs[file] = executor.submit(parse_message_file, source_file, target_file)
+    return jobs
+
+
+def report_message_jobs(jobs: dict[str, Future]) -> None:
+    """Wait for the EDMD parsing jobs and print their warnings and errors."""
+    message_parse_errors = 0
+    message_parse_warnings = 0
+
+    # report in a stable order, regardless of which job finished first
+    for file, job in jobs.items():
         try:
-            p = EDMDParser(os.path.join(source_dir, file))
-            data = p.get_xml()
-
-            if p.has_warnings():
-                print(f"EDMD Parser Warnings for {file}:")
-                for warning in p.get_warnings():
-                    print(f"  WARNING: {warning}")
-                message_parse_warnings += 1
-
-            if p.has_errors():
-                print(f"EDMD Parser Errors for {file}:")
-                for error in p.get_errors():
-                    print(f"  ERROR: {error}")
-                message_parse_errors += 1
-
-            with open(f"{target_dir}/{name.lower()}.xml", "w", encoding="utf-8") as f:
-                f.write(data)
+            warnings, errors = job.result()
         except Exception as e:
             # print(f"CRITICAL ERROR in EDMD parsing for {file}: {e}")
-            # error_xml = f'<?xml version="1.0" encoding="utf-8" standalone="yes"?><message><error>{e}</error></message>'
-            # with open(f"{messages_dir}/{name.lower()}.xml", "w") as f:
-            #     f.write(error_xml)
             message_parse_errors += 1
             raise e
 
+        if warnings:
+            print(f"EDMD Parser Warnings for {file}:")
+            for warning in warnings:
+                print(f"  WARNING: {warning}")
+            message_parse_warnings += 1
+
+        if errors:
+            print(f"EDMD Parser Errors for {file}:")
+            for error in errors:
+                print(f"  ERROR: {error}")
+            message_parse_errors += 1
+
     if message_parse_errors > 0:
         print(f" with {message_parse_errors} error(s)")
     else:
@@ -307,6 +375,19 @@ def parse_messages(source_dir, target_dir) -> None:
         print(f"Warnings: {message_parse_warnings}")
 
 
+def parse_messages(source_dir, target_dir, executor: Executor | None = None) -> None:
+    """Parse all EDMD (message) files in source_dir into XML files in target_dir.
+
+    Args:
+        source_dir: The directory containing the extracted EDMD files.
+        target_dir: The directory where the XML files should be written to.
+        executor: An optional executor to parse the files concurrently.
+    """
+    report_message_jobs(
+        submit_message_jobs(source_dir, target_dir, executor or SerialExecutor())
+    )
+
+
 def generate_service_codes(
     syntax_version: str, extended_syntax_version: str, service_subrelease: str
 ):
@@ -415,9 +496,54 @@ def generate_service_codes(
         )
 
     parse_messages(extracted_messages_dir, generated_messages_dir)
+    build_bundle(generated_data_dir)
+
+
+def generate_directory_releases(
+    releases: list[str], jobs: int | None = None, force: bool = False
+) -> None:
+    """Generate several directory releases concurrently, one process per release.
+
+    Args:
+        releases: The releases to generate, e.g. ["d21a", "d23a", "d24a"].
+        jobs: The number of worker processes. `None` means the number of CPUs.
+        force: Regenerate everything, even if the inputs did not change.
+    """
+    if len(releases) == 1 or jobs == 1:
+        for release in releases:
+            generate_directory_release(release, jobs, force)
+        return
+
+    with get_executor(jobs) as executor:
+        # each release runs its own steps serially, so we don't oversubscribe CPUs
+        futures = [
+            executor.submit(generate_directory_release, release, 1, force)
+            for release in releases
+        ]
+        for future in futures:
+            future.result()
+
+
+def generate_directory_release(
+    release_upper: str, jobs: int | None = None, force: bool = False
+):
+    """Download, extract and parse a directory release into XML files.
 
+    The code list, data element and composite data element parsers depend on each
+    other (UNCL -> EDED -> EDCD) and run in order, while the segment (EDSD) and
+    message (EDMD) parsers run concurrently in worker processes.
 
-def generate_directory_release(release_upper: str):
+    Steps whose input files and generator code did not change since the last run
+    are skipped, see `GeneratorCache`. Finally, all generated files are merged into
+    a directory bundle, see `pydifact.bundle`.
+
+    Args:
+        release_upper: The release, e.g. "d24a".
+        jobs: The number of worker processes. `None` means the number of CPUs,
+            1 disables parallelization.
+        force: Regenerate everything, even if the inputs did not change since
+            the last run.
+    """
     # EDIFACT Message/Directory releases
     release_upper = release_upper.upper().replace(".", "").replace("-", "")
 
@@ -444,6 +570,10 @@ def generate_directory_release(release_upper: str):
     os.makedirs(extracted_messages_dir, exist_ok=True)
     os.makedirs(generated_messages_dir, exist_ok=True)
 
+    cache = GeneratorCache(extracted_dir / "generator_cache.json")
+    if force:
+        cache.steps = {}
+
     # NOTES ON RELEASES
     # 15B, 16A, 16B: zip contains a single folder
     # 15A: zip contains zip archives, each one containing a single folder
@@ -466,44 +596,50 @@ def generate_directory_release(release_upper: str):
             print(f"  - {available_zip}")
         sys.exit(1)
 
-    # Extract the release ZIP file
-    extract_zip(release_zip_file, extracted_dir)
-    # Extract nested ZIP files
-    for file in os.listdir(extracted_dir):
-        if file.lower().endswith(".zip"):
-            zip_path = os.path.join(extracted_dir, file)
-
-            # EDSD/IDSD - segments (TRSD)
-            # EDCD/IDCD - composite data elements (TRCD)
-            # EDED      - data elements (TRED)
-            # EDMD/IDMD - messages (TRMD)
-            # UNCL      - codes list
-
-            # TODO: evtl. move IDMD into separate directory?
-            if re.search(r"(idmd|edmd|trmd)\.zip", file.lower()):
-                extract_zip(zip_path, extracted_messages_dir)
-            else:
-                extract_zip(zip_path, extracted_dir)
+    edsd_file = f"{extracted_dir}/EDSD.{release_upper}"
+    if cache.is_fresh(
+        "extract", [release_zip_file], [edsd_file], [sys.modules[__name__]]
+    ):
+        print(f"'{release_zip_file}' is unchanged, skipping extraction.")
+    else:
+        # Extract the release ZIP file
+        extract_zip(release_zip_file, extracted_dir)
+        # Extract nested ZIP files
+        for file in os.listdir(extracted_dir):
+            if file.lower().endswith(".zip"):
+                zip_path = os.path.join(extracted_dir, file)
+
+                # EDSD/IDSD - segments (TRSD)
+                # EDCD/IDCD - composite data elements (TRCD)
+                # EDED      - data elements (TRED)
+                # EDMD/IDMD - messages (TRMD)
+                # UNCL      - codes list
+
+                # TODO: evtl. move IDMD into separate directory?
+                if re.search(r"(idmd|edmd|trmd)\.zip", file.lower()):
+                    extract_zip(zip_path, extracted_messages_dir)
+                else:
+                    extract_zip(zip_path, extracted_dir)
 
-    # Convert all filenames to uppercase
-    uppercase_files(extracted_dir)
-    uppercase_files(extracted_messages_dir)
+        # Convert all filenames to uppercase
+        uppercase_files(extracted_dir)
+        uppercase_files(extracted_messages_dir)
 
-    # Rename TR* files and ED?D-{release}.ASC to ED?D.{release} files
+        # Rename TR* files and ED?D-{release}.ASC to ED?D.{release} files
 
-    for old_path, new_path in renames:
-        if Path(extracted_dir / old_path.format(release=release_upper)).exists():
-            os.rename(
-                extracted_dir / old_path.format(release=release_upper),
-                extracted_dir / new_path.format(release=release_upper),
-            )
+        for old_path, new_path in renames:
+            if Path(extracted_dir / old_path.format(release=release_upper)).exists():
+                os.rename(
+                    extracted_dir / old_path.format(release=release_upper),
+                    extracted_dir / new_path.format(release=release_upper),
+                )
 
-    # special case D23A release: uses EDCD.22B (OMG. What a mess.)
-    if release_upper == "23A":
-        os.rename(extracted_dir / "EDCD.22B", extracted_dir / "EDCD.23A")
+        # special case D23A release: uses EDCD.22B (OMG. What a mess.)
+        if release_upper == "23A":
+            os.rename(extracted_dir / "EDCD.22B", extracted_dir / "EDCD.23A")
+        cache.update("extract", [release_zip_file], [sys.modules[__name__]])
 
     # Verify EDSD file exists
-    edsd_file = f"{extracted_dir}/EDSD.{release_upper}"
     if not os.path.exists(edsd_file):
         print(f"ERROR: No EDSD file found in {directory_release} extraction")
         print(f"Available files in {extracted_dir}:")
@@ -512,149 +648,280 @@ def generate_directory_release(release_upper: str):
                 print(f"  - {file}")
         sys.exit(1)
 
-    # Parse UNCL (code list)
-    uncl_filename = extracted_dir / f"UNCL.{release_upper}"
-    uncl_parser = None
-    if uncl_filename.exists():
-        extract_edifact_data(
-            uncl_parser := UNCLParser(uncl_filename, is_prehistoric(release_upper)),
-            f"{generated_data_dir}/codes.xml",
-            directory_release,
+    uncl_file = extracted_dir / f"UNCL.{release_upper}"
+    eded_file = extracted_dir / f"EDED.{release_upper}"
+    edcd_file = extracted_dir / f"EDCD.{release_upper}"
+    codes_xml = f"{generated_data_dir}/codes.xml"
+    data_elements_xml = f"{generated_data_dir}/data_elements.xml"
+    composite_data_elements_xml = f"{generated_data_dir}/composite_data_elements.xml"
+    segments_xml = f"{generated_data_dir}/segments.xml"
+
+    # segments.xml is merged from all element definitions
+    segments_inputs = [edsd_file, uncl_file, eded_file, edcd_file]
+    segments_code = code_of(EDSDParser, UNCLParser, EDEDParser, EDCDParser) + [
+        sys.modules[__name__]
+    ]
+    segments_fresh = cache.is_fresh(
+        "segments", segments_inputs, [segments_xml], segments_code
+    )
+
+    with get_executor(jobs) as executor:
+        # independent steps first, so they run while UNCL -> EDED -> EDCD is parsed
+        # Parse EDSD (segments)
+        edsd_job = None
+        if not segments_fresh:
+            edsd_job = executor.submit(
+                run_parser,
+                EDSDParser,
+                edsd_file,
+                f"{generated_data_dir}/simple_segments.xml",
+                directory_release,
+                is_prehistoric(release_upper),
+            )
+        # Parse EDMD (messages), one job per file
+        message_jobs = submit_message_jobs(
+            extracted_messages_dir, generated_messages_dir, executor, cache
         )
+
+        # Parse UNCL (code list)
+        uncl_parser = None
+        if not uncl_file.exists():
+            print(f"No UNCL file found in {directory_release} extraction")
+            print(f"Available files in {extracted_dir}:")
+            for file in os.listdir(extracted_dir):
+                if file not in [".", ".."]:
+                    print(f"  - {file}")
+        elif cache.is_fresh("UNCL", [uncl_file], [codes_xml], code_of(UNCLParser)):
+            print(f"UNCL is up to date for release '{directory_release}'")
+        else:
+            extract_edifact_data(
+                uncl_parser := UNCLParser(uncl_file, is_prehistoric(release_upper)),
+                codes_xml,
+                directory_release,
+            )
+            cache.update("UNCL", [uncl_file], code_of(UNCLParser))
+
+        # Parse EDED (data elements)
+        data_elements_parser = None
+        eded_inputs = [eded_file, uncl_file]
+        if cache.is_fresh(
+            "EDED", eded_inputs, [data_elements_xml], code_of(EDEDParser)
+        ):
+            print(f"EDED is up to date for release '{directory_release}'")
+        else:
+            if uncl_parser:
+                codes = uncl_parser.msg_xml
+            elif uncl_file.exists():
+                # UNCL was skipped, reuse its previous output
+                codes = ElementTree.parse(codes_xml).getroot()
+            else:
+                codes = None
+            extract_edifact_data(
+                data_elements_parser := EDEDParser(
+                    eded_file,
+                    codes=codes,
+                    is_prehistoric=is_prehistoric(release_upper),
+                    service=False,
+                ),
+                data_elements_xml,
+                directory_release,
+            )
+            cache.update("EDED", eded_inputs, code_of(EDEDParser))
+
+        # Parse EDCD (composite data elements)
+        edcd_inputs = [edcd_file, eded_file, uncl_file]
+        if cache.is_fresh(
+            "EDCD", edcd_inputs, [composite_data_elements_xml], code_of(EDCDParser)
+        ):
+            print(f"EDCD is up to date for release '{directory_release}'")
+        else:
+            extract_edifact_data(
+                EDCDParser(
+                    edcd_file,
+                    data_elements=(
+                        data_elements_parser.msg_xml
+                        if data_elements_parser
+                        else ElementTree.parse(data_elements_xml).getroot()
+                    ),
+                ),
+                composite_data_elements_xml,
+                directory_release,
+            )
+            cache.update("EDCD", edcd_inputs, code_of(EDCDParser))
+
+        # the merge needs simple_segments.xml
+        if edsd_job:
+            edsd_job.result()
+        report_message_jobs(message_jobs)
+        for file in message_jobs:
+            cache.update(
+                f"EDMD:{file}",
+                [os.path.join(extracted_messages_dir, file)],
+                code_of(EDMDParser),
+            )
+        cache.save()
+
+    if segments_fresh:
+        print(f"segments.xml is up to date for release '{directory_release}'")
     else:
-        print(f"No UNCL file found in {directory_release} extraction")
-        print(f"Available files in {extracted_dir}:")
-        for file in os.listdir(extracted_dir):
-            if file not in [".", ".."]:
-                print(f"  - {file}")
+        merge_segments_xml(generated_data_dir)
+        cache.update("segments", segments_inputs, segments_code)
+        cache.save()
 
-    # Parse EDED (data elements)
-    extract_edifact_data(
-        data_elements_parser := EDEDParser(
-            f"{extracted_dir}/EDED.{release_upper}",
-            codes=uncl_parser.msg_xml if uncl_parser else None,
-            is_prehistoric=is_prehistoric(release_upper),
-            service=False,
-        ),
-        f"{generated_data_dir}/data_elements.xml",
-        directory_release,
-    )
+    # rebuilding the bundle from the XML files takes less than a second
+    build_bundle(generated_data_dir)
 
-    # Parse EDCD (composite data elements)
-    extract_edifact_data(
-        EDCDParser(
-            f"{extracted_dir}/EDCD.{release_upper}",
-            data_elements=data_elements_parser.msg_xml,
-        ),
-        f"{generated_data_dir}/composite_data_elements.xml",
-        directory_release,
-    )
 
-    # Parse EDSD (segments)
-    extract_edifact_data(
-        EDSDParser(edsd_file, is_prehistoric(release_upper)),
-        f"{generated_data_dir}/simple_segments.xml",
-        directory_release,
-    )
+def load_definitions(
+    path: PathLike | str, skip: tuple[str, ...] = ()
+) -> dict[str, ElementTree.Element]:
+    """Load the top level elements of a generated XML file, keyed by their id.
 
-    parse_messages(extracted_messages_dir, generated_messages_dir)
+    The file is parsed incrementally, and children with a tag in `skip` are
+    dropped right away, so e.g. the code lists of data elements are never held
+    in memory.
+    """
+    definitions: dict[str, ElementTree.Element] = {}
+    depth = 0
+    for event, element in ElementTree.iterparse(path, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            continue
+        depth -= 1
+        if depth != 1:
+            continue
+        element_id = element.get("id")
+        if element_id:
+            definition = ElementTree.Element(element.tag, element.attrib)
+            definition.extend(child for child in element if child.tag not in skip)
+            definitions[element_id] = definition
+        element.clear()
+    return definitions
+
+
+def merged_attributes(
+    attrib: dict[str, str], definition: ElementTree.Element
+) -> dict[str, str]:
+    """Return the attributes enriched with the definition's, except its id."""
+    merged = dict(attrib)
+    for key, value in definition.attrib.items():
+        if key != "id":
+            merged[key] = value
+    return merged
+
+
+def write_merged_segment(
+    writer: XMLWriter,
+    segment: ElementTree.Element,
+    composites: dict[str, ElementTree.Element],
+    data_elements: dict[str, ElementTree.Element],
+) -> int:
+    """Write a segment with its composite and data element definitions merged in.
 
-    # Merge: enrich simple segments with composite and data element details
+    Returns:
+        The number of referenced elements that were not found.
+    """
+    merge_errors = 0
+    writer.start(segment.tag, segment.attrib)
+    for child in segment:
+        if child.tag == "composite_data_element":
+            cid = child.get("id", "")
+            comp_def = composites.get(cid)
+            attrib = child.attrib
+            children = list(child)
+            if comp_def is None:
+                print(
+                    f"WARNING: Composite data element {cid} not found in composite_data_elements.xml"
+                )
+                merge_errors += 1
+            else:
+                attrib = merged_attributes(attrib, comp_def)
+                children.extend(comp_def)
+            writer.start(child.tag, attrib)
+            # enrich nested data elements inside composite with attributes
+            for child2 in children:
+                if child2.tag != "data_element":
+                    writer.element(child2)
+                    continue
+                did2 = child2.get("id", "")
+                data_def2 = data_elements.get(did2)
+                if data_def2 is None:
+                    print(
+                        f"WARNING: Data element {did2} not found in data_elements.xml during composite merge"
+                    )
+                    merge_errors += 1
+                    writer.element(child2)
+                    continue
+                writer.start(child2.tag, merged_attributes(child2.attrib, data_def2))
+                for grandchild in child2:
+                    writer.element(grandchild)
+                writer.end()
+            writer.end()
+
+        elif child.tag == "data_element":
+            did = child.get("id", "")
+            data_def = data_elements.get(did)
+            if data_def is None:
+                print(f"WARNING: Data element {did} not found in data_elements.xml")
+                merge_errors += 1
+                writer.element(child)
+                continue
+            writer.start(child.tag, merged_attributes(child.attrib, data_def))
+            for grandchild in child:
+                writer.element(grandchild)
+            # adopt subitems, but except codes (directly in segments.xml)
+            for orphan in data_def:
+                writer.element(orphan)
+                print(f"adopting {orphan.tag} from data element {did}")
+            writer.end()
+
+        else:
+            writer.element(child)
+    writer.end()
+    return merge_errors
+
+
+def merge_segments_xml(generated_data_dir: PathLike | str) -> None:
+    """Enrich simple_segments.xml with composite and data element details.
+
+    The composite and data element definitions are looked up by id, and the
+    segments are read and written one by one, so the merged tree is never built
+    in memory. Writes the merged segments.xml and removes simple_segments.xml.
+    """
     try:
         print("Starting XML merge process...")
 
-        # Load XML files
-        seg_tree = ElementTree.parse(f"{generated_data_dir}/simple_segments.xml")
-        segment_root = seg_tree.getroot()
-
-        data_element_tree = ElementTree.parse(f"{generated_data_dir}/data_elements.xml")
-        data_element_root = data_element_tree.getroot()
-
-        composite_tree = ElementTree.parse(
-            f"{generated_data_dir}/composite_data_elements.xml"
+        # Build lookup maps, codes are not merged into segments.xml
+        data_map = load_definitions(
+            f"{generated_data_dir}/data_elements.xml", skip=("code",)
         )
-        composite_root = composite_tree.getroot()
-
-        # Build lookup maps
-        data_map = {}
-        for element in list(data_element_root):
-            element_id = element.get("id")
-            if element_id:
-                data_map[element_id] = element
-
-        comp_map = {}
-        for element in list(composite_root):
-            element_id = element.get("id")
-            if element_id:
-                comp_map[element_id] = element
+        comp_map = load_definitions(f"{generated_data_dir}/composite_data_elements.xml")
 
         merge_errors = 0
-
-        # First pass: expand composite children under segments
-        for seg in segment_root.findall("segment"):
-            for child in list(seg):
-                if child.tag == "composite_data_element":
-                    cid = child.get("id")
-                    comp_def = comp_map.get(cid)
-                    if comp_def is None:
-                        print(
-                            f"WARNING: Composite data element {cid} not found in composite_data_elements.xml"
-                        )
-                        merge_errors += 1
-                        continue
-                    # copy attributes except id
-                    for k, v in comp_def.attrib.items():
-                        if k == "id":
-                            continue
-                        child.set(k, v)
-                    # adopt children from composite definition
-                    for orphan in list(comp_def):
-                        xml_adopt(child, orphan)
-
-        # Second pass: enrich data elements at segment level and inside composites
-        for seg in segment_root.findall("segment"):
-            for child in list(seg):
-                if child.tag == "data_element":
-                    did = child.get("id")
-                    data_def = data_map.get(did)
-                    if data_def is None:
-                        print(
-                            f"WARNING: Data element {did} not found in data_elements.xml"
-                        )
-                        merge_errors += 1
-                        continue
-                    for k, v in data_def.attrib.items():
-                        if k == "id":
-                            continue
-                        child.set(k, v)
-                    # adobt subitems, but except codes (directly in segments.xml)
-                    for orphan in list(data_def):
-                        if orphan.tag != "code":
-                            xml_adopt(child, orphan)
-                            print(f"adopting {orphan.tag} from data element {did}")
-
-                if child.tag == "composite_data_element":
-                    # enrich nested data elements inside composite with attributes
-                    for child2 in list(child):
-                        if child2.tag == "data_element":
-                            did2 = child2.get("id")
-                            data_def2 = data_map.get(did2)
-                            if data_def2 is None:
-                                print(
-                                    f"WARNING: Data element {did2} not found in data_elements.xml during composite merge"
-                                )
-                                merge_errors += 1
-                                continue
-                            for k, v in data_def2.attrib.items():
-                                if k == "id":
-                                    continue
-                                child2.set(k, v)
-
-        # Write final merged segments.xml
         merged_path = f"{generated_data_dir}/segments.xml"
-        # Pretty print the XML
-        ElementTree.indent(seg_tree, space="  ")
-        seg_tree.write(merged_path, encoding="utf-8", xml_declaration=True)
+        with open(merged_path, "w", encoding="utf-8") as f:
+            writer = XMLWriter(f)
+            writer.declaration()
+            depth = 0
+            for event, element in ElementTree.iterparse(
+                f"{generated_data_dir}/simple_segments.xml", events=("start", "end")
+            ):
+                if event == "start":
+                    if depth == 0:
+                        writer.start(element.tag, element.attrib)
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth == 1:
+                    if element.tag == "segment":
+                        merge_errors += write_merged_segment(
+                            writer, element, comp_map, data_map
+                        )
+                    else:
+                        writer.element(element)
+                    element.clear()
+            writer.end()
+
         # Remove simple_segments.xml to match PHP runner behavior
         try:
             os.remove(f"{generated_data_dir}/simple_segments.xml")
@@ -682,8 +949,21 @@ def generate_directory_release(release_upper: str):
 
 
 if __name__ == "__main__":
+    jobs = None
+    force = False
+    for arg in sys.argv[1:]:
+        if arg.startswith("--jobs="):
+            jobs = int(arg[7:])
+            sys.argv.remove(arg)
+        elif arg == "--force":
+            force = True
+            sys.argv.remove(arg)
+    if len(sys.argv) < 2:
+        print_usage()
+        sys.exit(1)
+
     # check if we are in "service codes" generating mode, or directory releases
     if sys.argv[1].upper() == "SERVICE":
         generate_service_codes(*get_syntax_version(sys.argv))
     else:
-        generate_directory_release(sys.argv[1])
+        generate_directory_releases(sys.argv[1:], jobs, force)
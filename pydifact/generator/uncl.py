@@ -4,9 +4,29 @@ from pathlib import Path
 from typing import List
 from xml.etree import ElementTree
 
-from pydifact.generator.base import UntidBaseParser
+from pydifact.generator.base import LINE_SPLIT_RE, UntidBaseParser
 from pydifact.generator.constants import MAX_LINE_LENGTH
 
+SEPARATOR_RE = re.compile(r"-{70}")
+SECTION_SPLIT_RE = re.compile(r"(?=^\d{4}\s+\S.+)", re.M)
+
+# *    1001  Document name code                                     [C]
+HEADER_RE = re.compile(r"^(.{5})([0-9]{4}\s{2})(.{56})\[([A-Z]?)\]")
+# 1001  Document name, coded
+PREHISTORIC_HEADER_RE = re.compile(r"^()([0-9]{4})\s{2}(.*)")
+# *    1001  Document name code                  [C]
+SHORT_HEADER_RE = re.compile(r"^(.{5})([0-9]{4})\s{2,8}(.*)")
+USAGE_RE = re.compile(r"^[\s]{11}(.*)\[([A-Z]?)\]")
+
+DESC_RE = re.compile(r"[\s]{5}Desc: (.*)")
+PREHISTORIC_DESC_RE = re.compile(r"^\s{6,9}((?:(?!\s{2})[\s\S])*)$")
+REPR_RE = re.compile(r"^\s{5}Repr: (a?n?)[.]*(\d+)")
+
+VALUE_RE = re.compile(r"(.{5})(.{5})\s(.*)")
+PREHISTORIC_VALUE_RE = re.compile(r"([\s]{4,6})(\S.+?)\s{2,8}(.*)")
+CONTINUATION_RE = re.compile(r"^[\s]{11}(.*)")
+VALUE_CONTINUATION_RE = re.compile(r"^[\s]{14}(.*)")
+
 
 class UNCLParser(UntidBaseParser):
     """Parser for EDIFACT UN/CEFACT Code List (UNCL) files."""
@@ -48,17 +68,13 @@ class UNCLParser(UntidBaseParser):
     def _process(self, file_path: PathLike | str) -> None:
         """Process UNCL file and build XML structure."""
         try:
-            with open(file_path, "r", errors="replace") as f:
-                file_lines = f.read()
-
-            # Replace special characters
-            file_lines = file_lines.replace("\xc4", "-")
+            file_lines = self._read_source(file_path)
 
             # Split by separator line (70 dashes)
-            uncl_list = re.split(r"-{70}", file_lines)
+            uncl_list = SEPARATOR_RE.split(file_lines)
             if len(uncl_list) < 2:
                 # Split per lookahead pattern, search for the typical header
-                uncl_list = re.split(r"(?=^\d{4}\s+\S.+)", file_lines, flags=re.M)
+                uncl_list = SECTION_SPLIT_RE.split(file_lines)
 
             if len(uncl_list) < 2:
                 self.warnings.append(
@@ -74,7 +90,7 @@ class UNCLParser(UntidBaseParser):
                 value_value_found = False
 
                 try:
-                    lines = re.split(r"[\r\n]+", uncl_element)
+                    lines = LINE_SPLIT_RE.split(uncl_element)
 
                     element_status = ""
                     element_code = ""
@@ -94,19 +110,14 @@ class UNCLParser(UntidBaseParser):
 
                         # Parse element header
                         if element_code == "":
-                            match = re.match(
-                                r"^(.{5})([0-9]{4}\s{2})(.{56})\[([A-Z]?)\]", row
-                            )
+                            match = HEADER_RE.match(row)
                             if not match:
                                 if self.is_prehistoric:
                                     # 1001  Document name, coded
-                                    match = re.match(r"^()([0-9]{4})\s{2}(.*)", row)
+                                    match = PREHISTORIC_HEADER_RE.match(row)
                                 else:
                                     # *    1001  Document name code                  [C]
-
-                                    match = re.match(
-                                        r"^(.{5})([0-9]{4})\s{2,8}(.*)", row
-                                    )
+                                    match = SHORT_HEADER_RE.match(row)
 
                                 if not match:
                                     self.warnings.append(
@@ -127,9 +138,7 @@ class UNCLParser(UntidBaseParser):
 
                                 # check usage in newer releases
                                 if not self.is_prehistoric:
-                                    match2 = re.match(
-                                        r"^[\s]{11}(.*)\[([A-Z]?)\]", lines[i]
-                                    )
+                                    match2 = USAGE_RE.match(lines[i])
                                     if not match2:
                                         self.warnings.append(
                                             f"Section {section_index}: Could not parse element usage: {lines[i]}"
@@ -156,9 +165,7 @@ class UNCLParser(UntidBaseParser):
                                 if not value_value_found:
                                     # check for a "codes" pattern within an element code,
                                     # and if no match, it must be a description
-                                    match = re.match(
-                                        r"^\s{6,9}((?:(?!\s{2})[\s\S])*)$", row
-                                    )
+                                    match = PREHISTORIC_DESC_RE.match(row)
                                     if match:
                                         element_description = row.strip()
                                         i += 1
@@ -168,12 +175,12 @@ class UNCLParser(UntidBaseParser):
                                             i += 1
 
                             else:
-                                match = re.match(r"[\s]{5}Desc: (.*)", row)
+                                match = DESC_RE.match(row)
                                 if match:
                                     element_description = match.group(1)
                                     i += 1
                                     while i < len(lines) and len(lines[i]) > 1:
-                                        match2 = re.match(r"^[\s]{11}(.*)", lines[i])
+                                        match2 = CONTINUATION_RE.match(lines[i])
                                         if match2:
                                             element_description += " " + match2.group(1)
                                             i += 1
@@ -186,7 +193,7 @@ class UNCLParser(UntidBaseParser):
                             if self.is_prehistoric:
                                 pass  # TODO
                             else:
-                                match = re.match(r"^\s{5}Repr: (a?n?)[.]*(\d+)", row)
+                                match = REPR_RE.match(row)
                                 if match:
                                     element_type = match.group(1).strip()
                                     element_max_size = match.group(2).strip()
@@ -205,12 +212,12 @@ class UNCLParser(UntidBaseParser):
                             #      67      Promissory note signed by a third party and endorsed by
                             #              a bank
                             #      RT      UN/ECE/TRADE/WP.4/GE.1/EDIFACT Rapporteurs Teams
-                            match = re.match(r"([\s]{4,6})(\S.+?)\s{2,8}(.*)", row)
+                            match = PREHISTORIC_VALUE_RE.match(row)
                         else:
                             # match e.g.:
                             #     5     Product performance report
                             #     142   Ship security procedures not maintained during ship-to-ship
-                            match = re.match(r"(.{5})(.{5})\s(.*)", row)
+                            match = VALUE_RE.match(row)
                         if match:
                             value_change = match.group(1).strip()
                             value_value = match.group(2).strip()
@@ -236,7 +243,7 @@ class UNCLParser(UntidBaseParser):
                             # badly structured.
                             while i < len(lines) and len(lines[i]) > 1:
                                 if self.is_prehistoric:
-                                    match3 = re.match(r"^[\s]{14}(.*)$", lines[i])
+                                    match3 = VALUE_CONTINUATION_RE.match(lines[i])
                                     if match3:
                                         first_word = match3.group(1).strip().split()[0]
                                         if len(row) + len(first_word) > MAX_LINE_LENGTH:
@@ -249,7 +256,7 @@ class UNCLParser(UntidBaseParser):
                                     else:  # no additional line found, break
                                         break
                                 else:
-                                    match2 = re.match(r"^[\s]{14}(.*)", lines[i])
+                                    match2 = VALUE_CONTINUATION_RE.match(lines[i])
                                     if match2:
                                         if value_description:
                                             value_description += " "
@@ -257,7 +264,7 @@ class UNCLParser(UntidBaseParser):
                                         i += 1
                                     else:
                                         # if a "Note:" is found, proceed to next
-                                        match3 = re.match(r"^[\s]{11}(.*)", lines[i])
+                                        match3 = CONTINUATION_RE.match(lines[i])
                                         if match3:
                                             if match3.group(1).strip() == "Note:":
                                                 break
@@ -4,7 +4,20 @@ from pathlib import Path
 from typing import Dict, List
 from xml.etree import ElementTree
 
-from pydifact.generator.base import UntidBaseParser
+from pydifact.generator.base import LINE_SPLIT_RE, UntidBaseParser
+
+SEPARATOR_RE = re.compile(r"-{70}")
+
+HEADER_RE = re.compile(r"^([*+| X]+)([0-9]{4}) +(.+)(\[CBI\])?")
+DESC_RE = re.compile(r"^ +Desc: *(.*|)$")
+DESC_CONTINUATION_RE = re.compile(r"^ {8,14}(.*)")
+REPR_RE = re.compile(r"^ +Repr: (a?n?)[.]*(\d+)")
+NOTE_RE = re.compile(r"[\s]{5}Note:")
+NOTE_CONTINUATION_RE = re.compile(r"^[\s]{11}(.*)")
+
+VALUE_RE = re.compile(r"(.{3})(.{6})\s(.*)")
+VALUE_DESC_RE = re.compile(r"^[\s]{13}(.*)")
+VALUE_TITLE_RE = re.compile(r"^[\s]{10}(.*)")
 
 
 class UNSLParser(UntidBaseParser):
@@ -45,17 +58,13 @@ class UNSLParser(UntidBaseParser):
 
     def _process(self, file_path: PathLike | str) -> None:
         """Process UNSL file and build XML structure."""
-        with open(file_path, "r", errors="replace") as f:
-            file_lines = f.read()
+        file_lines = self._read_source(file_path)
 
         if not file_lines:
             raise ValueError(f"Failed to read file: {file_path}")
 
-        # Replace special character
-        file_lines = file_lines.replace("\xc4", "-")
-
         # Split by separator line (70 dashes)
-        unsl_list = re.split(r"-{70}", file_lines)
+        unsl_list = SEPARATOR_RE.split(file_lines)
 
         if len(unsl_list) < 2:
             self.warnings.append(
@@ -66,7 +75,7 @@ class UNSLParser(UntidBaseParser):
         unsl_list = unsl_list[1:]
 
         for unsl_element in unsl_list:
-            lines = re.split(r"[\r\n]+", unsl_element)
+            lines = LINE_SPLIT_RE.split(unsl_element)
 
             element_status = ""
             element_code = ""
@@ -86,7 +95,7 @@ class UNSLParser(UntidBaseParser):
 
                 # Parse element header
                 if element_code == "":
-                    match = re.match(r"^([*+| X]+)([0-9]{4}) +(.+)(\[CBI\])?", row)
+                    match = HEADER_RE.match(row)
                     if not match:
                         self.warnings.append(f"Could not parse element header: {row}")
                         break
@@ -99,12 +108,12 @@ class UNSLParser(UntidBaseParser):
 
                 # Parse description
                 if element_description == "":
-                    match = re.match(r"^ +Desc: *(.*|)$", row)
+                    match = DESC_RE.match(row)
                     if match:
                         element_description = match.group(1)
                         i += 1
                         while i < len(lines) and len(lines[i]) > 1:
-                            match2 = re.match(r"^ {8,14}(.*)", lines[i])
+                            match2 = DESC_CONTINUATION_RE.match(lines[i])
                             if match2:
                                 element_description += " " + match2.group(1)
                                 i += 1
@@ -114,7 +123,7 @@ class UNSLParser(UntidBaseParser):
 
                 # Parse representation
                 if element_type == "":
-                    match = re.match(r"^ +Repr: (a?n?)[.]*(\d+)", row)
+                    match = REPR_RE.match(row)
                     if not match:
                         self.warnings.append(
                             f"Could not parse 'Repr': '{row}' at line {i}"
@@ -127,12 +136,12 @@ class UNSLParser(UntidBaseParser):
 
                 # Parse note
                 if element_note == "":
-                    match = re.match(r"[\s]{5}Note:", row)
+                    match = NOTE_RE.match(row)
                     if match:
                         element_note = ""
                         i += 1
                         while i < len(lines) and len(lines[i]) > 1:
-                            match2 = re.match(r"^[\s]{11}(.*)", lines[i])
+                            match2 = NOTE_CONTINUATION_RE.match(lines[i])
                             if match2:
                                 if element_note:
                                     element_note += " "
@@ -143,7 +152,7 @@ class UNSLParser(UntidBaseParser):
                         continue
 
                 # Parse code values
-                match = re.match(r"(.{3})(.{6})\s(.*)", row)
+                match = VALUE_RE.match(row)
                 if match:
                     value_change = match.group(1).strip()
                     value_value = match.group(2).strip()
@@ -155,14 +164,14 @@ class UNSLParser(UntidBaseParser):
                         continue
 
                     while i < len(lines) and len(lines[i]) > 1:
-                        match2 = re.match(r"^[\s]{13}(.*)", lines[i])
+                        match2 = VALUE_DESC_RE.match(lines[i])
                         if match2:
                             if value_description:
                                 value_description += " "
                             value_description += match2.group(1).strip()
                             i += 1
                         else:
-                            match3 = re.match(r"^[\s]{10}(.*)", lines[i])
+                            match3 = VALUE_TITLE_RE.match(lines[i])
                             if match3:
                                 if match3.group(1).strip() == "Note:":
                                     break
@@ -0,0 +1,90 @@
+import re
+from typing import Mapping, TextIO
+from xml.etree import ElementTree
+
+XML_DECLARATION = '<?xml version="1.0" encoding="utf-8"?>\n'
+NEEDS_ESCAPE_RE = re.compile(r'[&<>"]')
+
+
+def escape(value: str) -> str:
+    """Escape a text or attribute value like `xml.dom.minidom` does."""
+    if not NEEDS_ESCAPE_RE.search(value):
+        return value
+    return (
+        value.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace('"', "&quot;")
+        .replace(">", "&gt;")
+    )
+
+
+class XMLWriter:
+    """Writes indented XML incrementally into a text stream.
+
+    The output is the same as `minidom.toprettyxml()` would create, but no
+    document is built in memory: elements are written as they come, and a start
+    tag is only closed when the next child or its end is written, so elements
+    without children become empty element tags.
+
+    Example:
+        writer = XMLWriter(stream)
+        writer.declaration()
+        writer.start("segments")
+        writer.element(segment_element)
+        writer.end()
+    """
+
+    def __init__(self, stream: TextIO, indent: str = "  "):
+        self.stream = stream
+        self.indent = indent
+        self._open: list[str] = []
+        # a start tag that is not closed yet, as the element may stay empty
+        self._pending = False
+
+    def declaration(self) -> None:
+        """Write the XML declaration."""
+        self.stream.write(XML_DECLARATION)
+
+    def _close_pending(self) -> None:
+        if self._pending:
+            self.stream.write(">\n")
+            self._pending = False
+
+    def start(self, tag: str, attrib: Mapping[str, str] | None = None) -> None:
+        """Open an element. Its children are written until `end()` is called."""
+        self._close_pending()
+        attributes = (
+            "".join(f' {name}="{escape(value)}"' for name, value in attrib.items())
+            if attrib
+            else ""
+        )
+        self.stream.write(f"{self.indent * len(self._open)}<{tag}{attributes}")
+        self._open.append(tag)
+        self._pending = True
+
+    def end(self) -> None:
+        """Close the innermost open element."""
+        tag = self._open.pop()
+        if self._pending:
+            self.stream.write("/>\n")
+            self._pending = False
+        else:
+            self.stream.write(f"{self.indent * len(self._open)}</{tag}>\n")
+
+    def text(self, text: str) -> None:
+        """Write the text of a leaf element, right after its start tag."""
+        self.stream.write(f">{escape(text)}</{self._open.pop()}>\n")
+        self._pending = False
+
+    def element(self, element: ElementTree.Element) -> None:
+        """Write an ElementTree element with all its children.
+
+        Whitespace-only text, as in parsed pretty printed files, is ignored.
+        """
+        self.start(element.tag, element.attrib)
+        if len(element) == 0 and element.text and element.text.strip():
+            self.text(element.text)
+            return
+        for child in element:
+            self.element(child)
+        self.end()
@@ -0,0 +1,272 @@
+# Pydifact - a python edifact library
+#
+# Copyright (c) 2017-2024 Christian González
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Segment boundary indexes for random access into large interchanges.
+
+An index is built with one scan over the file and can be stored as a sidecar
+file next to it. Afterwards, single messages can be read by seeking directly to
+them, without parsing anything before::
+
+    index = InterchangeIndex.build("archive.edi")
+    index.save("archive.edi.idx")
+    ...
+    index = InterchangeIndex.load("archive.edi.idx")
+    for message in index.get_messages("archive.edi", reference="50000"):
+        ...
+"""
+
+import json
+import mmap
+import os
+import sys
+from collections.abc import Iterator
+from typing import NamedTuple
+
+from pydifact.control import Characters
+from pydifact.exceptions import EDISyntaxError
+from pydifact.parser import Parser, segment_boundaries
+from pydifact.segmentcollection import Message
+
+INDEX_FORMAT_VERSION = 1
+
+
+class MessageIndexEntry(NamedTuple):
+    """The position of a message (UNH ... UNT) within a file."""
+
+    reference: str
+    """The message reference number (UNH 0062)."""
+
+    type: str
+    """The message type (UNH S009/0065), e.g. "ORDERS"."""
+
+    identifier: list[str]
+    """The complete message identifier (UNH S009)."""
+
+    start: int
+    """The byte offset of the UNH segment."""
+
+    end: int
+    """The byte offset after the UNT segment terminator."""
+
+
+class InterchangeIndex:
+    """Byte offsets of all segments and messages of an EDI file.
+
+    Attributes:
+        characters: The control characters of the file.
+        encoding: The encoding of the file.
+        syntax_identifier: The syntax identifier from the UNB header.
+        version: The syntax version from the UNB header.
+        segments: The byte offsets of the start of each segment.
+        messages: The positions of all messages in the file.
+    """
+
+    def __init__(
+        self,
+        characters: Characters,
+        encoding: str = "iso8859-1",
+        syntax_identifier: str = "",
+        version: str = "",
+        segments: list[int] | None = None,
+        messages: list[MessageIndexEntry] | None = None,
+    ) -> None:
+        self.characters = characters
+        self.encoding = encoding
+        self.syntax_identifier = syntax_identifier
+        self.version = version
+        self.segments = segments or []
+        self.messages = messages or []
+
+    @classmethod
+    def build(
+        cls,
+        file: str | os.PathLike,
+        encoding: str = "iso8859-1",
+        characters: Characters | None = None,
+    ) -> "InterchangeIndex":
+        """Scan a file once and build an index of its segments and messages.
+
+        Only UNA, UNB and UNH segments are parsed, all other segments are just
+        located by their terminators.
+
+        Args:
+            file: The path of the EDI file.
+            encoding: The encoding of the file.
+            characters: The control characters to use, if there is no
+                UNA segment present.
+        """
+        parser = Parser(characters=characters)
+        index = cls(parser.characters, encoding)
+        with open(file, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return index
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                head = data[:4096].decode("latin-1")
+                una_characters, rest = parser.split_una(head)
+                start = 0
+                if una_characters is not None:
+                    index.characters = una_characters
+                    start = len(head) - len(rest)
+                index._scan(parser, data, start)
+        return index
+
+    def _scan(self, parser: Parser, data: mmap.mmap, start: int) -> None:
+        terminator = self.characters.segment_terminator.encode(self.encoding)
+        escape = self.characters.escape_character.encode(self.encoding)
+        whitespace = "".join(self.characters.line_terminators).encode(self.encoding)
+        unh_start = -1
+        unh_segment = None
+
+        for end in segment_boundaries(data, terminator, escape, start):
+            while data[start : start + 1] in whitespace and start < end:
+                start += 1
+            tag = data[start : start + 3]
+            self.segments.append(start)
+            if tag in (b"UNB", b"UNH"):
+                segment = parser.parse_segment(
+                    data[start:end].decode(self.encoding), self.characters
+                )
+                if tag == b"UNB":
+                    self.syntax_identifier = parser.syntax_identifier
+                    self.version = parser.version
+                else:
+                    if unh_segment is not None:
+                        raise EDISyntaxError(
+                            f"UNH segment at {start} before the UNT segment of the "
+                            f"message at {unh_start}"
+                        )
+                    unh_start, unh_segment = start, segment
+            elif tag == b"UNT":
+                if unh_segment is None:
+                    raise EDISyntaxError(f"UNT segment without matching UNH at {start}")
+                identifier = unh_segment[1]
+                if not isinstance(identifier, list):
+                    identifier = [identifier or ""]
+                self.messages.append(
+                    MessageIndexEntry(
+                        str(unh_segment[0]), identifier[0], identifier, unh_start, end
+                    )
+                )
+                unh_segment = None
+            start = end
+
+        if unh_segment is not None:
+            raise EDISyntaxError(f"UNH segment at {unh_start} without matching UNT")
+
+    def find_messages(
+        self, reference: str | None = None, message_type: str | None = None
+    ) -> list[MessageIndexEntry]:
+        """Return the index entries of all matching messages.
+
+        Args:
+            reference: The message reference number (UNH 0062) to look for.
+            message_type: The message type (e.g. "ORDERS") to look for.
+        """
+        return [
+            entry
+            for entry in self.messages
+            if (reference is None or entry.reference == reference)
+            and (message_type is None or entry.type == message_type)
+        ]
+
+    def get_messages(
+        self,
+        file: str | os.PathLike,
+        reference: str | None = None,
+        message_type: str | None = None,
+        parser: Parser | None = None,
+    ) -> Iterator[Message]:
+        """Read and parse only the requested messages from an indexed file.
+
+        Args:
+            file: The path of the EDI file this index was built for.
+            reference: The message reference number (UNH 0062) to look for.
+            message_type: The message type (e.g. "ORDERS") to look for.
+            parser: A parser to convert the segments; defaults to `Parser`.
+
+        Yields:
+            Message: The matching messages, in file order.
+        """
+        if parser is None:
+            parser = Parser(characters=self.characters)
+        parser.version = self.version
+        parser.syntax_identifier = self.syntax_identifier
+
+        with open(file, "rb") as f:
+            for entry in self.find_messages(reference, message_type):
+                f.seek(entry.start)
+                text = f.read(entry.end - entry.start).decode(self.encoding)
+                message = Message(
+                    entry.reference, entry.identifier, characters=self.characters
+                )
+                message.add_segments(parser.parse_segments(text, self.characters))
+                yield message
+
+    def to_dict(self) -> dict:
+        """Return a JSON serializable representation of the index."""
+        return {
+            "format": INDEX_FORMAT_VERSION,
+            "characters": str(self.characters),
+            "encoding": self.encoding,
+            "syntax_identifier": self.syntax_identifier,
+            "version": self.version,
+            "segments": self.segments,
+            "messages": [list(entry) for entry in self.messages],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "InterchangeIndex":
+        """Create an index from a `to_dict` representation."""
+        if data.get("format") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported index format: {data.get('format')}")
+        return cls(
+            characters=Characters.from_str(data["characters"]),
+            encoding=data["encoding"],
+            syntax_identifier=data["syntax_identifier"],
+            version=data["version"],
+            segments=data["segments"],
+            messages=[MessageIndexEntry(*entry) for entry in data["messages"]],
+        )
+
+    def save(self, path: str | os.PathLike) -> None:
+        """Write the index to a (sidecar) file."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "InterchangeIndex":
+        """Read an index from a file written by `save`."""
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python -m pydifact.index <edi-file> [<index-file>]")
+        sys.exit(1)
+    edi_file = sys.argv[1]
+    index_file = sys.argv[2] if len(sys.argv) == 3 else f"{edi_file}.idx"
+    edi_index = InterchangeIndex.build(edi_file)
+    edi_index.save(index_file)
+    print(
+        f"Indexed {len(edi_index.segments)} segments and "
+        f"{len(edi_index.messages)} messages into '{index_file}'."
+    )
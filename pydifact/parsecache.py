@@ -0,0 +1,351 @@
+# Pydifact - a python edifact library
+#
+# Copyright (c) 2017-2024 Christian González
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Content-addressed caches of parse results.
+
+Interchanges that are received more than once (retries, duplicates,
+re-deliveries) need not be parsed again: with a cache, the segments of a
+parsed interchange are stored in a compact serialized form, keyed by a hash of
+its content and the parser configuration::
+
+    cache = MemoryParseCache(max_size=100_000_000)
+    interchange = Interchange.from_str(edi, cache=cache)
+    ...
+    # the same content again: the segments are restored from the cache
+    interchange = Interchange.from_str(edi, cache=cache)
+
+`DiskParseCache` keeps the entries in a directory, so that they are shared
+between processes and survive restarts.
+"""
+
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+
+from pydifact.parser import Parser
+from pydifact.segments import Segment
+
+# bump if the serialized form changes
+PARSE_CACHE_FORMAT_VERSION = 2
+
+
+class ParseCacheStats(NamedTuple):
+    """A snapshot of the statistics of a `ParseCache`."""
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int  # size of all serialized entries in bytes
+
+
+def parser_configuration(parser: Parser) -> str:
+    """Return a description of everything that influences the parse result.
+
+    It includes the Python version, as the marshal format of the entries is only
+    stable within one Python version.
+    """
+    return "|".join(
+        (
+            f"v{PARSE_CACHE_FORMAT_VERSION}",
+            f"py{sys.version_info[0]}.{sys.version_info[1]}-marshal{marshal.version}",
+            f"{type(parser).__module__}.{type(parser).__qualname__}",
+            f"{type(parser.factory).__module__}.{type(parser.factory).__qualname__}",
+            str(parser.characters),
+            parser.directory or "",
+            str(getattr(parser, "detect_directory", False)),
+        )
+    )
+
+
+def cache_key(content: str, parser: Parser) -> str:
+    """Return the cache key of a content parsed with a parser."""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(parser_configuration(parser).encode())
+    digest.update(b"\0")
+    digest.update(content.encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
+def dump_segments(parser: Parser, segments: list[Segment]) -> bytes:
+    """Serialize parsed segments, together with the parser's state after parsing
+    them (UNB information and message directory)."""
+    return marshal.dumps(
+        (
+            parser.version,
+            parser.syntax_identifier,
+            parser.message_directory,
+            [(segment.tag, segment.elements) for segment in segments],
+        )
+    )
+
+
+def load_segments(parser: Parser, data: bytes) -> list[Segment]:
+    """Restore segments serialized by `dump_segments()`.
+
+    The segments are created by the parser's factory, but not validated again.
+    The parser's version, syntax identifier and message directory are set as if
+    it parsed them.
+
+    Raises:
+        EOFError, ValueError, TypeError: If the data is truncated or corrupt. The
+            parser is left unchanged then.
+    """
+    version, syntax_identifier, message_directory, raw_segments = marshal.loads(data)
+    create_segment = parser.factory.create_segment
+    segments = [
+        create_segment(tag, *elements, validate=False, version=version)
+        for tag, elements in raw_segments
+    ]
+    parser.version = version
+    parser.syntax_identifier = syntax_identifier
+    parser.message_directory = message_directory
+    return segments
+
+
+class ParseCache:
+    """Base class for caches of serialized parse results, keyed by `cache_key()`.
+
+    Subclasses must implement `get()`, `put()`, `clear()` and `stats()`, and must
+    be thread-safe. They may implement `reject()` to count corrupt entries.
+    """
+
+    def get(self, key: str) -> bytes | None:
+        """Return the serialized segments stored for a key, or None."""
+        raise NotImplementedError
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store serialized segments for a key."""
+        raise NotImplementedError
+
+    def reject(self, key: str) -> None:
+        """Count the last hit of a key as miss, as its entry could not be decoded.
+
+        The entry is overwritten by the following `put()`.
+        """
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        raise NotImplementedError
+
+    def stats(self) -> ParseCacheStats:
+        raise NotImplementedError
+
+    def parse(self, content: str, parser: Parser) -> list[Segment]:
+        """Parse the content with the parser, or restore the segments of an
+        identical earlier parse."""
+        key = cache_key(content, parser)
+        data = self.get(key)
+        if data is not None:
+            try:
+                return load_segments(parser, data)
+            except (EOFError, ValueError, TypeError):
+                # truncated (e.g. by a crash) or otherwise corrupt, parse again
+                self.reject(key)
+        segments = list(parser.parse(content))
+        self.put(key, dump_segments(parser, segments))
+        return segments
+
+
+class MemoryParseCache(ParseCache):
+    """Keeps the least recently used parse results in memory, within the limits.
+
+    Args:
+        max_entries: The maximum number of entries. None means no limit.
+        max_size: The maximum size of all serialized entries in bytes. None means
+            no limit. An entry bigger than that is not cached.
+    """
+
+    def __init__(self, max_entries: int | None = 1024, max_size: int | None = None):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if self.max_size is not None and len(data) > self.max_size:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = data
+            self._size += len(data)
+            while (
+                self.max_entries is not None and len(self._entries) > self.max_entries
+            ) or (self.max_size is not None and self._size > self.max_size):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self._evictions += 1
+
+    def reject(self, key: str) -> None:
+        with self._lock:
+            self._hits -= 1
+            self._misses += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> ParseCacheStats:
+        with self._lock:
+            return ParseCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                size=self._size,
+            )
+
+
+class DiskParseCache(ParseCache):
+    """Keeps parse results as files in a directory, evicting the least recently
+    used ones when the directory grows bigger than `max_size` bytes.
+
+    The cache can be shared by several processes. Entries are written atomically;
+    the modification time of an entry file is its last use.
+
+    Args:
+        directory: The cache directory. It is created if it does not exist.
+        max_size: The maximum size of all entry files in bytes. None means no limit.
+    """
+
+    SUFFIX = ".parse"
+
+    def __init__(self, directory: os.PathLike | str, max_size: int | None = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.SUFFIX}"
+
+    def _entry_files(self) -> list[os.DirEntry]:
+        with os.scandir(self.directory) as entries:
+            return [
+                entry
+                for entry in entries
+                if entry.name.endswith(self.SUFFIX) and entry.is_file()
+            ]
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._misses += 1
+            return None
+        with self._lock:
+            self._hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if self.max_size is not None and len(data) > self.max_size:
+            return
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_name, self._path(key))
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+        if self.max_size is not None:
+            self._evict(self.max_size)
+
+    def _evict(self, max_size: int) -> None:
+        files = []
+        for entry in self._entry_files():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        size = sum(file[1] for file in files)
+        files.sort()
+        for _, file_size, path in files:
+            if size <= max_size:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                # removed by another process meanwhile
+                pass
+            else:
+                with self._lock:
+                    self._evictions += 1
+            size -= file_size
+
+    def reject(self, key: str) -> None:
+        with self._lock:
+            self._hits -= 1
+            self._misses += 1
+
+    def clear(self) -> None:
+        for entry in self._entry_files():
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> ParseCacheStats:
+        files = self._entry_files()
+        size = 0
+        for entry in files:
+            try:
+                size += entry.stat().st_size
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            return ParseCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(files),
+                size=size,
+            )
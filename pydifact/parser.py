@@ -20,8 +20,12 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+import codecs
 import logging
-from collections.abc import Iterable, Iterator
+import sys
+import warnings
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from typing import TYPE_CHECKING, AnyStr, BinaryIO, NamedTuple
 
 from pydifact.constants import (
     EDI_DEFAULT_DIRECTORY,
@@ -29,15 +33,26 @@ from pydifact.constants import (
     EDI_DEFAULT_VERSION,
     Element,
     Elements,
+    service_segments,
 )
 from pydifact.control import Characters
-from pydifact.exceptions import EDISyntaxError
+from pydifact.definitions import load_segment_definitions
+from pydifact.exceptions import EDISyntaxError, MissingImplementationWarning
 from pydifact.segments import Segment, SegmentFactory
 from pydifact.token import Token
 from pydifact.tokenizer import Tokenizer
+from pydifact.utils import get_message_directory
+
+if TYPE_CHECKING:
+    import asyncio
+    from concurrent.futures import Executor
 
 logger = logging.getLogger(__name__)
 
+# with detect_directory, service segments are validated against the service
+# directory of the syntax version, not against the message directory
+SERVICE_SEGMENTS = frozenset(service_segments)
+
 
 class TokenIterator:
     """Wrapper for token iterator to allow pushing back tokens.
@@ -63,6 +78,67 @@ class TokenIterator:
         self.pushed_back.append(token)
 
 
+def segment_boundaries(
+    data: AnyStr, terminator: AnyStr, escape: AnyStr, start: int = 0
+) -> Iterator[int]:
+    """Yield the index after each unescaped segment terminator in data.
+
+    Works on `str` as well as on `bytes` (with the control characters encoded
+    accordingly). `start` must be the beginning of a segment.
+    """
+    pos = data.find(terminator, start)
+    while pos != -1:
+        # an odd number of escape characters means that the terminator is escaped
+        escapes = 0
+        while (
+            pos - escapes > start and data[pos - escapes - 1 : pos - escapes] == escape
+        ):
+            escapes += 1
+        if escapes % 2 == 0:
+            yield pos + len(terminator)
+        pos = data.find(terminator, pos + len(terminator))
+
+
+class ParserCheckpoint(NamedTuple):
+    """The state of a stream parser after a completely parsed segment.
+
+    A checkpoint can be passed to `Parser.parse_stream` to resume parsing
+    right after that segment, e.g. after a worker crashed.
+    """
+
+    offset: int
+    """The byte offset in the stream after the last completed segment."""
+
+    characters: Characters
+    """The control characters in use."""
+
+    version: str = ""
+    """The syntax version, as found in the UNB header."""
+
+    syntax_identifier: str = ""
+    """The syntax identifier, as found in the UNB header."""
+
+    message_reference: str | None = None
+    """The reference number of the currently open message (UNH), if any."""
+
+    message_identifier: list[str] | None = None
+    """The message identifier (UNH S009) of the currently open message, if any."""
+
+    message_segment_count: int = 0
+    """The number of segments of the open message parsed so far, including UNH."""
+
+    def to_dict(self) -> dict:
+        """Return a JSON serializable representation of the checkpoint."""
+        result = self._asdict()
+        result["characters"] = str(self.characters)
+        return result
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ParserCheckpoint":
+        """Create a checkpoint from a `to_dict` representation."""
+        return cls(**{**data, "characters": Characters.from_str(data["characters"])})
+
+
 class Parser:
     """Parse EDI messages into a list of segments.
 
@@ -73,6 +149,20 @@ class Parser:
         version: The EDI version to override. (default: from UNB header)
         directory: The directory to use for segments. (default: EDI_DEFAULT_DIRECTORY)
         syntax_identifier: The syntax identifier to use for segments. (default: from UNB header)
+        detect_directory: If True, the segments of each message are validated
+            against the directory of its message identifier (UNH S009), e.g.
+            "d96a" for "ORDERS:D:96A:UN", and service segments against the
+            service directory of the syntax version. Messages of unavailable
+            directories fall back to `directory`. (default: False)
+        intern_max_length: Intern content values (tags, qualifiers, codes, IDs)
+            up to this length with `sys.intern()`, so that repeated values share
+            one string object. This saves memory on large, repetitive
+            interchanges. 0 disables interning. (default: 0)
+
+    A parser keeps the state of the interchange it parses (syntax version,
+    current message directory, checkpoint), so it must not be used by several
+    threads at once. Use one parser per thread, or `pydifact.batch` to parse
+    many interchanges on threads.
     """
 
     def __init__(
@@ -80,15 +170,29 @@ class Parser:
         factory: SegmentFactory | None = None,
         characters: Characters | None = None,
         directory: str = "",
+        detect_directory: bool = False,
+        intern_max_length: int = 0,
     ) -> None:
         """Initializes parser with segment factory and control characters"""
         self.factory = factory or SegmentFactory()
         self.characters = characters or Characters()
         self.directory = directory
+        self.detect_directory = detect_directory
+        self.intern_max_length = intern_max_length
 
         self.syntax_identifier = ""
         self.version = ""
 
+        # the directory the current segments are validated against
+        self.message_directory = directory
+        # message directory -> directory to validate against, see resolve_directory()
+        self._directories: dict[str, str] = {}
+        # message directories that were not available, in order of appearance
+        self.unavailable_directories: list[str] = []
+
+        # the state after the last segment yielded by parse_stream()
+        self.checkpoint: ParserCheckpoint | None = None
+
     def parse(
         self,
         message: str,
@@ -105,6 +209,273 @@ class Parser:
             Segment: Parsed segment objects from the EDI message.
         """
 
+        una_characters, message = self.split_una(message)
+
+        # if UNA is available, yield the UNA segment first, even before tokenizing
+        if una_characters is not None:
+            characters = una_characters
+            yield self.factory.create_segment("UNA", str(characters))
+        elif characters is None:
+            # if no UNA header present, the default control characters
+            # given on call take precedence over the stored defaults.
+            characters = self.characters
+
+        yield from self._parse_segments(message, characters)
+
+    def parse_segments(
+        self, text: str, characters: Characters | None = None
+    ) -> Iterator[Segment]:
+        """Parse a part of a message, e.g. located by `segment_boundaries()`.
+
+        Unlike `parse()`, the text is not searched for a UNA segment, so it must
+        start at the beginning of a segment.
+
+        Args:
+            text: The segments to parse.
+            characters: The control characters to use. Defaults to the
+                characters of the parser.
+
+        Yields:
+            Segment: Parsed segment objects from the text.
+        """
+        yield from self._parse_segments(text, characters or self.characters)
+
+    def parse_segment(self, text: str, characters: Characters | None = None) -> Segment:
+        """Parse a single segment, e.g. located by `segment_boundaries()`.
+
+        Args:
+            text: The segment to parse, including its terminator.
+            characters: The control characters to use. Defaults to the
+                characters of the parser.
+
+        Raises:
+            EDISyntaxError: if the text does not contain exactly one segment.
+        """
+        segments = self._parse_segments(text, characters or self.characters)
+        segment = next(segments, None)
+        if segment is None or next(segments, None) is not None:
+            raise EDISyntaxError(f"Expected exactly one segment: {text[:40]!r}")
+        return segment
+
+    async def aparse(
+        self,
+        chunks: "AsyncIterable[str | bytes] | asyncio.StreamReader",
+        characters: Characters | None = None,
+        encoding: str = "iso8859-1",
+        executor: "Executor | None" = None,
+        yield_every: int = 100,
+        chunk_size: int = 65536,
+    ) -> AsyncIterator[Segment]:
+        """Parse an asynchronous stream of EDI data into segments.
+
+        The stream is tokenized incrementally: every time the buffered data contains
+        complete segments, these are parsed and yielded, while an incomplete rest is
+        kept until more data arrives. The UNA segment, if present, must start the
+        stream or directly follow the first segment terminator.
+
+        Args:
+            chunks: An async iterable of `str` or `bytes` chunks, or an
+                `asyncio.StreamReader`.
+            characters: The control characters to use, if there is no
+                UNA segment present. Defaults to None.
+            encoding: The encoding used to decode `bytes` chunks.
+            executor: An optional (thread pool) executor. If given, the CPU-heavy
+                parsing of each buffered block is offloaded to it, so that the event
+                loop stays responsive.
+            yield_every: Give control back to the event loop after this number of
+                yielded segments.
+            chunk_size: The number of bytes to read at once from a `StreamReader`.
+
+        Yields:
+            Segment: Parsed segment objects from the EDI stream.
+        """
+        # asyncio is expensive to import, and only needed here
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        decoder = codecs.getincrementaldecoder(encoding)()
+        buffer = ""
+        line_terminators = ""
+        started = False
+        count = 0
+
+        async def blocks() -> AsyncIterator[tuple[str, bool]]:
+            """Yield (block, is_last) tuples of decoded text."""
+            if isinstance(chunks, asyncio.StreamReader):
+                while data := await chunks.read(chunk_size):
+                    yield decoder.decode(data), False
+            else:
+                async for data in chunks:
+                    if isinstance(data, bytes):
+                        data = decoder.decode(data)
+                    yield data, False
+            yield decoder.decode(b"", final=True), True
+
+        async for block, is_last in blocks():
+            buffer += block
+            if not started:
+                # wait until we can be sure if there is a UNA segment or not
+                if not is_last and not self.una_decidable(buffer):
+                    continue
+                started = True
+                una_characters, buffer = self.split_una(buffer)
+                if una_characters is not None:
+                    characters = una_characters
+                    yield self.factory.create_segment("UNA", str(characters))
+                elif characters is None:
+                    characters = self.characters
+                line_terminators = "".join(characters.line_terminators)
+
+            assert characters is not None
+            if is_last:
+                end = len(buffer)
+            else:
+                end = max(
+                    segment_boundaries(
+                        buffer,
+                        characters.segment_terminator,
+                        characters.escape_character,
+                    ),
+                    default=-1,
+                )
+                if end == -1:
+                    continue
+            text, buffer = buffer[:end].lstrip(line_terminators), buffer[end:]
+            if not text:
+                continue
+
+            if executor is not None:
+                segments: Iterable[Segment] = await loop.run_in_executor(
+                    executor, self._parse_segments_list, text, characters
+                )
+            else:
+                segments = self._parse_segments(text, characters)
+
+            for segment in segments:
+                yield segment
+                count += 1
+                if count % yield_every == 0:
+                    await asyncio.sleep(0)
+
+    def parse_stream(
+        self,
+        stream: BinaryIO,
+        encoding: str = "iso8859-1",
+        characters: Characters | None = None,
+        checkpoint: ParserCheckpoint | None = None,
+        chunk_size: int = 65536,
+    ) -> Iterator[Segment]:
+        """Parse a binary stream segment by segment, keeping track of checkpoints.
+
+        Before each segment is yielded, `self.checkpoint` is updated to the state
+        after that segment. Persist it, and pass it to a later call to resume
+        parsing where it left off.
+
+        Args:
+            stream: A binary, readable stream, e.g. a file opened with "rb".
+                It must be seekable if `checkpoint` is given.
+            encoding: The encoding of the stream. Control characters must be
+                single byte characters in this encoding.
+            characters: The control characters to use, if there is no
+                UNA segment present. Defaults to None.
+            checkpoint: A checkpoint from a previous run to resume from.
+            chunk_size: The number of bytes to read at once.
+
+        Yields:
+            Segment: Parsed segment objects from the stream.
+        """
+        buffer = b""
+        if checkpoint is not None:
+            stream.seek(checkpoint.offset)
+            offset = checkpoint.offset
+            characters = checkpoint.characters
+            self.version = checkpoint.version
+            self.syntax_identifier = checkpoint.syntax_identifier
+            self.message_directory = self.resolve_directory(
+                checkpoint.message_identifier
+            )
+            self.checkpoint = checkpoint
+        else:
+            offset = stream.tell()
+            # read until we know whether there is a UNA segment
+            while not self.una_decidable(head := buffer.decode("latin-1")):
+                data = stream.read(chunk_size)
+                if not data:
+                    break
+                buffer += data
+            una_characters, rest = self.split_una(head)
+            if una_characters is not None:
+                characters = una_characters
+                # Skip the UNA segment, latin-1 is a 1:1 mapping to bytes.
+                offset += len(buffer) - len(rest)
+                buffer = buffer[len(buffer) - len(rest) :]
+            elif characters is None:
+                characters = self.characters
+            self.checkpoint = ParserCheckpoint(
+                offset, characters, self.version, self.syntax_identifier
+            )
+            if una_characters is not None:
+                yield self.factory.create_segment("UNA", str(characters))
+
+        terminator = characters.segment_terminator.encode(encoding)
+        escape = characters.escape_character.encode(encoding)
+        line_terminators = "".join(characters.line_terminators)
+        tokenizer = Tokenizer()
+        eof = False
+
+        while not eof:
+            data = stream.read(chunk_size)
+            eof = not data
+            buffer += data
+            start = 0
+            ends = list(segment_boundaries(buffer, terminator, escape))
+            if eof and buffer[ends[-1] if ends else 0 :].strip():
+                # parse the rest, so that errors are raised like in parse()
+                ends.append(len(buffer))
+            for end in ends:
+                text = buffer[start:end].decode(encoding).lstrip(line_terminators)
+                start = end
+                if not text:
+                    continue
+                for segment in self._parse_segments(text, characters, tokenizer):
+                    self._update_checkpoint(segment, offset + end)
+                    yield segment
+            offset += start
+            buffer = buffer[start:]
+
+    def _update_checkpoint(self, segment: Segment, offset: int) -> None:
+        """Set the checkpoint after the given segment."""
+        assert self.checkpoint is not None
+        reference = self.checkpoint.message_reference
+        identifier = self.checkpoint.message_identifier
+        count = self.checkpoint.message_segment_count
+        if segment.tag == "UNH":
+            reference = segment[0]
+            identifier = segment[1] if isinstance(segment[1], list) else [segment[1]]
+            count = 1
+        elif segment.tag == "UNT":
+            reference, identifier, count = None, None, 0
+        elif reference is not None:
+            count += 1
+        self.checkpoint = ParserCheckpoint(
+            offset,
+            self.checkpoint.characters,
+            self.version,
+            self.syntax_identifier,
+            reference,
+            identifier,
+            count,
+        )
+
+    @staticmethod
+    def split_una(message: str) -> tuple[Characters | None, str]:
+        """Extract the UNA segment from the message, if present.
+
+        Returns:
+            A tuple of the control characters found in the UNA segment (or None, if
+            there is no UNA segment) and the remaining message.
+        """
+
         # If there is a UNA segment, take the following 6 characters
         # unconditionally, strip them, and make control Characters()
         # for further parsing
@@ -117,28 +488,42 @@ class Parser:
         else:
             una_pattern = "'UNA"
             idx_una = message.find(una_pattern)
-        una_found = idx_una != -1
 
-        if una_found:
-            idx_begin = idx_una + len(una_pattern)
-            idx_end = idx_begin + 6
-            characters = Characters.from_str(f"UNA{message[idx_begin:idx_end]}")
+        if idx_una == -1:
+            return None, message
 
-            # remove the UNA segment from the string,
-            # ignore everything before UNA because it should be the first segment if una_found.
-            message = message[idx_end:].lstrip("\r\n")
+        idx_begin = idx_una + len(una_pattern)
+        idx_end = idx_begin + 6
+        characters = Characters.from_str(f"UNA{message[idx_begin:idx_end]}")
 
-        else:
-            # if no UNA header present, the default control characters
-            # given on call take precedence over the stored defaults.
-            if characters is None:
-                characters = self.characters
+        # remove the UNA segment from the string,
+        # ignore everything before UNA because it should be the first segment if una_found.
+        return characters, message[idx_end:].lstrip("\r\n")
 
-        # if UNA is available, yield the UNA segment first, even before tokenizing
-        if una_found:
-            yield self.factory.create_segment("UNA", str(characters))
+    @staticmethod
+    def una_decidable(buffer: str) -> bool:
+        """Check if enough data is buffered to know whether a UNA segment exists."""
+        if buffer.startswith("UNA"):
+            return len(buffer) >= 9
+        idx = buffer.find("'")
+        if idx == -1:
+            return False
+        if buffer.startswith("UNA", idx + 1):
+            return len(buffer) >= idx + 10
+        return len(buffer) >= idx + 4
+
+    def _parse_segments(
+        self,
+        message: str,
+        characters: Characters,
+        tokenizer: Tokenizer | None = None,
+    ) -> Iterator[Segment]:
+        """Tokenize a message (without UNA header) and yield its segments.
 
-        tokenizer = Tokenizer()
+        A tokenizer can be passed to reuse it for consecutive calls, it must not
+        be used by another generator at the same time.
+        """
+        tokenizer = tokenizer or Tokenizer()
         token_iterator = TokenIterator(tokenizer.get_tokens(message, characters))
 
         while True:
@@ -146,11 +531,16 @@ class Parser:
             try:
                 raw_segment = next(raw_segments)
                 yield self.convert_raw_segment_to_segment(
-                    raw_segment, directory=self.directory
+                    raw_segment, directory=self.message_directory
                 )
             except StopIteration:
                 break
 
+    def _parse_segments_list(
+        self, message: str, characters: Characters
+    ) -> list[Segment]:
+        return list(self._parse_segments(message, characters))
+
     @staticmethod
     def get_control_characters(
         message: str, characters: Characters | None = None
@@ -206,6 +596,8 @@ class Parser:
         data_element_value: Element
         in_segment = False
         empty_component_counter = 0
+        intern_max_length = self.intern_max_length
+        value: str
 
         for token in tokens:
             # If we're in the middle of a segment, check if we've reached the end
@@ -273,7 +665,10 @@ class Parser:
             ):
                 data_element.append("")
 
-            data_element.append(token.value)
+            value = token.value
+            if intern_max_length and len(value) <= intern_max_length:
+                value = sys.intern(value)
+            data_element.append(value)
             empty_component_counter = 0
 
     def convert_raw_segment_to_segment(
@@ -302,10 +697,52 @@ class Parser:
                 f"Using edifact syntax identifier '{self.syntax_identifier}' with  "
                 f"syntax version {self.version} in UNB header.",
             )
+        elif name == "UNH" and self.detect_directory:
+            identifier = raw_segment[1] if len(raw_segment) > 1 else None
+            directory = self.message_directory = self.resolve_directory(
+                identifier if isinstance(identifier, list) else None
+            )
 
-        return self.factory.create_segment(
+        segment = self.factory.create_segment(
             name,
             *raw_segment,
             version=self.version,
-            directory=directory,
+            directory=(
+                "" if self.detect_directory and name in SERVICE_SEGMENTS else directory
+            ),
         )
+        if name == "UNT":
+            self.message_directory = self.directory
+        return segment
+
+    def resolve_directory(self, identifier: list[str] | None) -> str:
+        """Return the directory to validate a message with the given identifier.
+
+        If `detect_directory` is off, or the message identifier (UNH S009) refers
+        to no directory, `self.directory` is returned. Each directory is looked up
+        only once: an unavailable one is warned about, added to
+        `unavailable_directories`, and replaced by `self.directory`.
+        """
+        if not self.detect_directory or not identifier:
+            return self.directory
+        directory = get_message_directory(identifier)
+        if not directory:
+            return self.directory
+        try:
+            return self._directories[directory]
+        except KeyError:
+            pass
+        try:
+            load_segment_definitions(directory)
+            resolved = directory
+        except FileNotFoundError:
+            warnings.warn(
+                f"Directory '{directory}' of message {':'.join(identifier)} is "
+                f"not available. Falling back to "
+                f"'{self.directory or 'service segments only'}' for validation.",
+                category=MissingImplementationWarning,
+            )
+            self.unavailable_directories.append(directory)
+            resolved = self.directory
+        self._directories[directory] = resolved
+        return resolved
@@ -0,0 +1,378 @@
+# Pydifact - a python edifact library
+#
+# Copyright (c) 2017-2024 Christian González
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Read the header and routing metadata of an interchange without parsing it.
+
+This allows cheap decisions before any expensive work, like rejecting duplicate
+interchanges (see `pydifact.duplicates`) or routing them by sender and message
+types::
+
+    header = read_header("incoming.edi")
+    if not duplicate_index.add(header.key):
+        ...  # already received
+
+    info = peek("incoming.edi")
+    if "INVOIC" in info.message_types:
+        ...
+"""
+
+import contextlib
+import io
+import os
+import re
+from collections.abc import Iterator
+from typing import BinaryIO, NamedTuple
+
+from pydifact.constants import Element, Elements
+from pydifact.control import Characters
+from pydifact.exceptions import EDISyntaxError, ValidationError
+from pydifact.parser import Parser, segment_boundaries
+from pydifact.tokenizer import Tokenizer
+from pydifact.values import get_component
+
+# a binary stream, the path of a file, or the data itself
+Source = BinaryIO | str | os.PathLike | bytes
+
+
+class InterchangeHeader(NamedTuple):
+    """The information of the UNA and UNB segments of an interchange."""
+
+    characters: Characters
+    """The control characters, from UNA or the defaults."""
+
+    has_una_segment: bool
+
+    syntax_identifier: str
+    """The syntax identifier (UNB S001/0001), e.g. "UNOC"."""
+
+    syntax_version: str
+    """The syntax version number (UNB S001/0002), e.g. "3"."""
+
+    sender: Element
+    """The interchange sender (UNB S002)."""
+
+    recipient: Element
+    """The interchange recipient (UNB S003)."""
+
+    preparation: Element
+    """The date and time of preparation (UNB S004)."""
+
+    control_reference: str
+    """The interchange control reference (UNB 0020)."""
+
+    size: int
+    """The number of bytes up to and including the UNB segment terminator."""
+
+    @property
+    def key(self) -> tuple[str, str, str]:
+        """The sender and recipient identifications and the control reference,
+        which identify an interchange."""
+        return (
+            get_component(self.sender, 0) or "",
+            get_component(self.recipient, 0) or "",
+            self.control_reference,
+        )
+
+
+@contextlib.contextmanager
+def open_source(source: Source) -> Iterator[BinaryIO]:
+    """Return a binary stream of a source.
+
+    Files are opened (and closed afterwards), bytes are wrapped, and streams are
+    used as they are, starting at their current position.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(source)
+    elif hasattr(source, "read"):
+        yield source  # type: ignore[misc]
+    else:
+        with open(source, "rb") as f:  # type: ignore[arg-type]
+            yield f
+
+
+def read_header(
+    source: Source,
+    encoding: str = "iso8859-1",
+    characters: Characters | None = None,
+    chunk_size: int = 4096,
+    max_size: int = 65536,
+) -> InterchangeHeader:
+    """Read the UNA and UNB segments from the start of an interchange.
+
+    Only the data up to the UNB segment terminator is tokenized. A stream is
+    read in chunks up to the UNB segment, and not rewound afterwards.
+
+    Args:
+        source: A binary stream, the path of a file, or the data itself.
+        encoding: The encoding of the interchange.
+        characters: The control characters to use, if there is no UNA segment.
+        chunk_size: The number of bytes to read at once.
+        max_size: The maximum number of bytes to read before giving up.
+
+    Raises:
+        EDISyntaxError: If the interchange does not start with a complete, valid
+            UNB segment (after UNA).
+    """
+    with open_source(source) as stream:
+        return _read_header(stream, encoding, characters, chunk_size, max_size)[0]
+
+
+def _read_header(
+    stream: BinaryIO,
+    encoding: str,
+    characters: Characters | None,
+    chunk_size: int,
+    max_size: int,
+) -> tuple[InterchangeHeader, bytes]:
+    """Read the header from a stream.
+
+    Returns:
+        The header, and the data read after it.
+    """
+    parser = Parser(characters=characters)
+    buffer = b""
+    while True:
+        data = stream.read(chunk_size)
+        buffer += data
+        # latin-1 is a 1:1 mapping to bytes, offsets stay byte offsets
+        head = buffer.decode("latin-1")
+        eof = not data
+        if not eof and not parser.una_decidable(head):
+            continue
+        una_characters, rest = parser.split_una(head)
+        characters = una_characters or parser.characters
+        end = next(
+            segment_boundaries(
+                rest, characters.segment_terminator, characters.escape_character
+            ),
+            -1,
+        )
+        if end != -1:
+            break
+        if eof or len(buffer) >= max_size:
+            raise EDISyntaxError("No UNB segment found at the start of the data.")
+
+    text = rest[:end].encode("latin-1").decode(encoding)
+    text = text.lstrip("".join(characters.line_terminators))
+    if not text.startswith("UNB"):
+        raise EDISyntaxError("An interchange must start with UNB or UNA and UNB.")
+    try:
+        unb = parser.parse_segment(text, characters)
+    except ValidationError as e:
+        raise EDISyntaxError(f"Invalid UNB segment: {e}") from e
+    if len(unb.elements) < 5:
+        raise EDISyntaxError(
+            "UNB segment incomplete: syntax identifier, sender, recipient, "
+            "date/time of preparation and control reference are required."
+        )
+    syntax = unb[0]
+    if not isinstance(syntax, list) or len(syntax) < 2:
+        raise EDISyntaxError("Syntax identifier malformed.")
+    size = len(head) - len(rest) + end
+    header = InterchangeHeader(
+        characters=characters,
+        has_una_segment=una_characters is not None,
+        syntax_identifier=syntax[0],
+        syntax_version=syntax[1],
+        sender=unb[1] or "",
+        recipient=unb[2] or "",
+        preparation=unb[3] or "",
+        control_reference=get_component(unb[4], 0) or "",
+        size=size,
+    )
+    return header, buffer[size:]
+
+
+class RoutingInfo(NamedTuple):
+    """The routing metadata of an interchange, see `peek()`."""
+
+    header: InterchangeHeader
+    """The UNA/UNB information."""
+
+    message_types: dict[str, int]
+    """The number of messages per message type (UNH S009/0065), in the order of
+    their first occurrence."""
+
+    message_count: int
+    """The number of messages (UNH segments)."""
+
+    segment_count: int
+    """The number of segments, including UNB and UNZ, but not UNA."""
+
+    declared_count: int | None
+    """The interchange control count of UNZ (0036), or None if there is no UNZ."""
+
+    trailer_reference: str | None
+    """The control reference of UNZ (0020), or None if there is no UNZ."""
+
+    size: int
+    """The number of bytes scanned."""
+
+    @property
+    def complete(self) -> bool:
+        """True if the interchange is terminated by UNZ with a matching control
+        reference."""
+        return self.trailer_reference == self.header.control_reference
+
+
+def _split(segment: bytes, characters: Characters, encoding: str) -> Elements:
+    """Split a segment into its elements (without the tag)."""
+    text = segment.decode(encoding)
+    if characters.escape_character in text:
+        if not text.endswith(characters.segment_terminator):
+            text += characters.segment_terminator
+        # rare, use the tokenizer to handle escaped control characters
+        parser = Parser(characters=characters)
+        raw_segment = next(
+            parser.convert_tokens_to_raw_segments(
+                Tokenizer().get_tokens(text, characters)
+            )
+        )
+        return raw_segment[1:]
+    elements: Elements = []
+    for element in text.rstrip(characters.segment_terminator).split(
+        characters.data_separator
+    )[1:]:
+        components = element.split(characters.component_separator)
+        elements.append(components if len(components) > 1 else element)
+    return elements
+
+
+def peek(
+    source: Source,
+    encoding: str = "iso8859-1",
+    characters: Characters | None = None,
+    chunk_size: int = 1 << 20,
+) -> RoutingInfo:
+    """Collect the routing metadata of an interchange, without parsing it.
+
+    After the UNA/UNB header, the data is only scanned for the UNH and UNZ
+    segments (with regular expressions, in chunks), which are split into their
+    elements. All other segments are only counted. Nothing is validated.
+
+    Args:
+        source: A binary stream, the path of a file, or the data itself.
+        encoding: The encoding of the interchange. The control characters must
+            be single byte characters in it.
+        characters: The control characters to use, if there is no UNA segment.
+        chunk_size: The number of bytes to read at once.
+
+    Raises:
+        EDISyntaxError: If the interchange does not start with a complete, valid
+            UNB segment (after UNA).
+    """
+    with open_source(source) as stream:
+        header, buffer = _read_header(stream, encoding, characters, 4096, 65536)
+        characters = header.characters
+        terminator = characters.segment_terminator.encode(encoding)
+        escape = characters.escape_character.encode(encoding)
+        separator = characters.data_separator.encode(encoding)
+        whitespace = "".join(characters.line_terminators).encode(encoding)
+        # candidates for UNH and UNZ segments; a literal pattern is much faster
+        # to search than one that includes the preceding segment terminator
+        pattern = re.compile(rb"(UN[HZ])" + re.escape(separator))
+        escaped_terminator = re.compile(
+            rb"(?<!"
+            + re.escape(escape)
+            + rb")(?:"
+            + re.escape(escape * 2)
+            + rb")*"
+            + re.escape(escape + terminator)
+        )
+
+        message_types: dict[str, int] = {}
+        message_count = 0
+        segment_count = 1  # UNB
+        declared_count: int | None = None
+        trailer_reference: str | None = None
+        size = header.size
+        eof = False
+        while not eof:
+            data = stream.read(chunk_size)
+            eof = not data
+            buffer += data
+            if eof:
+                end = len(buffer)
+            else:
+                # scan up to the last unescaped segment terminator
+                end = buffer.rfind(terminator) + 1
+                while end > 0 and _is_escaped(buffer, end - 1, escape):
+                    end = buffer.rfind(terminator, 0, end - 1) + 1
+                if end <= 0:
+                    continue
+            block = buffer[:end]
+            buffer = buffer[end:]
+            size += end
+
+            segment_count += block.count(terminator)
+            if escape in block:
+                segment_count -= len(escaped_terminator.findall(block))
+            if eof and block[block.rfind(terminator) + 1 :].strip(whitespace):
+                # a last segment without terminator
+                segment_count += 1
+
+            for match in pattern.finditer(block):
+                start = match.start()
+                # must be at the start of a segment (the block starts with one)
+                previous = start - 1
+                while previous >= 0 and block[previous] in whitespace:
+                    previous -= 1
+                if previous >= 0 and (
+                    block[previous : previous + 1] != terminator
+                    or _is_escaped(block, previous, escape)
+                ):
+                    continue
+                segment_end = next(
+                    segment_boundaries(block, terminator, escape, start), len(block)
+                )
+                elements = _split(block[start:segment_end], characters, encoding)
+                if match.group(1) == b"UNH":
+                    identifier = elements[1] if len(elements) > 1 else ""
+                    message_type = get_component(identifier, 0) or ""
+                    message_types[message_type] = message_types.get(message_type, 0) + 1
+                    message_count += 1
+                else:
+                    declared = get_component(elements[0], 0) if elements else None
+                    declared_count = (
+                        int(declared) if declared and declared.isdigit() else None
+                    )
+                    trailer_reference = (
+                        get_component(elements[1], 0) if len(elements) > 1 else ""
+                    )
+
+    return RoutingInfo(
+        header=header,
+        message_types=message_types,
+        message_count=message_count,
+        segment_count=segment_count,
+        declared_count=declared_count,
+        trailer_reference=trailer_reference,
+        size=size,
+    )
+
+
+def _is_escaped(data: bytes, position: int, escape: bytes) -> bool:
+    """Check if the character at position is preceded by an odd number of
+    escape characters."""
+    escapes = 0
+    while position - escapes > 0 and data[position - escapes - 1] == escape[0]:
+        escapes += 1
+    return escapes % 2 == 1
@@ -23,7 +23,7 @@
 import codecs
 import datetime
 from collections.abc import Callable, Iterable, Iterator, Sequence
-from typing import Type, TypeVar
+from typing import TYPE_CHECKING, TextIO, Type, TypeVar
 
 from pydifact.constants import Element, Elements
 from pydifact.control import Characters
@@ -32,6 +32,14 @@ from pydifact.parser import Parser
 from pydifact.segments import Segment
 from pydifact.serializer import Serializer
 
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+    from decimal import Decimal
+
+    from pydifact.columnar import SegmentTable
+    from pydifact.parsecache import ParseCache
+    from pydifact.validation import ValidationReport
+
 T = TypeVar("T", bound="AbstractSegmentsContainer")
 
 
@@ -85,6 +93,7 @@ class AbstractSegmentsContainer:
         string: str,
         parser: Parser | None = None,
         characters: Characters | None = None,
+        cache: "ParseCache | None" = None,
     ) -> T:
         """Create an instance from a string.
 
@@ -92,11 +101,18 @@ class AbstractSegmentsContainer:
             string: The EDI content.
             parser: A parser to convert the tokens to segments; defaults to `Parser`.
             characters: The set of control characters.
+            cache: A `~pydifact.parsecache.ParseCache`. If given, the segments of
+                an identical content, parsed with the same parser configuration
+                before, are restored from it instead of parsing the content again.
         """
         if parser is None:
             parser = Parser(characters=characters)
 
-        segments = parser.parse(string)
+        segments: Iterable[Segment]
+        if cache is not None:
+            segments = cache.parse(string, parser)
+        else:
+            segments = parser.parse(string)
 
         return cls.from_segments(segments=segments, characters=parser.characters)
 
@@ -158,6 +174,86 @@ class AbstractSegmentsContainer:
 
         return None
 
+    def get_numbers(
+        self,
+        name: str,
+        position: int,
+        component: int | None = None,
+        predicate: Callable[[Segment], bool] | None = None,
+    ) -> list["Decimal"]:
+        """Decode a numeric element of all segments with the requested name.
+
+        Numbers are decoded using the decimal mark of this container's control
+        characters. Segments where the element is missing or empty are skipped.
+
+        E.g. the sum of all invoice amounts (MOA with qualifier 77)::
+
+            sum(interchange.get_numbers("MOA", 0, 1, lambda s: s[0][0] == "77"))
+
+        Args:
+            name: The name of the segments.
+            position: The index of the element.
+            component: The index of the component, if the element is a composite.
+            predicate: Optional callable that accepts a segment as argument.
+                Only segments for which the returned value is `True` are considered.
+
+        Raises:
+            ValueError: If a value is not a valid number.
+        """
+        from pydifact.values import decode_number, get_component
+
+        decimal_point = self.characters.decimal_point
+        values = (
+            get_component(segment.elements[position], component)
+            for segment in self.segments
+            if segment.tag == name
+            and len(segment.elements) > position
+            and (predicate is None or predicate(segment))
+        )
+        return [decode_number(value, decimal_point) for value in values if value]
+
+    def get_dates(
+        self, qualifier: str | None = None
+    ) -> list["datetime.date | datetime.datetime"]:
+        """Decode the dates of all DTM segments, see `Segment.get_date()`.
+
+        Args:
+            qualifier: Only consider DTM segments with this date/time/period
+                qualifier (2005), e.g. "137" for the document date.
+
+        Raises:
+            ValueError: If a value does not match its format, or the format code is
+                not supported.
+        """
+        from pydifact.values import decode_date
+
+        dates = []
+        for segment in self.segments:
+            if segment.tag != "DTM" or not segment.elements:
+                continue
+            element = segment.elements[0]
+            if isinstance(element, str) or len(element) < 2 or not element[1]:
+                continue
+            if qualifier is not None and element[0] != qualifier:
+                continue
+            format_code = element[2] if len(element) > 2 and element[2] else "102"
+            dates.append(decode_date(element[1], format_code))
+        return dates
+
+    def to_table(self, directory: str | None = None) -> "SegmentTable":
+        """Export the segments into columns, one row per segment.
+
+        See `pydifact.columnar.SegmentTable` for the columns, and for converting
+        them into NumPy arrays or an Arrow table.
+
+        Args:
+            directory: The directory used to determine segment groups, e.g. "d24a".
+                By default, the directory is taken from each message header.
+        """
+        from pydifact.columnar import SegmentTable
+
+        return SegmentTable.from_segments(self.segments, directory)
+
     def split_by(
         self,
         start_segment_tag: str,
@@ -335,6 +431,22 @@ class Message(AbstractSegmentsContainer):
         """
         return f"{self.identifier[1]}.{self.identifier[2]}"
 
+    @property
+    def definition(self) -> dict | None:
+        """The definition of the message type in the directory given in the header.
+
+        See `pydifact.structure.get_message_definition()`. Definitions are loaded
+        the first time a message type of a directory is needed. None is returned
+        if the directory or message type is unknown.
+        """
+        from pydifact.structure import get_message_definition
+        from pydifact.utils import get_message_directory
+
+        directory = get_message_directory(self.identifier)
+        if directory is None:
+            return None
+        return get_message_definition(directory, self.type)
+
     def get_header_segment(self) -> Segment:
         return Segment(
             self.HEADER_TAG,
@@ -474,7 +586,11 @@ class Interchange(AbstractSegmentsContainer):
 
     @classmethod
     def from_file(
-        cls, file: str, encoding: str = "iso8859-1", parser: Parser | None = None
+        cls,
+        file: str,
+        encoding: str = "iso8859-1",
+        parser: Parser | None = None,
+        cache: "ParseCache | None" = None,
     ) -> "Interchange":
         """Create an Interchange instance from a file.
 
@@ -485,6 +601,8 @@ class Interchange(AbstractSegmentsContainer):
                 The encoding to use when reading the file.
             parser : Parser, optional
                 A parser to convert the tokens to segments.
+            cache : ParseCache, optional
+                A cache of parse results, see `from_str()`.
 
         Returns:
             Interchange
@@ -501,7 +619,7 @@ class Interchange(AbstractSegmentsContainer):
 
         with open(file, encoding=encoding) as f:
             collection = f.read()
-        return cls.from_str(collection, parser=parser)
+        return cls.from_str(collection, parser=parser, cache=cache)
 
     @classmethod
     def from_segments(
@@ -621,6 +739,194 @@ class Interchange(AbstractSegmentsContainer):
             return
         super().add_segment(segment)
 
-    def validate(self) -> None:
-        # TODO: proper validation
-        pass
+    def validate(
+        self,
+        executor: "Executor | None" = None,
+        directory: str | None = None,
+        detect_directory: bool = True,
+    ) -> None:
+        """Validate all segments and messages of the interchange.
+
+        Args:
+            executor: An executor to validate batches of messages in parallel,
+                see `validation_report()`.
+            directory: The directory to validate messages against, if
+                `detect_directory` is off or a message's directory is not
+                available, see `validation_report()`.
+            detect_directory: If True, the directory of each message is taken
+                from its UNH.
+
+        Raises:
+            ValidationError: With all issues found, if the interchange is invalid.
+        """
+        report = self.validation_report(
+            executor=executor, directory=directory, detect_directory=detect_directory
+        )
+        if not report.valid:
+            raise ValidationError(
+                "\n".join(
+                    f"Segment {issue.position} ({issue.tag}): {issue.error}"
+                    for issue in report.issues
+                )
+            )
+
+    def validation_report(
+        self,
+        executor: "Executor | None" = None,
+        directory: str | None = None,
+        batch_size: int = 2000,
+        detect_directory: bool = True,
+    ) -> "ValidationReport":
+        """Validate the interchange, and return all issues found.
+
+        Segments are validated against the directory of their message (UNH S009),
+        service segments against the service directory of the syntax version.
+        UNT segment counts and reference numbers are checked as well.
+
+        Args:
+            executor: An executor to validate batches of messages in parallel. Use
+                a `ThreadPoolExecutor` on free-threaded Python, where the threads
+                share the compiled definitions, otherwise a `ProcessPoolExecutor`
+                (after `pydifact.preload()` of the used directories). By default,
+                everything is validated in the current thread.
+            directory: The directory to validate messages against, if
+                `detect_directory` is off or a message's directory is not
+                available (like the fallback of `Parser(detect_directory=True)`).
+                By default, only service segments are validated then.
+            batch_size: The minimum number of segments per batch of messages.
+            detect_directory: If True, the directory of each message is taken
+                from its UNH.
+        """
+        from pydifact.validation import validate_interchange
+
+        return validate_interchange(
+            self, executor, directory, batch_size, detect_directory
+        )
+
+
+class InterchangeWriter:
+    """Write an interchange message by message directly into a text stream.
+
+    In contrast to building an `Interchange` and serializing it afterwards, no
+    segment lists of the whole interchange are kept in memory: the UNB header is
+    written on creation, each message is serialized when it is added, and the
+    UNT/UNZ counts are maintained while writing. Use it as context manager, or
+    call `close()` to write the UNZ footer::
+
+        with open("out.edi", "w") as f:
+            with InterchangeWriter(f, "sender", "recipient", "42", ("UNOC", 3)) as w:
+                for message in messages:
+                    w.add_message(message)
+
+    Args:
+        stream: The text stream to write to, e.g. an opened file or `io.StringIO`.
+        sender, recipient, control_reference, syntax_identifier, timestamp,
+            extra_header_elements, characters: see `Interchange`.
+        with_una_header: If `True`, the Service String Advice (UNA) is written.
+        break_lines: If `True`, inserts line break after each segment terminator.
+    """
+
+    def __init__(
+        self,
+        stream: TextIO,
+        sender: Element,
+        recipient: Element,
+        control_reference: Element,
+        syntax_identifier: tuple[str, int],
+        timestamp: datetime.datetime | None = None,
+        extra_header_elements: Elements | None = None,
+        characters: Characters | None = None,
+        with_una_header: bool = False,
+        break_lines: bool = False,
+    ) -> None:
+        self.stream = stream
+        self.break_lines = break_lines
+        # an empty interchange, only used as envelope
+        self.interchange = Interchange(
+            sender=sender,
+            recipient=recipient,
+            control_reference=control_reference,
+            syntax_identifier=syntax_identifier,
+            timestamp=timestamp,
+            extra_header_elements=extra_header_elements,
+            characters=characters,
+        )
+        self.serializer = Serializer(self.interchange.characters)
+
+        # number of messages written so far
+        self.message_count = 0
+        self.closed = False
+
+        if with_una_header:
+            self.stream.write(self.interchange.characters.service_string_advice)
+            if break_lines:
+                self.stream.write("\n")
+        self._write(self.interchange.get_header_segment())
+
+    def _write(self, segment: Segment) -> None:
+        self.stream.write(self.serializer.serialize_segment(segment, self.break_lines))
+
+    def add_message(self, message: Message) -> "InterchangeWriter":
+        """Serialize a message, including its UNH/UNT envelope, into the stream."""
+        return self.add_message_segments(
+            message.reference_number,
+            message.identifier,
+            message.segments,
+            message.extra_header_elements,
+        )
+
+    def add_message_segments(
+        self,
+        reference_number: str,
+        identifier: Sequence[str],
+        segments: Iterable[Segment],
+        extra_header_elements: Elements | None = None,
+    ) -> "InterchangeWriter":
+        """Serialize the segments of a message into the stream.
+
+        In contrast to `add_message`, the segments can be generated lazily, as
+        they are counted while writing.
+
+        Args:
+            reference_number: The message reference number (UNH 0062).
+            identifier: The message identifier (UNH S009).
+            segments: The segments of the message, without the UNH/UNT envelope.
+            extra_header_elements: Elements to be appended to the UNH segment.
+        """
+        if self.closed:
+            raise ValueError("Cannot add messages to a closed InterchangeWriter.")
+        self._write(
+            Segment(
+                Message.HEADER_TAG,
+                reference_number,
+                [str(i) for i in identifier],
+                *(extra_header_elements or []),
+            )
+        )
+        count = 2  # UNH + UNT
+        for segment in segments:
+            self._write(segment)
+            count += 1
+        self._write(Segment(Message.FOOTER_TAG, str(count), reference_number))
+        self.message_count += 1
+        return self
+
+    def close(self) -> None:
+        """Write the UNZ footer. The stream itself is not closed."""
+        if self.closed:
+            return
+        self._write(
+            Segment(
+                Interchange.FOOTER_TAG,
+                str(self.message_count),
+                self.interchange.control_reference,
+            )
+        )
+        self.closed = True
+
+    def __enter__(self) -> "InterchangeWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
@@ -20,11 +20,9 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 import logging
+import threading
 import warnings
-import xml.etree.ElementTree as ET
-from functools import lru_cache
-from pathlib import Path
-from typing import overload
+from typing import TYPE_CHECKING, overload
 
 from pydifact.constants import (
     EDI_DEFAULT_DIRECTORY,
@@ -34,47 +32,26 @@ from pydifact.constants import (
     M,
     service_segments,
 )
+from pydifact.definitions import load_segment_definitions
 from pydifact.exceptions import (
     EDISyntaxError,
     MissingImplementationWarning,
     ValidationError,
 )
-from pydifact.syntax.common import CompositeDataElement, DataElement
 from pydifact.utils import get_syntax_release_version
 
-logger = logging.getLogger(__name__)
-
-
-@lru_cache(maxsize=32)
-def _load_segments_xml(directory: str) -> ET.Element:
-    """Load and cache segments.xml from the specified directory.
-
-    Args:
-        directory: The directory name under pydifact.syntax (e.g., 'd00a', 'd96a')
+if TYPE_CHECKING:
+    import datetime
+    from decimal import Decimal
 
-    Returns:
-        The root element of the parsed XML tree
+    from pydifact.syntax.common import CompositeDataElement, DataElement
 
-    Raises:
-        FileNotFoundError: If segments.xml cannot be found in the directory
-        ET.ParseError: If the XML file cannot be parsed
-    """
-    # Get the path to the syntax directory
-    syntax_path = Path(__file__).parent / "syntax" / directory / "data" / "segments.xml"
-
-    if not syntax_path.exists():
-        syntax_path = (
-            Path(__file__).parent
-            / "syntax"
-            / directory
-            / "data"
-            / "simple_segments.xml"
-        )
-        if not syntax_path.exists():
-            raise FileNotFoundError(f"segments.xml not found in directory: {directory}")
+logger = logging.getLogger(__name__)
 
-    tree = ET.parse(syntax_path)
-    return tree.getroot()
+# guards the registration of Segment plugins and the lookup table built from them
+_plugins_lock = threading.Lock()
+# (tag, version) -> plugin class, and a copy of the plugin list it was built from
+_plugin_table: tuple[dict[tuple[str, object], type["Segment"]], list] = ({}, [])
 
 
 class Segment:
@@ -88,14 +65,15 @@ class Segment:
     # tag is not a class attribute in this case, as each Segment instance could have another tag.
     __omitted__ = True
     plugins: list = []
-    schema: list[tuple[type[CompositeDataElement | DataElement], str, int, str]] = []
+    schema: list[tuple[type["CompositeDataElement | DataElement"], str, int, str]] = []
     tag = ""
     elements: list[Element] = []
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
         if "__omitted__" not in cls.__dict__ or getattr(cls, "__omitted__") is False:
-            cls.plugins.append(cls)
+            with _plugins_lock:
+                cls.plugins.append(cls)
 
     @overload
     def __init__(self, tag: str, *elements: Element): ...
@@ -169,6 +147,52 @@ class Segment:
     def __setitem__(self, key: int, value: Element) -> None:
         self.elements[key] = value
 
+    def get_number(
+        self, position: int, component: int | None = None, decimal_point: str = ","
+    ) -> "Decimal | None":
+        """Decode a numeric element (or component) of this segment.
+
+        E.g. the amount of `MOA+203:1234,56'` is `segment.get_number(0, 1)`.
+
+        Args:
+            position: The index of the element.
+            component: The index of the component, if the element is a composite.
+            decimal_point: The decimal mark used in the interchange, see
+                `Characters.decimal_point`.
+
+        Returns:
+            The number, or None if the element is missing or empty.
+
+        Raises:
+            ValueError: If the value is not a valid number.
+        """
+        # imported here, as decimal is only needed by consumers of typed values
+        from pydifact.values import decode_number, get_component
+
+        value = get_component(self[position], component)
+        return decode_number(value, decimal_point) if value else None
+
+    def get_date(self, position: int = 0) -> "datetime.date | datetime.datetime | None":
+        """Decode a date/time/period composite (C507), as used by DTM.
+
+        The format is taken from the format code component (2379), e.g.
+        `DTM+137:20240131:102'` is decoded as `datetime.date(2024, 1, 31)`. If the
+        format code is omitted, 102 (CCYYMMDD) is assumed.
+
+        Returns:
+            The date or datetime, or None if the element is missing or empty.
+
+        Raises:
+            ValueError: If the value does not match the format, or the format code
+                is not supported.
+        """
+        from pydifact.values import decode_date, get_component
+
+        value = get_component(self[position], 1)
+        if not value:
+            return None
+        return decode_date(value, get_component(self[position], 2) or "102")
+
     def validate(self, syntax_version: str, directory: str) -> None:
         """
         Segment validation against a given syntax version and EDIFACT directory.
@@ -193,15 +217,14 @@ class Segment:
             return
 
         try:
-            # load segments xml (or cache it)
-            xml_root = _load_segments_xml(directory)
+            # load compiled segments xml (or cache it)
+            definitions = load_segment_definitions(directory)
 
             if self.tag == "UNA":
                 # UNA is special
                 return
 
-            # Find the segment definition in XML
-            segment_def = xml_root.find(f".//segment[@id='{self.tag}']")
+            segment_def = definitions.get(self.tag)
 
             if segment_def is None:
                 logger.warning(f"No definition found for segment {self.tag}")
@@ -212,15 +235,9 @@ class Segment:
 
             # Validate against XML schema
             # first get sub elements (data_element or composite_data_element)
-            xml_elements = segment_def.findall("./*")
+            xml_elements = segment_def.elements
             # get count of required elements
-            required_element_count = len(
-                [
-                    e
-                    for e in xml_elements
-                    if e.get("required", "false").lower() == "true"
-                ]
-            )
+            required_element_count = segment_def.required_count
 
             # check if we have less than the required number of elements
             # defined in XML
@@ -239,40 +256,40 @@ class Segment:
 
             for index, xml_element in enumerate(xml_elements):
                 element = self.elements[index] if index < len(self.elements) else None
-                is_mandatory = xml_element.get("required", "false").lower() == "true"
+                is_mandatory = xml_element.required
                 # repeat = int(xml_element.get("repeat", "1")) # not used yet
 
                 if is_mandatory and (element is None or element == ""):
                     raise ValidationError(
                         f"{self.tag} Segment, pos. {index}: "
-                        f"element {xml_element.get('id')} ({xml_element.get('name')}) "
+                        f"element {xml_element.id} ({xml_element.name}) "
                         f"is required."
                     )
 
                 if element:
-                    if xml_element.tag == "data_element":
+                    if xml_element.kind == "data_element":
                         if not isinstance(element, str):
                             raise ValidationError(
                                 f"{self.tag} Segment, pos. {index}: "
-                                f"element {xml_element.get('id')} ({xml_element.get('name')}) "
+                                f"element {xml_element.id} ({xml_element.name}) "
                                 f"should be a simple data element, but got: "
                                 f"{element}"
                             )
-                        repeat = xml_element.get("repeat", "")
+                        repeat = xml_element.repeat
                         if not repeat.isdigit():
                             logger.warning(
                                 "'repeat' attribute missing for "
                                 f"element {directory}."
-                                f"{xml_element.get('id')}"
+                                f"{xml_element.id}"
                             )
                             repeat = "1"
                         # TODO: validate repeats
 
                         # validate data element (length, type)
                         # convert type and maxlength/minlength to repr string (e.g. "an..3")
-                        type_code = xml_element.get("type")
-                        length = int(xml_element.get("length", "0"))
-                        maxlength = int(xml_element.get("maxlength", "0"))
+                        type_code = xml_element.type
+                        length = xml_element.length
+                        maxlength = xml_element.maxlength
                         match type_code:
                             case "an":
                                 # no validation necessary, all is allowed.
@@ -285,7 +302,7 @@ class Segment:
                                 #     if not char.isalnum():
                                 #         raise ValidationError(
                                 #             f"{self.tag} Segment, pos. {index}: "
-                                #             f"element {xml_element.get('id')} ({xml_element.get('name')}) "
+                                #             f"element {xml_element.id} ({xml_element.name}) "
                                 #             f"contains invalid character: {char}"
                                 #         )
                                 pass
@@ -294,7 +311,7 @@ class Segment:
                                 if not element.strip().isdigit():
                                     raise ValidationError(
                                         f"{self.tag} Segment, pos. {index}: "
-                                        f"element {xml_element.get('id')} ({xml_element.get('name')}) "
+                                        f"element {xml_element.id} ({xml_element.name}) "
                                         f"should only contain numbers, but got: "
                                         f"{element}"
                                     )
@@ -306,7 +323,7 @@ class Segment:
                                     if not char.isalpha():
                                         raise ValidationError(
                                             f"{self.tag} Segment, pos. {index}: "
-                                            f"element {xml_element.get('id')} ({xml_element.get('name')}) "
+                                            f"element {xml_element.id} ({xml_element.name}) "
                                             f"contains invalid character: {char}"
                                         )
 
@@ -314,16 +331,16 @@ class Segment:
                             if len(element) > maxlength:
                                 raise ValidationError(
                                     f"{self.tag} Segment, pos. {index}: "
-                                    f"element {xml_element.get('id')} "
-                                    f"({xml_element.get('name')}) "
+                                    f"element {xml_element.id} "
+                                    f"({xml_element.name}) "
                                     f"exceeds maximum length of {maxlength}: {element}"
                                 )
                         elif length:
                             if len(element) != length:
                                 raise ValidationError(
                                     f"{self.tag} Segment, pos. {index}: "
-                                    f"element {xml_element.get('id')} "
-                                    f"({xml_element.get('name')}) "
+                                    f"element {xml_element.id} "
+                                    f"({xml_element.name}) "
                                     f"should be {length} characters long, but is "
                                     f"{len(element)}: {element}"
                                 )
@@ -334,13 +351,43 @@ class Segment:
                 f"Skipping XML-based validation for segment {self.tag}.",
                 category=MissingImplementationWarning,
             )
-        except ET.ParseError as e:
+        except SyntaxError as e:
+            # ElementTree's ParseError, from a broken segments.xml. Imported only
+            # here, so that validating does not import the XML module.
+            import xml.etree.ElementTree as ET
+
+            if not isinstance(e, ET.ParseError):
+                raise
             warnings.warn(
                 f"Failed to parse segments.xml: {e}. ",
                 category=MissingImplementationWarning,
             )
 
 
+def _get_plugin(tag: str, version: object) -> type[Segment] | None:
+    """Return the first registered Segment plugin for a tag and version, if any.
+
+    The lookup table is rebuilt whenever `Segment.plugins` changed (plugins
+    added, removed or replaced), and replaced as a whole, so concurrent readers
+    always see a complete table.
+    """
+    global _plugin_table
+    table, plugins = _plugin_table
+    # compares the plugin classes by identity, without copying the list
+    if plugins != Segment.plugins:
+        with _plugins_lock:
+            plugins = list(Segment.plugins)
+            table = {}
+            for Plugin in plugins:
+                key = (
+                    getattr(Plugin, "tag", ""),
+                    getattr(Plugin, "version", EDI_DEFAULT_VERSION),
+                )
+                table.setdefault(key, Plugin)
+            _plugin_table = (table, plugins)
+    return table.get((tag, version))
+
+
 class SegmentFactory:
     """Factory for producing segments."""
 
@@ -376,15 +423,10 @@ class SegmentFactory:
             raise EDISyntaxError(
                 f"Tag '{name}': A tag name must only contain alphanumeric characters."
             )
-        # TODO: don't iterate over plugins, use a dict to find plugins faster
-        for Plugin in Segment.plugins:
-            if (
-                getattr(Plugin, "tag", "") == name
-                and getattr(Plugin, "version", EDI_DEFAULT_VERSION) == version
-            ):
-                # use specific Segment subclass for this tag
-                segment = Plugin(*elements)
-                break
+        Plugin = _get_plugin(name, version)
+        if Plugin is not None:
+            # use specific Segment subclass for this tag
+            segment = Plugin(*elements)
         else:
             # we don't support this kind of EDIFACT segment (yet), so
             # just create a generic Segment()
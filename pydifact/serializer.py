@@ -19,8 +19,7 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
-import re
-
+from pydifact.constants import Elements
 from pydifact.control.characters import Characters
 from pydifact.segments import Segment
 
@@ -33,10 +32,16 @@ class Serializer:
         self.characters = characters or Characters()
         self.replace_map = self.characters.escaped_syntax_dic
 
-        # Thanks to "Bor González Usach" for this wonderful piece of code:
-        # https://gist.github.com/bgusach/a967e0587d6e01e889fd1d776c5f3729
-        substrs = sorted(self.replace_map, key=len, reverse=True)
-        self.regexp = re.compile("|".join(map(re.escape, substrs)))
+        # the escaping tables are cached per set of control characters, so creating
+        # many serializers is cheap.
+        self.regexp = self.characters.escape_regexp
+        try:
+            self._translation: dict[int, str] | None = (
+                self.characters.escape_translation
+            )
+        except ValueError:
+            # control characters with more than one character can't be translated
+            self._translation = None
 
     def serialize(
         self,
@@ -73,27 +78,60 @@ class Serializer:
             # skip the UNA segment as we already have written it if requested
             if segment.tag == "UNA":
                 continue
-            collection_parts += [segment.tag]
-            for element in segment.elements:
-                collection_parts += [self.characters.data_separator]
-                if isinstance(element, list):
-                    escaped = [self.escape(subelement) for subelement in element]
-                    while escaped and escaped[-1] == "":
-                        escaped.pop()
-                    collection_parts += [
-                        self.characters.component_separator.join(escaped)
-                    ]
-
-                else:
-                    collection_parts += [self.escape(element)]
-
-            collection_parts += [self.characters.segment_terminator]
-            if break_lines:
-                collection_parts += ["\n"]
+            self._append_segment(segment, collection_parts, break_lines)
 
         collection = "".join(collection_parts)
         return collection
 
+    def serialize_segment(self, segment: Segment, break_lines: bool = False) -> str:
+        """Serialize a single segment, including its segment terminator.
+
+        :param segment: The segment to serialize
+        :param break_lines: if True, insert line break after the segment terminator.
+        """
+        parts: list[str] = []
+        self._append_segment(segment, parts, break_lines)
+        return "".join(parts)
+
+    def serialize_elements(
+        self, tag: str, elements: Elements, break_lines: bool = False
+    ) -> str:
+        """Serialize a segment given as tag and elements, without creating a
+        `Segment` object.
+
+        :param tag: The segment tag
+        :param elements: The elements of the segment
+        :param break_lines: if True, insert line break after the segment terminator.
+        """
+        parts: list[str] = []
+        self._append_elements(tag, elements, parts, break_lines)
+        return "".join(parts)
+
+    def _append_segment(
+        self, segment: Segment, parts: list[str], break_lines: bool
+    ) -> None:
+        """Append the serialized parts of the segment to the `parts` list."""
+        self._append_elements(segment.tag, segment.elements, parts, break_lines)
+
+    def _append_elements(
+        self, tag: str, elements: Elements, parts: list[str], break_lines: bool
+    ) -> None:
+        parts.append(tag)
+        for element in elements:
+            parts.append(self.characters.data_separator)
+            if isinstance(element, list):
+                escaped = [self.escape(subelement) for subelement in element]
+                while escaped and escaped[-1] == "":
+                    escaped.pop()
+                parts.append(self.characters.component_separator.join(escaped))
+
+            else:
+                parts.append(self.escape(element))
+
+        parts.append(self.characters.segment_terminator)
+        if break_lines:
+            parts.append("\n")
+
     def escape(self, string: str | None) -> str:
         """Escapes control characters.
 
@@ -107,4 +145,6 @@ class Serializer:
             type(string),
         )
 
+        if self._translation is not None:
+            return string.translate(self._translation)
         return self.regexp.sub(lambda match: self.replace_map[match.group(0)], string)
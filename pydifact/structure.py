@@ -0,0 +1,199 @@
+# Pydifact - a python edifact library
+#
+# Copyright (c) 2017-2024 Christian González
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Tracking of segment groups within messages.
+
+Message structures are taken from the directory bundles (see `pydifact.bundle`).
+"""
+
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any
+
+from pydifact.bundle import DirectoryBundle, load_directory_bundle
+
+# bundles pinned by `preload()`, which the LRU cache must not evict
+_pinned_bundles: dict[str, DirectoryBundle | None] = {}
+
+
+@lru_cache(maxsize=32)
+def _get_cached_bundle(directory: str) -> DirectoryBundle | None:
+    # bundles hold no open files, so evicted ones are simply garbage collected
+    return load_directory_bundle(directory)
+
+
+def get_directory_bundle(directory: str) -> DirectoryBundle | None:
+    """Return the (shared) bundle of a directory, or None if there is none.
+
+    The 32 most recently used bundles are kept, and those pinned by
+    `pin_directory_bundle()`.
+    """
+    try:
+        return _pinned_bundles[directory]
+    except KeyError:
+        return _get_cached_bundle(directory)
+
+
+def pin_directory_bundle(directory: str) -> DirectoryBundle | None:
+    """Keep the bundle of a directory, with the definitions decoded from it, for
+    the lifetime of the process. Used by `pydifact.preload()`."""
+    try:
+        return _pinned_bundles[directory]
+    except KeyError:
+        bundle = _pinned_bundles[directory] = _get_cached_bundle(directory)
+        return bundle
+
+
+def get_message_manifest(directory: str) -> dict[str, dict]:
+    """Return the manifest of the message types of a directory, e.g. "d24a".
+
+    It maps each message type to its file, version, release, agency and size,
+    see `DirectoryBundle.message_manifest()`, and is empty for unknown
+    directories. Reading it loads no message definitions.
+    """
+    bundle = get_directory_bundle(directory)
+    if bundle is None:
+        return {}
+    return bundle.message_manifest()
+
+
+def get_message_definition(directory: str, message_type: str) -> dict | None:
+    """Return the definition of a message type in a directory, or None if unknown.
+
+    The definition is a dict with the "defaults" (default values by data element
+    id, e.g. "0051") and the "structure" of the message, see
+    `DirectoryBundle.message()`. Only its entry of the bundle is read, the first
+    time it is needed; the decoded definition is kept by the bundle.
+    """
+    bundle = get_directory_bundle(directory)
+    if bundle is None:
+        return None
+    return bundle.message(message_type)
+
+
+def get_message_structure(directory: str, message_type: str) -> list | None:
+    """Return the structure of a message type in a directory, or None if unknown."""
+    message = get_message_definition(directory, message_type)
+    return message["structure"] if message else None
+
+
+def _index_nodes(nodes: list[dict[str, Any]]) -> dict[str, list[int]]:
+    """Map each tag to the positions of the nodes it matches: segments with that
+    tag, and groups starting with it."""
+    positions: dict[str, list[int]] = {}
+    for position, node in enumerate(nodes):
+        tag = node.get("segment") or node["children"][0].get("segment")
+        positions.setdefault(tag, []).append(position)
+    return positions
+
+
+class GroupTracker:
+    """Follows the segments of a message through its structure of segment groups.
+
+    Segments are matched in order, as in the message definition: a segment group is
+    entered (or repeated) when its first segment appears, and left when a segment
+    appears that is only defined after it.
+
+    Args:
+        structure: The message structure, as returned by `get_message_structure()`.
+    """
+
+    # positions indexes of the `max_indexes` most recently used node lists, by id;
+    # the node lists are kept referenced while cached, so their ids stay unique
+    _indexes: "OrderedDict[int, tuple[list, dict[str, list[int]]]]" = OrderedDict()
+    _indexes_lock = threading.Lock()
+    max_indexes = 1024
+
+    def __init__(self, structure: list[dict[str, Any]]) -> None:
+        # stack of [nodes, index of the current node, group id, positions index]
+        self._stack: list[list] = [[structure, 0, None, self._get_index(structure)]]
+        self._started = False
+        self.path: tuple[str, ...] = ()
+        """The ids of the segment groups the last segment is in, outermost first."""
+        # the length of the group path, if the last segment started a new group
+        # (or a repetition of a group), else None
+        self.entered: int | None = None
+
+    @classmethod
+    def _get_index(cls, nodes: list[dict[str, Any]]) -> dict[str, list[int]]:
+        key = id(nodes)
+        with cls._indexes_lock:
+            entry = cls._indexes.get(key)
+            if entry is not None and entry[0] is nodes:
+                cls._indexes.move_to_end(key)
+                return entry[1]
+        positions = _index_nodes(nodes)
+        with cls._indexes_lock:
+            cls._indexes[key] = (nodes, positions)
+            cls._indexes.move_to_end(key)
+            while len(cls._indexes) > cls.max_indexes:
+                cls._indexes.popitem(last=False)
+        return positions
+
+    def feed(self, tag: str) -> tuple[str, ...] | None:
+        """Advance to the next segment of the message.
+
+        Returns:
+            The group path of the segment (empty for segments outside of groups), or
+            None if the segment is not expected here. The state is not changed
+            then.
+        """
+        for depth in range(len(self._stack) - 1, -1, -1):
+            nodes, index, _, positions = self._stack[depth]
+            candidates = positions.get(tag)
+            if not candidates:
+                continue
+            i = bisect_left(candidates, index)
+            if i == len(candidates):
+                continue
+            position = candidates[i]
+            node = nodes[position]
+            # the current segment may only repeat if allowed, while a group
+            # always repeats via its first segment
+            if (
+                position == index
+                and self._started
+                and "segment" in node
+                and node["maxrepeat"] <= 1
+            ):
+                if i + 1 == len(candidates):
+                    continue
+                position = candidates[i + 1]
+                node = nodes[position]
+
+            self._stack[depth][1] = position
+            self._started = True
+            if depth + 1 < len(self._stack):
+                del self._stack[depth + 1 :]
+                self.path = self.path[:depth]
+            if "segment" in node:
+                self.entered = None
+            else:
+                children = node["children"]
+                self._stack.append(
+                    [children, 0, node["group"], self._get_index(children)]
+                )
+                self.path += (node["group"],)
+                self.entered = len(self._stack) - 1
+            return self.path
+        return None
@@ -20,12 +20,25 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 from collections.abc import Iterator
+from functools import lru_cache
 
 from pydifact.control.characters import Characters
 from pydifact.exceptions import EDISyntaxError
 from pydifact.token import Token
 
 
+@lru_cache(maxsize=32)
+def _token_selector(
+    component_separator: str, data_separator: str, segment_terminator: str
+) -> dict[str, Token.Type]:
+    """Build (and cache) the dispatch table of control characters to token types."""
+    return {
+        component_separator: Token.Type.COMPONENT_SEPARATOR,
+        data_separator: Token.Type.DATA_SEPARATOR,
+        segment_terminator: Token.Type.TERMINATOR,
+    }
+
+
 class Tokenizer:
     """Convert EDI messages into tokens for parsing."""
 
@@ -72,11 +85,12 @@ class Tokenizer:
         self._message = iter(message)
         self.read_next_char()
 
-        self.token_selector = {
-            self.characters.component_separator: Token.Type.COMPONENT_SEPARATOR,
-            self.characters.data_separator: Token.Type.DATA_SEPARATOR,
-            self.characters.segment_terminator: Token.Type.TERMINATOR,
-        }
+        # shared between all tokenizers using the same control characters
+        self.token_selector = _token_selector(
+            self.characters.component_separator,
+            self.characters.data_separator,
+            self.characters.segment_terminator,
+        )
 
         while not self.end_of_message():
             yield self.get_next_token()
@@ -14,3 +14,14 @@ def get_syntax_release_version(version: str):
         return version[0:3]
 
     return f"{version}00"
+
+
+def get_message_directory(identifier: list[str] | tuple[str, ...]) -> str | None:
+    """Returns the directory name of a message identifier (S009 of UNH).
+
+    E.g. for ["ORDERS", "D", "96A", "UN"], "d96a" is returned. For messages that
+    don't refer to a (draft) directory, None is returned.
+    """
+    if len(identifier) < 3 or str(identifier[1]).upper() != "D":
+        return None
+    return f"d{identifier[2]}".lower()
@@ -0,0 +1,232 @@
+# Pydifact - a python edifact library
+#
+# Copyright (c) 2017-2024 Christian González
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Validation of whole interchanges, optionally in parallel.
+
+Segments are validated message by message against the directory of each
+message (UNH S009), service segments against the service directory of the
+syntax version. Messages are independent of each other, so batches of messages
+can be validated by an executor::
+
+    # free-threaded Python (3.13t+): threads share the compiled definitions
+    with ThreadPoolExecutor() as executor:
+        report = interchange.validation_report(executor=executor)
+
+    # otherwise: processes, preload() the definitions before forking
+    pydifact.preload(["d96a"])
+    with ProcessPoolExecutor() as executor:
+        report = interchange.validation_report(executor=executor)
+
+The issues of all batches are merged in segment order into one report.
+"""
+
+from collections.abc import Iterable, Iterator
+from typing import TYPE_CHECKING, NamedTuple
+
+from pydifact.exceptions import EDISyntaxError, ValidationError
+from pydifact.parser import SERVICE_SEGMENTS, Parser
+from pydifact.segments import Segment
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+    from pydifact.segmentcollection import Interchange
+
+
+class ValidationIssue(NamedTuple):
+    """A validation error of a segment or message."""
+
+    position: int
+    """The index of the segment within the interchange's segments."""
+
+    tag: str
+    """The tag of the invalid segment."""
+
+    message_reference: str | None
+    """The reference number (UNH 0062) of the message, or None for segments
+    outside of messages."""
+
+    error: str
+    """The error message."""
+
+
+class ValidationReport(NamedTuple):
+    """The result of validating an interchange."""
+
+    issues: list[ValidationIssue]
+    """All issues, in segment order."""
+
+    unavailable_directories: list[str]
+    """Directories referenced by messages that are not available, so these
+    messages were validated against the fallback directory (or only their
+    service segments, without one)."""
+
+    @property
+    def valid(self) -> bool:
+        return not self.issues
+
+
+# a segment with its index within the interchange's segments
+PositionedSegment = tuple[int, Segment]
+
+
+class _Unit(NamedTuple):
+    """A message (or the segments outside of messages) to validate."""
+
+    message_reference: str | None
+    directory: str
+    segments: list[PositionedSegment]
+
+
+def _validate_units(units: list[_Unit], syntax_version: str) -> list[ValidationIssue]:
+    """Validate a batch of messages, in a worker thread or process."""
+    issues = []
+    for reference, directory, segments in units:
+        for position, segment in segments:
+            tag = segment.tag
+            try:
+                segment.validate(
+                    syntax_version, "" if tag in SERVICE_SEGMENTS else directory
+                )
+            except (ValidationError, EDISyntaxError) as e:
+                issues.append(ValidationIssue(position, tag, reference, str(e)))
+        if reference is not None:
+            issues.extend(_check_trailer(reference, segments))
+    return issues
+
+
+def _check_trailer(
+    reference: str, segments: list[PositionedSegment]
+) -> list[ValidationIssue]:
+    """Check the segment count and reference number of the UNT segment."""
+    position, segment = segments[-1]
+    tag, elements = segment.tag, segment.elements
+    if tag != "UNT":
+        return [
+            ValidationIssue(
+                position, tag, reference, "UNH segment was not closed by UNT."
+            )
+        ]
+    issues = []
+    count = elements[0] if elements else ""
+    if count != str(len(segments)):
+        issues.append(
+            ValidationIssue(
+                position,
+                tag,
+                reference,
+                f"UNT segment count is {count}, but the message has "
+                f"{len(segments)} segments.",
+            )
+        )
+    if len(elements) < 2 or elements[1] != reference:
+        issues.append(
+            ValidationIssue(
+                position,
+                tag,
+                reference,
+                f"UNT reference number does not match UNH reference {reference}.",
+            )
+        )
+    return issues
+
+
+def _units(interchange: "Interchange", resolver: Parser) -> Iterator[_Unit]:
+    """Split the interchange into messages and the segments between them.
+
+    The directory of each message is resolved like the parser does, see
+    `Parser.resolve_directory()`.
+    """
+    outside: list[PositionedSegment] = []
+    message: _Unit | None = None
+    for position, segment in enumerate(interchange.segments):
+        if segment.tag == "UNH":
+            if message is not None:
+                yield message
+            identifier = segment[1]
+            message_directory = resolver.resolve_directory(
+                identifier if isinstance(identifier, list) else None
+            )
+            message = _Unit(
+                str(segment[0] or ""), message_directory or "", [(position, segment)]
+            )
+        elif message is not None:
+            message.segments.append((position, segment))
+            if segment.tag == "UNT":
+                yield message
+                message = None
+        else:
+            outside.append((position, segment))
+    if message is not None:
+        yield message
+    if outside:
+        yield _Unit(None, "", outside)
+
+
+def _batches(units: Iterable[_Unit], batch_size: int) -> Iterator[list[_Unit]]:
+    batch: list[_Unit] = []
+    size = 0
+    for unit in units:
+        batch.append(unit)
+        size += len(unit.segments)
+        if size >= batch_size:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+def validate_interchange(
+    interchange: "Interchange",
+    executor: "Executor | None" = None,
+    directory: str | None = None,
+    batch_size: int = 2000,
+    detect_directory: bool = True,
+) -> ValidationReport:
+    """Validate all segments and messages of an interchange.
+
+    Args:
+        interchange: The interchange to validate.
+        executor: An executor (thread or process pool) to validate batches of
+            messages in parallel. By default, everything is validated in the
+            current thread.
+        directory: The directory to validate messages against, e.g. "d24a", if
+            `detect_directory` is off or the directory of a message is not
+            available. By default, only service segments are validated then.
+        batch_size: The minimum number of segments per batch given to the
+            executor.
+        detect_directory: If True, the directory of each message is taken from
+            its UNH, falling back to `directory` like `Parser(detect_directory=True)`.
+    """
+    resolver = Parser(directory=directory or "", detect_directory=detect_directory)
+    syntax_version = str(interchange.syntax_identifier[1])
+    batches = list(_batches(_units(interchange, resolver), batch_size))
+    if executor is None:
+        results: Iterable[list[ValidationIssue]] = [
+            _validate_units(batch, syntax_version) for batch in batches
+        ]
+    else:
+        results = executor.map(
+            _validate_units, batches, [syntax_version] * len(batches)
+        )
+    issues = [issue for result in results for issue in result]
+    issues.sort(key=lambda issue: issue.position)
+    return ValidationReport(issues, resolver.unavailable_directories)
@@ -0,0 +1,103 @@
+# Pydifact - a python edifact library
+#
+# Copyright (c) 2017-2024 Christian González
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Decoding of numeric and date/time element values.
+
+Decoded values are cached, as the same amounts, quantities and dates tend to repeat
+a lot within an interchange.
+"""
+
+import datetime
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+from pydifact.constants import Element
+
+# DTM date/time/period format codes (data element 2379) and their strptime formats
+DATE_FORMATS = {
+    "101": "%y%m%d",
+    "102": "%Y%m%d",
+    "201": "%y%m%d%H%M",
+    "203": "%Y%m%d%H%M",
+    "204": "%Y%m%d%H%M%S",
+}
+# format codes that only contain a date, and are decoded as `datetime.date`
+DATE_ONLY_FORMATS = ("101", "102")
+
+
+def get_component(element: Element | None, component: int | None) -> str | None:
+    """Return a component of a composite element, or a simple element itself.
+
+    Args:
+        element: A simple (str) or composite (list) element.
+        component: The index of the component, or None for simple elements. For
+            simple elements, 0 is accepted as well, as trailing components may have
+            been omitted.
+    """
+    if element is None:
+        return None
+    if isinstance(element, str):
+        return element if not component else None
+    if component is None:
+        raise ValueError(f"Element is a composite, a component is required: {element}")
+    return element[component] if component < len(element) else None
+
+
+@lru_cache(maxsize=4096)
+def decode_number(value: str, decimal_point: str = ",") -> Decimal:
+    """Decode a numeric value, using the given decimal mark.
+
+    A full stop is accepted as decimal mark too: EDIFACT forbids triad separators,
+    so it can't be mistaken for one.
+
+    Raises:
+        ValueError: If the value is not a valid number.
+    """
+    if decimal_point != ".":
+        value = value.replace(decimal_point, ".")
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"Invalid number: {value}") from None
+    if not number.is_finite():
+        raise ValueError(f"Invalid number: {value}")
+    return number
+
+
+@lru_cache(maxsize=4096)
+def decode_date(value: str, format_code: str = "102") -> datetime.date:
+    """Decode a date/time value, according to its DTM format code (data element 2379).
+
+    Supported format codes are 101 and 102 (returning a `datetime.date`), and 201, 203
+    and 204 (returning a `datetime.datetime`).
+
+    Raises:
+        ValueError: If the value does not match the format, or the format code is
+            not supported.
+    """
+    try:
+        date_format = DATE_FORMATS[format_code]
+    except KeyError:
+        raise ValueError(f"Unsupported date/time format code: {format_code}") from None
+    date = datetime.datetime.strptime(value, date_format)
+    if format_code in DATE_ONLY_FORMATS:
+        return date.date()
+    return date
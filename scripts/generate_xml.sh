@@ -8,6 +8,4 @@ $gen service 2
 $gen service 3
 $gen service 4
 
-$gen d24a
-$gen d23a
-$gen d21a
+$gen d24a d23a d21a
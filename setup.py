@@ -0,0 +1,31 @@
+"""Packaging hook: build the directory bundles into the wheel.
+
+All metadata is in pyproject.toml. The XML files of the directories are part of
+the sdist (see MANIFEST.in), and `build_py` compiles them into one bundle per
+directory (see `pydifact.bundle`), which is shipped instead.
+"""
+
+import sys
+from pathlib import Path
+
+from setuptools import setup
+from setuptools.command.build_py import build_py
+
+ROOT = Path(__file__).resolve().parent
+
+
+class BuildPyWithBundles(build_py):
+    def run(self) -> None:
+        super().run()
+        if self.editable_mode:
+            return
+        sys.path.insert(0, str(ROOT))
+        from pydifact.bundle import BUNDLE_FILENAME, build_bundle, get_data_dirs
+
+        for data_dir in get_data_dirs():
+            target = Path(self.build_lib) / data_dir.relative_to(ROOT)
+            target.mkdir(parents=True, exist_ok=True)
+            build_bundle(data_dir, target / BUNDLE_FILENAME)
+
+
+setup(cmdclass={"build_py": BuildPyWithBundles})
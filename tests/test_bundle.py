@@ -0,0 +1,172 @@
+#    pydifact - a python edifact library
+#    Copyright (C) 2017-2024  Christian González
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import shutil
+import stat
+
+import pytest
+
+from pydifact.bundle import (
+    BUNDLE_FILENAME,
+    SEGMENTS,
+    DirectoryBundle,
+    build_bundle,
+    build_bundle_sections,
+    get_data_dir,
+    get_data_dirs,
+    load_bundle,
+    write_bundle,
+)
+
+
+@pytest.fixture
+def bundle():
+    with DirectoryBundle.for_directory("d24a") as bundle:
+        yield bundle
+
+
+def test_bundle_is_lazy(bundle):
+    assert "ADR" in bundle.ids(SEGMENTS)
+    assert bundle._loaded == {}
+    bundle.segment("ADR")
+    assert list(bundle._loaded) == [(SEGMENTS, "ADR")]
+
+
+def test_segment_references(bundle):
+    segment = bundle.segment("ADR")
+    assert segment["name"] == "Address"
+    assert segment["elements"][0] == {
+        "kind": "composite",
+        "id": "C817",
+        "required": False,
+        "repeat": 1,
+    }
+    assert bundle.segment("XXX") is None
+
+
+def test_resolve_segment(bundle):
+    elements = bundle.resolve_segment("ADR")["elements"]
+    address_details = elements[1]
+    assert address_details["id"] == "C090"
+    assert address_details["name"] == "AddressDetails"
+    assert address_details["components"][0]["name"] == "AddressFormatCode"
+    assert address_details["components"][0]["required"] is True
+    assert address_details["components"][2]["required"] is False
+    assert elements[2]["name"] == "CityName"
+    assert elements[2]["maxlength"] == "35"
+
+
+def test_codes_and_messages(bundle):
+    assert bundle.codes("1001")["9"][0] == "Price/sales catalogue"
+    assert bundle.codes("0000") == {}
+    orders = bundle.message("orders")
+    assert orders["defaults"]["0065"] == "ORDERS"
+    assert orders["structure"][0] == {
+        "segment": "UNH",
+        "maxrepeat": 1,
+        "required": True,
+    }
+    group = next(node for node in orders["structure"] if "group" in node)
+    assert group["group"] == "SG1"
+    assert group["children"][0]["segment"] == "RFF"
+
+
+def test_service_bundle():
+    with DirectoryBundle.for_directory("service/v402") as bundle:
+        assert bundle.segment("UNB")["elements"][0]["id"] == "S001"
+        assert "UNOC" in bundle.codes("0001")
+
+
+def test_bundle_matches_sources():
+    sections = build_bundle_sections(get_data_dir("d24a"))
+    with DirectoryBundle.for_directory("d24a") as bundle:
+        for section, definitions in sections.items():
+            assert bundle.ids(section) == list(definitions)
+        assert bundle.segment("BGM") == sections[SEGMENTS]["BGM"]
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    data_dir = tmp_path / "data"
+    shutil.copytree(get_data_dir("service/v100"), data_dir)
+    (data_dir / BUNDLE_FILENAME).unlink(missing_ok=True)
+    return data_dir
+
+
+def test_load_bundle_builds_missing_bundle_in_memory(data_dir):
+    bundle = load_bundle(data_dir)
+    assert bundle.segment("UNB") is not None
+    assert not (data_dir / BUNDLE_FILENAME).exists()
+    assert load_bundle(data_dir).fingerprint == bundle.fingerprint
+
+
+def test_load_bundle_reads_built_bundle(data_dir):
+    build_bundle(data_dir)
+    bundle = load_bundle(data_dir)
+    assert bundle._data is None
+    assert bundle.segment("UNB") is not None
+
+
+def test_load_bundle_rebuilds_stale_bundle(data_dir):
+    path = build_bundle(data_dir)
+    data = path.read_bytes()
+    segments = data_dir / "simple_segments.xml"
+    segments.write_text(
+        segments.read_text(encoding="utf-8").replace(
+            'name="InterchangeHeader"', 'name="Changed"'
+        ),
+        encoding="utf-8",
+    )
+    assert load_bundle(data_dir).segment("UNB")["name"] == "Changed"
+    assert path.read_bytes() == data
+
+
+def test_load_bundle_without_sources(data_dir, tmp_path):
+    shipped = tmp_path / "shipped"
+    shipped.mkdir()
+    build_bundle(data_dir, shipped / BUNDLE_FILENAME)
+    assert load_bundle(shipped).segment("UNB") is not None
+    assert load_bundle(tmp_path) is None
+
+
+def test_bundle_rereads_replaced_file(tmp_path):
+    path = tmp_path / "test.bundle"
+    write_bundle(path, {SEGMENTS: {"FOO": {"name": "Foo", "elements": []}}})
+    bundle = DirectoryBundle(path)
+    write_bundle(path, {SEGMENTS: {"BAR": {"name": "Bar", "elements": []}}})
+    assert bundle.segment("BAR") == {"name": "Bar", "elements": []}
+    assert bundle.segment("FOO") is None
+
+
+def test_invalid_bundle(tmp_path):
+    path = tmp_path / "invalid.bundle"
+    path.write_bytes(b"NOBUNDLE" + bytes(8))
+    with pytest.raises(ValueError):
+        DirectoryBundle(path)
+
+
+def test_write_bundle(tmp_path):
+    path = tmp_path / "test.bundle"
+    write_bundle(path, {SEGMENTS: {"FOO": {"name": "Föö", "elements": []}}})
+    assert stat.S_IMODE(path.stat().st_mode) == 0o644
+    with DirectoryBundle(path) as bundle:
+        assert bundle.segment("FOO") == {"name": "Föö", "elements": []}
+        assert bundle.message("ORDERS") is None
+
+
+def test_data_dirs():
+    data_dirs = get_data_dirs()
+    assert get_data_dir("d24a") in data_dirs
+    assert get_data_dir("service/v402") in data_dirs
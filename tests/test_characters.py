@@ -61,3 +61,17 @@ def test_wrong_cc_assigning():
 
     with pytest.raises(AttributeError):
         Characters().with_control_character("notexisting", ":")
+
+
+def test_not_hashable():
+    # Characters are mutable, so they must not be used as dict keys
+    with pytest.raises(TypeError):
+        hash(Characters())
+
+
+def test_escape_tables_are_shared():
+    assert Characters().escape_translation is Characters().escape_translation
+    assert Characters().escape_regexp is Characters().escape_regexp
+    other = Characters().with_control_character("segment_terminator", '"')
+    assert other.escape_translation is not Characters().escape_translation
+    assert "a'b\"c".translate(other.escape_translation) == "a'b?\"c"
@@ -0,0 +1,123 @@
+#    pydifact - a python edifact library
+#    Copyright (C) 2017-2024  Christian González
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import pytest
+
+from pydifact.columnar import SegmentTable
+from pydifact.parser import Parser
+from pydifact.segmentcollection import Interchange
+from pydifact.structure import GroupTracker, get_message_structure
+
+EDI = (
+    "UNA:+.? '"
+    "UNB+UNOC:3+1234+3333+200102:2212+42'"
+    "UNH+1+ORDERS:D:24A:UN'"
+    "BGM+220+A1'"
+    "DTM+137:20240131:102'"
+    "NAD+BY+5412345000013::9'"
+    "RFF+VA:123'"
+    "LIN+1++4000862141404:SRS'"
+    "QTY+21:48'"
+    "LIN+2++4000862141405:SRS'"
+    "QTY+21:12'"
+    "UNS+S'"
+    "UNT+11+1'"
+    "UNH+2+ORDERS:D:24A:UN'"
+    "BGM+220+A2'"
+    "UNT+3+2'"
+    "UNZ+2+42'"
+)
+
+
+@pytest.fixture
+def table():
+    return Interchange.from_str(EDI).to_table()
+
+
+def test_fixed_columns(table):
+    columns = table.to_dict()
+    assert columns["tag"][:4] == ["UNH", "BGM", "DTM", "NAD"]
+    assert columns["index"] == list(range(len(table)))
+    assert columns["message_index"] == [0] * 11 + [1] * 3
+    assert columns["message_position"][:11] == list(range(1, 12))
+    assert columns["message_position"][11:] == [1, 2, 3]
+
+
+def test_group_path(table):
+    paths = dict(zip(table.to_dict()["index"], table.to_dict()["group_path"]))
+    assert paths[0] == ""  # UNH
+    assert paths[3] == "SG2"  # NAD
+    assert paths[4] == "SG2/SG3"  # RFF
+    assert paths[5] == "SG29"  # LIN
+    assert paths[8] == "SG29"  # QTY
+    assert paths[9] == ""  # UNS
+
+
+def test_element_columns(table):
+    columns = table.to_dict()
+    assert list(columns)[5:9] == ["e0_0", "e0_1", "e0_2", "e1_0"]
+    assert columns["e0_0"][3] == "BY"
+    assert columns["e1_0"][3] == "5412345000013"
+    assert columns["e1_2"][3] == "9"
+    assert columns["e1_2"][4] is None
+    assert all(len(column) == len(table) for column in columns.values())
+
+
+def test_build_while_parsing():
+    table = SegmentTable.from_segments(Parser().parse(EDI))
+    # the parser yields the envelope too
+    assert table.to_dict()["tag"][:3] == ["UNA", "UNB", "UNH"]
+    assert table.to_dict()["message_index"][:3] == [None, None, 0]
+
+
+def test_unknown_directory():
+    edi = "UNB+UNOC:3+1234+3333+200102:2212+42'UNH+1+ORDERS:D:96A:UN'UNT+2+1'"
+    table = SegmentTable.from_segments(Parser().parse(edi))
+    assert table.to_dict()["group_path"] == [None, None, None]
+    table = SegmentTable.from_segments(Parser().parse(edi), directory="d24a")
+    assert table.to_dict()["group_path"] == [None, "", ""]
+
+
+def test_group_tracker_rejects_unexpected_segment():
+    tracker = GroupTracker(get_message_structure("d24a", "ORDERS"))
+    assert tracker.feed("UNH") == ()
+    assert tracker.feed("XYZ") is None
+    assert tracker.feed("BGM") == ()
+
+
+def test_numpy_export(table):
+    np = pytest.importorskip("numpy")
+    arrays = table.to_numpy()
+    assert arrays["message_index"].dtype == np.int64
+    assert arrays["tag"][0] == "UNH"
+
+
+def test_arrow_export(table):
+    pytest.importorskip("pyarrow")
+    arrow_table = table.to_arrow()
+    assert arrow_table.num_rows == len(table)
+    assert arrow_table.column("tag")[0].as_py() == "UNH"
+
+
+def test_group_tracker_indexes_are_bounded(monkeypatch):
+    monkeypatch.setattr(GroupTracker, "max_indexes", 2)
+    monkeypatch.setattr(GroupTracker, "_indexes", type(GroupTracker._indexes)())
+    structures = [[{"segment": "UNH", "maxrepeat": 1}] for _ in range(3)]
+    for structure in structures:
+        assert GroupTracker(structure).feed("UNH") == ()
+    assert len(GroupTracker._indexes) == 2
+    assert all(
+        entry[0] is not structures[0] for entry in GroupTracker._indexes.values()
+    )
@@ -0,0 +1,230 @@
+#    pydifact - a python edifact library
+#    Copyright (C) 2017-2024  Christian González
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import io
+import json
+from decimal import Decimal
+
+import pytest
+
+from pydifact.control import Characters
+from pydifact.convert import DictConverter, EdifactBuilder
+from pydifact.exceptions import ValidationError
+from pydifact.parser import Parser
+from pydifact.segments import Segment
+
+EDI = (
+    "UNA:+.? '"
+    "UNB+UNOC:3+1234+3333+200102:2212+42'"
+    "UNH+1+ORDERS:D:24A:UN'"
+    "BGM+220+A1'"
+    "NAD+BY+5412345000013::9'"
+    "RFF+VA:123'"
+    "LIN+1++4000862141404:SRS'"
+    "QTY+21:48'"
+    "LIN+2++4000862141405:SRS'"
+    "UNS+S'"
+    "UNT+9+1'"
+    "UNH+2+ORDERS:D:24A:UN'"
+    "BGM+220+A2'"
+    "UNT+3+2'"
+    "UNZ+2+42'"
+)
+
+
+def test_segment_to_dict_by_name():
+    converter = DictConverter()
+    segment = Segment("DTM", ["137", "20240131", "102"])
+    assert converter.segment_to_dict(segment, "d24a") == {
+        "tag": "DTM",
+        "DateOrTimeOrPeriod": {
+            "DateOrTimeOrPeriodFunctionCodeQualifier": "137",
+            "DateOrTimeOrPeriodText": "20240131",
+            "DateOrTimeOrPeriodFormatCode": "102",
+        },
+    }
+
+
+def test_segment_to_dict_by_id():
+    converter = DictConverter(keys="id")
+    segment = Segment("BGM", "220", "A1")
+    assert converter.segment_to_dict(segment, "d24a") == {
+        "tag": "BGM",
+        "C002": {"1001": "220"},
+        "C106": {"1004": "A1"},
+    }
+
+
+def test_repeated_and_undefined_elements():
+    converter = DictConverter(keys="id")
+    segment = Segment("ADR", ["1"], ["2", "line 1", "", "line 3"])
+    assert converter.segment_to_dict(segment, "d24a")["C090"] == {
+        "3477": "2",
+        "3286": ["line 1", "line 3"],
+    }
+    assert converter.segment_to_dict(Segment("XYZ", "a", "b"), "d24a") == {
+        "tag": "XYZ",
+        "0": "a",
+        "1": "b",
+    }
+
+
+def test_invalid_keys():
+    with pytest.raises(ValueError):
+        DictConverter(keys="position")
+
+
+def test_message_groups():
+    messages = list(DictConverter(keys="id").iter_messages(Parser().parse(EDI)))
+    assert len(messages) == 2
+    message = messages[0]
+    assert message["type"] == "ORDERS"
+    assert message["directory"] == "d24a"
+    segments = message["segments"]
+    assert [s.get("tag") or s["group"] for s in segments] == [
+        "UNH",
+        "BGM",
+        "SG2",
+        "SG29",
+        "SG29",
+        "UNS",
+        "UNT",
+    ]
+    nad_group = segments[2]["segments"]
+    assert nad_group[0]["tag"] == "NAD"
+    assert nad_group[1] == {
+        "group": "SG3",
+        "segments": [{"tag": "RFF", "C506": {"1153": "VA", "1154": "123"}}],
+    }
+    assert [s["tag"] for s in segments[3]["segments"]] == ["LIN", "QTY"]
+
+
+def test_write_json():
+    stream = io.StringIO()
+    converter = DictConverter()
+    assert converter.write_json(Parser().parse(EDI), stream) == 2
+    result = json.loads(stream.getvalue())
+    assert result == converter.to_dict(Parser().parse(EDI))
+    assert result["header"]["InterchangeControlReference"] == "42"
+    assert result["trailer"]["InterchangeControlCount"] == "2"
+    assert result["messages"][1]["reference_number"] == "2"
+
+
+def test_write_json_without_envelope():
+    stream = io.StringIO()
+    assert DictConverter().write_json([], stream) == 0
+    assert json.loads(stream.getvalue()) == {
+        "header": None,
+        "messages": [],
+        "trailer": None,
+    }
+
+
+def test_builder_to_elements():
+    builder = EdifactBuilder()
+    assert builder.to_elements(
+        {
+            "tag": "MOA",
+            "MonetaryAmount": {
+                "MonetaryAmountTypeCodeQualifier": "203",
+                "MonetaryAmount": Decimal("1234.5"),
+            },
+        }
+    ) == ("MOA", [["203", "1234,5"]])
+    assert EdifactBuilder(keys="id").to_elements(
+        {"tag": "ADR", "C090": {"3477": "2", "3286": ["line 1", "line 2"]}}
+    ) == ("ADR", ["", ["2", "line 1", "line 2"]])
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"tag": "XYZ"},
+        {"tag": "BGM", "Foo": "bar"},
+        # too long
+        {"tag": "BGM", "DocumentOrMessageName": {"DocumentNameCode": "2200"}},
+        # not numeric
+        {
+            "tag": "UNT",
+            "NumberOfSegmentsInAMessage": "x",
+            "MessageReferenceNumber": "1",
+        },
+        # required component missing
+        {"tag": "QTY", "QuantityDetails": {"Quantity": "1"}},
+        # too many repetitions
+        {
+            "tag": "ADR",
+            "AddressDetails": {
+                "AddressFormatCode": "1",
+                "AddressComponentDescription": ["a"] * 6,
+            },
+        },
+    ],
+)
+def test_builder_validation(data):
+    with pytest.raises(ValidationError):
+        EdifactBuilder().to_elements(data)
+
+
+def test_builder_without_validation():
+    builder = EdifactBuilder(validate=False)
+    assert (
+        builder.serialize_segment(
+            {"tag": "BGM", "DocumentOrMessageName": {"DocumentNameCode": "2200"}}
+        )
+        == "BGM+2200'"
+    )
+
+
+def test_builder_escapes():
+    assert (
+        EdifactBuilder().serialize_segment(
+            {
+                "tag": "FTX",
+                "TextSubjectCodeQualifier": "AAI",
+                "TextLiteral": {"FreeText": "a+b:c'd"},
+            }
+        )
+        == "FTX+AAI+++a?+b?:c?'d'"
+    )
+
+
+def test_roundtrip():
+    messages = list(DictConverter().iter_messages(Parser().parse(EDI)))
+    stream = io.StringIO()
+    # the interchange uses syntax version 3, and thus its service segment names
+    builder = EdifactBuilder(
+        characters=Characters.from_str("UNA:+.? '"), syntax_version="3"
+    )
+    for message in messages:
+        builder.write_message(message, stream)
+    expected = EDI[EDI.index("UNH") : EDI.index("UNZ")]
+    assert stream.getvalue() == expected
+
+
+def test_write_message_adds_envelope():
+    stream = io.StringIO()
+    count = EdifactBuilder().write_message(
+        {
+            "reference_number": "7",
+            "type": "ORDERS",
+            "segments": [
+                {"tag": "BGM", "DocumentOrMessageName": {"DocumentNameCode": "220"}}
+            ],
+        },
+        stream,
+    )
+    assert count == 3
+    assert stream.getvalue() == "UNH+7+ORDERS:D:24A:UN'BGM+220'UNT+3+7'"
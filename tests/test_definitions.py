@@ -0,0 +1,256 @@
+#    pydifact - a python edifact library
+#    Copyright (C) 2017-2024  Christian González
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import multiprocessing
+
+import pytest
+
+import pydifact
+import pydifact.definitions
+import pydifact.structure
+from pydifact.bundle import MESSAGES
+from pydifact.definitions import (
+    DefinitionsCache,
+    LRUDefinitionsCache,
+    SegmentDefinition,
+    get_definitions_cache,
+    load_segment_definitions,
+    preload,
+    set_definitions_cache,
+)
+from pydifact.segmentcollection import Interchange
+from pydifact.segments import Segment
+from pydifact.structure import (
+    get_directory_bundle,
+    get_message_definition,
+    get_message_manifest,
+    get_message_structure,
+)
+
+
+@pytest.fixture
+def cache():
+    previous = get_definitions_cache()
+    cache = LRUDefinitionsCache()
+    set_definitions_cache(cache)
+    yield cache
+    set_definitions_cache(previous)
+
+
+def test_compiled_definitions():
+    definitions = load_segment_definitions("d24a")
+    adr = definitions["ADR"]
+    assert isinstance(adr, SegmentDefinition)
+    assert adr.name == "Address"
+    address_details = adr.elements[1]
+    assert address_details.kind == "composite_data_element"
+    assert address_details.id == "C090"
+    assert address_details.components[0].name == "AddressFormatCode"
+    assert address_details.components[0].required
+    assert adr.elements[2].maxlength == 35
+
+
+def test_definitions_are_immutable():
+    definitions = load_segment_definitions("d24a")
+    with pytest.raises(TypeError):
+        definitions["XXX"] = definitions["ADR"]
+    with pytest.raises(AttributeError):
+        definitions["ADR"].name = "foo"
+
+
+def test_service_definitions():
+    assert "UNB" in load_segment_definitions("service/v402")
+
+
+def test_missing_directory():
+    with pytest.raises(FileNotFoundError):
+        load_segment_definitions("d00x")
+
+
+def test_preload(cache):
+    pydifact.preload(directories=["d24a", "d21a"], syntax_versions=["3", "4"])
+    assert cache.stats().entries == 4
+    Segment("BGM", "220", "123").validate("4", "d24a")
+    assert cache.stats().misses == 4
+
+
+def test_preload_pins_definitions(cache):
+    cache.max_entries = 3
+    preload(directories=["d24a"], syntax_versions=["4"])
+    for directory in ("d21a", "d23a", "service/v300", "d21a"):
+        load_segment_definitions(directory)
+    assert cache.get("d24a") is not None
+    assert cache.get("service/v402") is not None
+    # the other directories share the one remaining entry
+    assert cache.get("d21a") is not None
+    assert cache.stats().evictions == 3
+    # invalidating unpins
+    cache.invalidate("d24a")
+    assert cache.stats().entries == 2
+
+
+def test_preload_exceeding_capacity(cache):
+    cache.max_entries = 2
+    with pytest.raises(ValueError, match="max_entries=2"):
+        preload(directories=["d24a", "d21a"], syntax_versions=["4"])
+    cache.invalidate()
+    cache.max_entries = None
+    preload(directories=["d24a"], syntax_versions=["4"])
+    cache.max_size = cache.stats().size
+    with pytest.raises(ValueError, match="max_size"):
+        preload(directories=["d21a"], syntax_versions=["4"])
+
+
+def _child_cache_misses(queue):
+    Segment("BGM", "220", "123").validate("4", "d24a")
+    queue.put(get_definitions_cache().stats().misses)
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="needs the fork start method",
+)
+def test_preload_before_fork(cache):
+    preload()
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=_child_cache_misses, args=(queue,))
+    process.start()
+    misses = queue.get(timeout=30)
+    process.join()
+    # the child found the definitions loaded by its parent
+    assert misses == 2
+
+
+def test_cache_stats(cache):
+    definitions = load_segment_definitions("d24a")
+    assert load_segment_definitions("d24a") is definitions
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+    assert stats.size > 0
+    assert stats.load_time > 0
+
+
+def test_cache_invalidation(cache):
+    definitions = load_segment_definitions("d24a")
+    load_segment_definitions("d21a")
+    cache.invalidate("d24a")
+    assert cache.stats().entries == 1
+    assert load_segment_definitions("d24a") is not definitions
+    cache.invalidate()
+    assert cache.stats().entries == 0
+    assert cache.stats().size == 0
+
+
+def test_cache_max_entries(cache):
+    cache.max_entries = 2
+    load_segment_definitions("d21a")
+    load_segment_definitions("d23a")
+    load_segment_definitions("d21a")
+    load_segment_definitions("d24a")
+    # d23a was least recently used
+    assert cache.get("d23a") is None
+    assert cache.get("d21a") is not None
+    assert cache.stats().evictions == 1
+
+
+def test_cache_max_size(cache):
+    load_segment_definitions("d24a")
+    size = cache.stats().size
+    cache.max_size = size
+    load_segment_definitions("service/v402")
+    assert cache.get("d24a") is None
+    # a single directory is kept, even if bigger than max_size
+    cache.max_size = 1
+    load_segment_definitions("d21a")
+    assert cache.stats().entries == 1
+
+
+def test_custom_cache():
+    class NoCache(DefinitionsCache):
+        loads = 0
+
+        def get(self, directory):
+            return None
+
+        def put(self, directory, definitions, load_time):
+            self.loads += 1
+
+    previous = get_definitions_cache()
+    set_definitions_cache(no_cache := NoCache())
+    try:
+        load_segment_definitions("d24a")
+        load_segment_definitions("d24a")
+    finally:
+        set_definitions_cache(previous)
+    assert no_cache.loads == 2
+
+
+def test_get_message_definition():
+    orders = get_message_definition("d24a", "orders")
+    assert orders is get_directory_bundle("d24a").message("ORDERS")
+    assert orders["defaults"]["0051"] == "UN"
+    assert orders["structure"][0] == {
+        "segment": "UNH",
+        "maxrepeat": 1,
+        "required": True,
+    }
+    assert get_message_structure("d24a", "ORDERS") is orders["structure"]
+    assert get_message_definition("d24a", "XXXXXX") is None
+    assert get_message_definition("d99z", "ORDERS") is None
+
+
+def test_message_manifest():
+    bundle = get_directory_bundle("d24a")
+    bundle._loaded.pop((MESSAGES, "INVOIC"), None)
+    manifest = get_message_manifest("d24a")
+    assert len(manifest) > 200
+    invoic = manifest["INVOIC"]
+    assert (invoic["version"], invoic["release"], invoic["agency"]) == (
+        "D",
+        "24A",
+        "UN",
+    )
+    assert invoic["file"] == "invoic.xml"
+    assert invoic["size"] > 0
+    # the manifest decodes no message definitions
+    assert (MESSAGES, "INVOIC") not in bundle._loaded
+    assert get_message_manifest("d99z") == {}
+
+
+def test_message_definition_from_header():
+    interchange = Interchange.from_str(
+        "UNA:+.? '"
+        "UNB+UNOC:4+SENDER+RECIPIENT+240101:1200+1'"
+        "UNH+1+ORDERS:D:24A:UN'"
+        "BGM+220+123'"
+        "UNT+3+1'"
+        "UNH+2+ORDERS:D:99Z:UN'"
+        "UNT+2+2'"
+        "UNZ+2+1'"
+    )
+    known, unknown = interchange.get_messages()
+    assert known.definition["defaults"]["0065"] == "ORDERS"
+    assert unknown.definition is None
+
+
+def test_preload_message_types(cache):
+    bundle = get_directory_bundle("d24a")
+    bundle._loaded.pop((MESSAGES, "DESADV"), None)
+    preload(directories=["d24a"], message_types=["DESADV"])
+    assert (MESSAGES, "DESADV") in bundle._loaded
+    # the bundle is pinned, so it outlives the LRU cache of bundles
+    pydifact.structure._get_cached_bundle.cache_clear()
+    assert get_directory_bundle("d24a") is bundle
@@ -0,0 +1,211 @@
+#    pydifact - a python edifact library
+#    Copyright (C) 2017-2024  Christian González
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import io
+from xml.dom import minidom
+from xml.etree import ElementTree
+
+import pytest
+
+from pydifact.generator.base import UntidBaseParser
+from pydifact.generator.edmd import EDMDParser
+from pydifact.generator.uncl import UNCLParser
+from pydifact.generator.xmlwriter import XMLWriter
+
+SEPARATOR = "\xc4" * 70
+
+UNCL = f"""Code list
+{SEPARATOR}
+
+{"     1001  Document name code":<67}[C]
+
+     Desc: Code specifying the name of a document.
+
+     Repr: an..3
+
+     1     Certificate of analysis
+              Certificate providing the values of an analysis.
+
+  +  2     Certificate of conformity
+{SEPARATOR}
+"""
+
+EDMD = """
+                           Message Type : ORDERS
+                           Version: D
+                           Release number: 24A
+                           Contr. Agency: UN
+
+Pos    Tag Name                                      S   R
+
+00010   UNH Message header                           M   1
+00020       \xc4\xc4\xc4\xc4\xc4 Segment group 1  \xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4 C   99\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xbf
+00030   RFF Reference                                M   1                \xb3
+00040   DTM Date/time/period                         C   5\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xc4\xd9
+00050   UNT Message trailer                          M   1
+"""
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    def write(name: str, text: str):
+        path = tmp_path / name
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    return write
+
+
+def test_title2name():
+    assert (
+        UntidBaseParser.title2name("Document name, coded/ O'test-x")
+        == "DocumentNameCodedOrOtestx"
+    )
+
+
+def test_uncl_parser(source_file):
+    parser = UNCLParser(source_file("UNCL.24A", UNCL))
+    codes = parser.msg_xml.find("data_element[@id='1001']")
+    assert [code.attrib for code in codes] == [
+        {
+            "id": "1",
+            "title": "Certificate of analysis",
+            "desc": "Certificate providing the values of an analysis.",
+        },
+        {"id": "2", "title": "Certificate of conformity", "desc": ""},
+    ]
+
+
+def test_edmd_parser(source_file):
+    parser = EDMDParser(source_file("ORDERS_D.24A", EDMD))
+    defaults = {
+        element.get("id"): element.get("value")
+        for element in parser.msg_xml.find("defaults")
+    }
+    assert defaults == {"0065": "ORDERS", "0052": "D", "0054": "24A", "0051": "UN"}
+    assert [child.get("id") for child in parser.msg_xml][1:] == ["UNH", "SG1", "UNT"]
+    group = parser.msg_xml.find("group")
+    assert group.get("maxrepeat") == "99"
+    assert [segment.get("id") for segment in group] == ["RFF", "DTM"]
+
+
+def test_benchmark_release(tmp_path, monkeypatch):
+    # the generator utils need requests for downloading the sources
+    pytest.importorskip("requests")
+    from pydifact.generator import benchmark
+
+    monkeypatch.setattr(benchmark, "extracted_directory", tmp_path)
+    with pytest.raises(FileNotFoundError):
+        benchmark.benchmark_release("d24a")
+
+    source_dir = tmp_path / "d24a"
+    (source_dir / "MESSAGES").mkdir(parents=True)
+    (source_dir / "UNCL.24A").write_text(UNCL, encoding="utf-8")
+    (source_dir / "MESSAGES" / "ORDERS_D.24A").write_text(EDMD, encoding="utf-8")
+    monkeypatch.setattr(benchmark, "benchmark_parser", lambda cls, files, *args: 0.0)
+    assert benchmark.benchmark_release("D24A", repeat=1) == {
+        "UNCL": 0.0,
+        "EDED": 0.0,
+        "EDCD": 0.0,
+        "EDSD": 0.0,
+        "EDMD": 0.0,
+    }
+
+
+def test_xml_writer_matches_minidom():
+    root = ElementTree.Element("data_elements")
+    element = ElementTree.SubElement(root, "data_element", id="1001", name="A&B")
+    ElementTree.SubElement(element, "code", id="1", title='"<quoted>"')
+    ElementTree.SubElement(element, "note").text = "x > y"
+    ElementTree.SubElement(root, "data_element", id="1004")
+
+    stream = io.StringIO()
+    writer = XMLWriter(stream)
+    writer.declaration()
+    writer.element(root)
+    expected = minidom.parseString(ElementTree.tostring(root, encoding="utf-8"))
+    assert (
+        stream.getvalue()
+        == expected.toprettyxml(indent="  ", encoding="utf-8").decode()
+    )
+
+
+def test_xml_writer_streaming():
+    stream = io.StringIO()
+    writer = XMLWriter(stream)
+    writer.start("segments")
+    writer.start("segment", {"id": "ADR"})
+    writer.end()
+    writer.start("segment", {"id": "BGM"})
+    writer.element(ElementTree.Element("data_element", id="1001"))
+    writer.end()
+    writer.end()
+    assert stream.getvalue() == (
+        "<segments>\n"
+        '  <segment id="ADR"/>\n'
+        '  <segment id="BGM">\n'
+        '    <data_element id="1001"/>\n'
+        "  </segment>\n"
+        "</segments>\n"
+    )
+
+
+def test_merge_segments_xml(tmp_path, capsys):
+    pytest.importorskip("requests")
+    from pydifact.generator.runner import load_definitions, merge_segments_xml
+
+    (tmp_path / "data_elements.xml").write_text(
+        """<data_elements>
+  <data_element id="3299" name="AddressPurposeCode" type="an" maxlength="3">
+    <code id="1" title="Postal address" desc=""/>
+  </data_element>
+  <data_element id="3164" name="CityName" type="an" maxlength="35"/>
+</data_elements>"""
+    )
+    (tmp_path / "composite_data_elements.xml").write_text(
+        """<composite_data_elements>
+  <composite_data_element id="C817" name="AddressUsage" desc="Usage">
+    <data_element id="3299" name="AddressPurposeCode" usage="C"/>
+  </composite_data_element>
+</composite_data_elements>"""
+    )
+    (tmp_path / "simple_segments.xml").write_text(
+        """<segments>
+  <segment id="ADR" name="Address">
+    <composite_data_element id="C817" name="AddressUsage" repeat="1"/>
+    <data_element id="3164" name="CityName" required="true"/>
+    <data_element id="9999" name="Unknown"/>
+  </segment>
+</segments>"""
+    )
+
+    data_elements = load_definitions(tmp_path / "data_elements.xml", skip=("code",))
+    assert len(data_elements["3299"]) == 0
+
+    merge_segments_xml(tmp_path)
+    assert "Data element 9999 not found" in capsys.readouterr().out
+    assert not (tmp_path / "simple_segments.xml").exists()
+    assert (tmp_path / "segments.xml").read_text() == (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        "<segments>\n"
+        '  <segment id="ADR" name="Address">\n'
+        '    <composite_data_element id="C817" name="AddressUsage" repeat="1" desc="Usage">\n'
+        '      <data_element id="3299" name="AddressPurposeCode" usage="C" type="an" maxlength="3"/>\n'
+        "    </composite_data_element>\n"
+        '    <data_element id="3164" name="CityName" required="true" type="an" maxlength="35"/>\n'
+        '    <data_element id="9999" name="Unknown"/>\n'
+        "  </segment>\n"
+        "</segments>\n"
+    )
@@ -0,0 +1,77 @@
+#    pydifact - a python edifact library
+#    Copyright (C) 2017-2024  Christian González
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import subprocess
+import sys
+
+import pytest
+
+import pydifact
+
+# Cumulative import time of the pydifact package in microseconds. This is a generous
+# upper bound to catch regressions like heavy module-level imports, not a benchmark.
+IMPORT_BUDGET_US = 100_000
+
+# modules that must not be imported before they are really needed
+HEAVY_MODULES = ("asyncio", "xml.etree.ElementTree", "pydifact.syntax.common")
+
+
+def import_times(statement: str) -> dict[str, int]:
+    """Run a statement in a fresh interpreter and return the cumulative import time
+    of each imported module, in microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        if cumulative.strip().isdigit():
+            times[module.strip()] = int(cumulative)
+    return times
+
+
+def test_import_is_lazy():
+    times = import_times("import pydifact")
+    assert times["pydifact"] < IMPORT_BUDGET_US
+    assert "pydifact.parser" not in times
+    assert "pydifact.segments" not in times
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "from pydifact import Parser",
+        "from pydifact.segmentcollection import Interchange",
+    ],
+)
+def test_no_heavy_imports(statement):
+    times = import_times(statement)
+    for module in HEAVY_MODULES:
+        assert module not in times
+
+
+def test_lazy_attributes():
+    from pydifact.parser import Parser
+
+    assert pydifact.Parser is Parser
+    assert pydifact.serializer.Serializer is pydifact.Serializer
+    assert "Tokenizer" in dir(pydifact)
+    with pytest.raises(AttributeError):
+        pydifact.DoesNotExist
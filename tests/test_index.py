@@ -0,0 +1,125 @@
+#    pydifact - a python edifact library
+#    Copyright (C) 2017-2024  Christian González
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import pytest
+
+from pydifact.exceptions import EDISyntaxError
+from pydifact.index import InterchangeIndex
+from pydifact.segmentcollection import Interchange
+from pydifact.segments import Segment
+
+EDI = (
+    "UNA:+.? '\n"
+    "UNB+UNOC:3+1234+3333+200102:2212+42'\n"
+    "UNH+1+ORDERS:D:96A:UN'\n"
+    "BGM+220+A?'1'\n"
+    "UNT+3+1'\n"
+    "UNH+2+INVOIC:D:96A:UN'\n"
+    "BGM+380+B1'\n"
+    "UNT+3+2'\n"
+    "UNH+3+ORDERS:D:96A:UN'\n"
+    "BGM+220+C1'\n"
+    "UNT+3+3'\n"
+    "UNZ+3+42'\n"
+)
+
+
+@pytest.fixture
+def edi_file(tmp_path):
+    file = tmp_path / "interchange.edi"
+    file.write_bytes(EDI.encode("iso8859-1"))
+    return file
+
+
+def test_build_index(edi_file):
+    index = InterchangeIndex.build(edi_file)
+    data = edi_file.read_bytes()
+    assert index.characters == ":+.? '"
+    assert index.syntax_identifier == "UNOC"
+    assert index.version == "3"
+    assert [data[offset : offset + 3] for offset in index.segments] == [
+        b"UNB",
+        b"UNH",
+        b"BGM",
+        b"UNT",
+        b"UNH",
+        b"BGM",
+        b"UNT",
+        b"UNH",
+        b"BGM",
+        b"UNT",
+        b"UNZ",
+    ]
+    assert [(m.reference, m.type) for m in index.messages] == [
+        ("1", "ORDERS"),
+        ("2", "INVOIC"),
+        ("3", "ORDERS"),
+    ]
+    assert data[index.messages[1].start : index.messages[1].end] == (
+        b"UNH+2+INVOIC:D:96A:UN'\nBGM+380+B1'\nUNT+3+2'"
+    )
+
+
+def test_get_messages(edi_file):
+    index = InterchangeIndex.build(edi_file)
+    messages = list(index.get_messages(edi_file, reference="1"))
+    assert len(messages) == 1
+    assert messages[0].type == "ORDERS"
+    assert messages[0].segments == [Segment("BGM", "220", "A'1")]
+
+    messages = list(index.get_messages(edi_file, message_type="ORDERS"))
+    assert [m.reference_number for m in messages] == ["1", "3"]
+
+
+def test_get_messages_equals_full_parse(edi_file):
+    index = InterchangeIndex.build(edi_file)
+    expected = list(Interchange.from_file(edi_file).get_messages())
+    result = list(index.get_messages(edi_file))
+    assert [m.segments for m in result] == [m.segments for m in expected]
+
+
+def test_save_and_load(edi_file, tmp_path):
+    index = InterchangeIndex.build(edi_file)
+    index.save(tmp_path / "interchange.edi.idx")
+    loaded = InterchangeIndex.load(tmp_path / "interchange.edi.idx")
+    assert loaded.to_dict() == index.to_dict()
+    assert loaded.messages == index.messages
+
+
+def test_empty_file(tmp_path):
+    file = tmp_path / "empty.edi"
+    file.write_bytes(b"")
+    index = InterchangeIndex.build(file)
+    assert index.segments == []
+    assert index.messages == []
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        # UNT without UNH
+        "UNB+UNOC:3+1234+3333+200102:2212+42'UNT+2+1'UNZ+1+42'",
+        # second UNH before UNT
+        "UNB+UNOC:3+1234+3333+200102:2212+42'UNH+1+ORDERS:D:96A:UN'"
+        "UNH+2+ORDERS:D:96A:UN'UNT+2+2'UNZ+2+42'",
+        # UNH without UNT
+        "UNB+UNOC:3+1234+3333+200102:2212+42'UNH+1+ORDERS:D:96A:UN'BGM+220'",
+    ],
+)
+def test_unbalanced_messages(tmp_path, data):
+    file = tmp_path / "unbalanced.edi"
+    file.write_bytes(data.encode("iso8859-1"))
+    with pytest.raises(EDISyntaxError):
+        InterchangeIndex.build(file)
@@ -0,0 +1,77 @@
+#    pydifact - a python edifact library
+#    Copyright (C) 2017-2024  Christian González
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import datetime
+import io
+
+import pytest
+
+from pydifact.segmentcollection import Interchange, InterchangeWriter, Message
+from pydifact.segments import Segment
+
+ENVELOPE = dict(
+    sender="1234",
+    recipient="3333",
+    timestamp=datetime.datetime(2020, 1, 2, 22, 12),
+    control_reference="42",
+    syntax_identifier=("UNOC", 1),
+)
+
+
+def _messages(count: int) -> list[Message]:
+    messages = []
+    for i in range(count):
+        message = Message(str(i), ["ORDERS", "D", "96A", "UN"])
+        message.add_segment(Segment("BGM", "220", f"ORDER{i}", "9"))
+        message.add_segment(Segment("FTX", "AAI", "", "", ["Craig's: +1"]))
+        messages.append(message)
+    return messages
+
+
+@pytest.mark.parametrize("with_una_header", [True, False])
+@pytest.mark.parametrize("break_lines", [True, False])
+def test_writer_equals_interchange(with_una_header, break_lines):
+    interchange = Interchange(**ENVELOPE)
+    interchange.has_una_segment = with_una_header
+    stream = io.StringIO()
+    with InterchangeWriter(
+        stream, with_una_header=with_una_header, break_lines=break_lines, **ENVELOPE
+    ) as writer:
+        for message in _messages(3):
+            interchange.add_message(message)
+            writer.add_message(message)
+
+    assert stream.getvalue() == interchange.serialize(break_lines=break_lines)
+    assert writer.message_count == 3
+
+
+def test_writer_lazy_segments():
+    stream = io.StringIO()
+    with InterchangeWriter(stream, **ENVELOPE) as writer:
+        writer.add_message_segments(
+            "1",
+            ["ORDERS", "D", "96A", "UN"],
+            (Segment("QTY", ["21", str(i)]) for i in range(3)),
+        )
+    assert stream.getvalue().endswith(
+        "UNH+1+ORDERS:D:96A:UN'QTY+21:0'QTY+21:1'QTY+21:2'UNT+5+1'UNZ+1+42'"
+    )
+
+
+def test_writer_closed():
+    writer = InterchangeWriter(io.StringIO(), **ENVELOPE)
+    writer.close()
+    with pytest.raises(ValueError):
+        writer.add_message(_messages(1)[0])
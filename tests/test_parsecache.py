@@ -0,0 +1,179 @@
+#    pydifact - a python edifact library
+#    Copyright (C) 2017-2024  Christian González
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import marshal
+import os
+import sys
+
+import pytest
+
+from pydifact.control import Characters
+from pydifact.parsecache import (
+    DiskParseCache,
+    MemoryParseCache,
+    cache_key,
+    parser_configuration,
+)
+from pydifact.parser import Parser
+from pydifact.segmentcollection import Interchange, RawSegmentCollection
+
+EDI = (
+    "UNA:+.? '"
+    "UNB+UNOC:3+SENDER+RECEIVER+240101:1200+1'"
+    "UNH+1+ORDERS:D:96A:UN'"
+    "BGM+220+PO1?+2+9'"
+    "QTY+21:8'"
+    "UNT+4+1'"
+    "UNZ+1+1'"
+)
+
+
+@pytest.fixture(params=["memory", "disk"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return MemoryParseCache()
+    return DiskParseCache(tmp_path / "cache")
+
+
+def test_cached_parse_equals_parse(cache):
+    expected = Interchange.from_str(EDI)
+    first = Interchange.from_str(EDI, cache=cache)
+    second = Interchange.from_str(EDI, cache=cache)
+    assert first.segments == expected.segments
+    assert second.segments == expected.segments
+    assert second.serialize() == EDI
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+
+
+def test_cached_segments_are_independent(cache):
+    Interchange.from_str(EDI, cache=cache).segments[1].elements[0] = "999"
+    assert Interchange.from_str(EDI, cache=cache).segments[1][0] == "220"
+
+
+def test_cache_restores_parser_state(cache):
+    RawSegmentCollection.from_str(EDI, cache=cache)
+    parser = Parser()
+    RawSegmentCollection.from_str(EDI, parser=parser, cache=cache)
+    assert cache.stats().hits == 1
+    assert (parser.syntax_identifier, parser.version) == ("UNOC", "3")
+
+
+def test_cache_restores_message_directory(cache):
+    # an incomplete interchange leaves the directory of the open message set
+    edi = "UNB+UNOC:3+SENDER+RECEIVER+240101:1200+1'UNH+1+ORDERS:D:24A:UN'"
+    missed, hit = Parser(detect_directory=True), Parser(detect_directory=True)
+    cache.parse(edi, missed)
+    cache.parse(edi, hit)
+    assert cache.stats().hits == 1
+    assert hit.message_directory == missed.message_directory == "d24a"
+
+
+@pytest.mark.parametrize(
+    "corrupt",
+    [
+        lambda data: b"garbage",
+        lambda data: data[: len(data) // 2],
+        lambda data: marshal.dumps((1, 2)),
+    ],
+    ids=["garbage", "truncated", "wrong shape"],
+)
+def test_corrupt_entry_is_parsed_again(cache, corrupt):
+    key = cache_key(EDI, Parser())
+    cache.parse(EDI, Parser())
+    cache.put(key, corrupt(cache.get(key)))
+    parser = Parser()
+    interchange = Interchange.from_str(EDI, parser=parser, cache=cache)
+    assert interchange.serialize() == EDI
+    assert parser.syntax_identifier == "UNOC"
+    stats = cache.stats()
+    assert (stats.hits, stats.misses) == (1, 2)
+    # the entry was overwritten
+    assert Interchange.from_str(EDI, cache=cache).serialize() == EDI
+    assert cache.stats().hits == 2
+
+
+def test_from_file_uses_cache(cache, tmp_path):
+    path = tmp_path / "order.edi"
+    path.write_text(EDI, encoding="iso8859-1")
+    Interchange.from_file(str(path), cache=cache)
+    interchange = Interchange.from_file(str(path), cache=cache)
+    assert interchange.serialize() == EDI
+    assert cache.stats().hits == 1
+
+
+def test_cache_key_depends_on_content_and_parser():
+    key = cache_key(EDI, Parser())
+    assert key == cache_key(EDI, Parser())
+    assert key != cache_key(EDI + "\n", Parser())
+    assert key != cache_key(EDI, Parser(directory="d24a"))
+    assert key == cache_key(EDI, Parser(directory=None))
+    assert key != cache_key(EDI, Parser(detect_directory=True))
+    assert key != cache_key(EDI, Parser(characters=Characters.from_str("UNA:+.? '")))
+    # interning does not change the result
+    assert key == cache_key(EDI, Parser(intern_max_length=8))
+
+
+def test_parser_configuration_includes_python_version():
+    configuration = parser_configuration(Parser())
+    assert f"py{sys.version_info[0]}.{sys.version_info[1]}" in configuration
+    assert f"marshal{marshal.version}" in configuration
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryParseCache(max_entries=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    cache.get("a")
+    cache.put("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.stats().evictions == 1
+
+
+def test_memory_cache_size_limit():
+    cache = MemoryParseCache(max_entries=None, max_size=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.put("c", b"1")
+    assert cache.get("a") is None
+    assert cache.stats().size == 6
+    # too big to be cached at all
+    cache.put("d", b"12345678901")
+    assert cache.get("d") is None
+    assert cache.get("b") == b"12345"
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskParseCache(tmp_path, max_size=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    for key, mtime in (("a", 2_000_000_000), ("b", 1_000_000_000)):
+        path = tmp_path / f"{key}{DiskParseCache.SUFFIX}"
+        os.utime(path, (mtime, mtime))
+    cache.put("c", b"1")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"12345"
+    stats = cache.stats()
+    assert (stats.entries, stats.size, stats.evictions) == (2, 6, 1)
+
+
+def test_disk_cache_shared_between_instances(tmp_path):
+    Interchange.from_str(EDI, cache=DiskParseCache(tmp_path))
+    cache = DiskParseCache(tmp_path)
+    Interchange.from_str(EDI, cache=cache)
+    assert cache.stats().hits == 1
+    cache.clear()
+    assert cache.stats().entries == 0
@@ -13,10 +13,17 @@
 #
 #    You should have received a copy of the GNU Lesser General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import io
+import warnings
+
 import pytest
 
 from pydifact.control.characters import Characters
-from pydifact.exceptions import EDISyntaxError
+from pydifact.exceptions import (
+    EDISyntaxError,
+    MissingImplementationWarning,
+    ValidationError,
+)
 from pydifact.parser import Parser, TokenIterator
 from pydifact.segments import Segment
 from pydifact.token import Token
@@ -348,3 +355,107 @@ UNZ+2+1'
 """
     segments = list(Parser().parse(example_text))
     assert len(segments) == 4
+
+
+def _message(reference: str, release: str, bgm: str) -> str:
+    return f"UNH+{reference}+ORDERS:D:{release}:UN'{bgm}'UNT+3+{reference}'"
+
+
+# BGM has 6 elements in D.24A, so this one is invalid there
+INVALID_BGM = "BGM+220+PO2+9+A+B+C+D+E"
+
+
+def test_detect_directory_validates_each_message_against_its_directory():
+    edi = (
+        "UNB+UNOA:4+SENDER+RECEIVER+240101:1200+1'"
+        + _message("1", "96A", INVALID_BGM)
+        + _message("2", "24A", INVALID_BGM)
+        + "UNZ+2+1'"
+    )
+    # without directory detection, only service segments are validated
+    assert len(list(Parser().parse(edi))) == 8
+
+    parser = Parser(detect_directory=True)
+    segments = parser.parse(edi)
+    with pytest.warns(MissingImplementationWarning, match="d96a"):
+        assert [next(segments).tag for _ in range(4)] == ["UNB", "UNH", "BGM", "UNT"]
+    assert next(segments).tag == "UNH"
+    assert parser.message_directory == "d24a"
+    with pytest.raises(ValidationError, match="Too many elements"):
+        next(segments)
+
+
+def test_detect_directory_warns_once_per_unavailable_directory():
+    edi = (
+        "UNB+UNOA:4+SENDER+RECEIVER+240101:1200+1'"
+        + _message("1", "96A", INVALID_BGM)
+        + _message("2", "24A", "BGM+220+PO2+9")
+        + _message("3", "96A", INVALID_BGM)
+        + "UNZ+3+1'"
+    )
+    parser = Parser(detect_directory=True)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        assert len(list(parser.parse(edi))) == 11
+    assert [str(w.message).split("'")[1] for w in caught] == ["d96a"]
+    assert parser.message_directory == ""
+
+
+def test_detect_directory_falls_back_to_fixed_directory():
+    parser = Parser(directory="d24a", detect_directory=True)
+    edi = "UNB+UNOA:4+SENDER+RECEIVER+240101:1200+1'" + _message(
+        "1", "96A", INVALID_BGM
+    )
+    with pytest.warns(MissingImplementationWarning, match="Falling back to 'd24a'"):
+        with pytest.raises(ValidationError):
+            list(parser.parse(edi))
+
+
+def test_detect_directory_resumes_from_checkpoint():
+    edi = (
+        "UNB+UNOA:4+SENDER+RECEIVER+240101:1200+1'"
+        "UNH+1+ORDERS:D:24A:UN'BGM+220+PO1+9'" + INVALID_BGM + "'UNT+4+1'UNZ+1+1'"
+    ).encode()
+    parser = Parser(detect_directory=True)
+    segments = parser.parse_stream(io.BytesIO(edi))
+    assert [next(segments).tag for _ in range(3)] == ["UNB", "UNH", "BGM"]
+    checkpoint = parser.checkpoint
+
+    resumed = Parser(detect_directory=True)
+    with pytest.raises(ValidationError):
+        list(resumed.parse_stream(io.BytesIO(edi), checkpoint=checkpoint))
+
+
+def test_intern_short_values():
+    edi = "QTY+21:8'QTY+21:8'RFF+PD:5020436373085'RFF+PD:5020436373085'"
+    first, second, third, fourth = Parser(intern_max_length=8).parse(edi)
+    assert first.tag is second.tag
+    assert first[0][0] is second[0][0]
+    assert third[0][0] is fourth[0][0]
+    # longer values are not interned
+    assert third[0][1] == fourth[0][1]
+    assert third[0][1] is not fourth[0][1]
+
+
+def test_intern_does_not_change_result():
+    edi = (
+        "UNB+UNOA:4+SENDER+RECEIVER+240101:1200+1'"
+        "UNH+1+ORDERS:D:96A:UN'LIN+1++5020436373085:EN'QTY+21:8'UNT+4+1'UNZ+1+1'"
+    )
+    assert list(Parser(intern_max_length=35).parse(edi)) == list(Parser().parse(edi))
+
+
+def test_parse_segment(parser):
+    assert parser.parse_segment("BGM+220+A?'1'") == Segment("BGM", "220", "A'1")
+    assert parser.parse_segment("BGM*220'", Characters.from_str("UNA:*.? '")) == (
+        Segment("BGM", "220")
+    )
+    with pytest.raises(EDISyntaxError):
+        parser.parse_segment("BGM+220'BGM+221'")
+    with pytest.raises(EDISyntaxError):
+        parser.parse_segment("")
+
+
+def test_parse_segments_does_not_look_for_una(parser):
+    segments = list(parser.parse_segments("FTX+AAA+A?'UNA'BGM+220'"))
+    assert segments == [Segment("FTX", "AAA", "A'UNA"), Segment("BGM", "220")]
@@ -0,0 +1,99 @@
+#    pydifact - a python edifact library
+#    Copyright (C) 2017-2024  Christian González
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pydifact.parser import Parser
+from pydifact.segments import Segment
+
+
+async def _chunked(data, size: int):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+def _aparse(parser: Parser, chunks, **kwargs) -> list[Segment]:
+    async def collect():
+        return [segment async for segment in parser.aparse(chunks, **kwargs)]
+
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, 10000])
+def test_aparse_equals_parse(path, size):
+    with open(f"{path}/patient1.edi", encoding="iso8859-1") as f:
+        message = f.read()
+    expected = list(Parser().parse(message))
+    assert _aparse(Parser(), _chunked(message, size)) == expected
+
+
+def test_aparse_bytes(path):
+    with open(f"{path}/wikipedia_en.edi", "rb") as f:
+        data = f.read()
+    expected = list(Parser().parse(data.decode("iso8859-1")))
+    assert _aparse(Parser(), _chunked(data, 5)) == expected
+
+
+def test_aparse_escaped_terminator_across_chunks():
+    message = "UNA:+,? 'ERC+10:Craig?'s+??'FOO+BAR'"
+    expected = [
+        Segment("UNA", ":+,? '"),
+        Segment("ERC", ["10", "Craig's"], "?"),
+        Segment("FOO", "BAR"),
+    ]
+    for size in range(1, len(message) + 1):
+        assert _aparse(Parser(), _chunked(message, size)) == expected
+
+
+def test_aparse_without_una():
+    message = "FOO+BAR'\nBAZ+QUX'"
+    assert _aparse(Parser(), _chunked(message, 3)) == [
+        Segment("FOO", "BAR"),
+        Segment("BAZ", "QUX"),
+    ]
+
+
+def test_aparse_una_after_preamble(path):
+    with open(f"{path}/sage_coala.ped", encoding="iso8859-1") as f:
+        message = f.read()
+    expected = list(Parser().parse(message))
+    assert _aparse(Parser(), _chunked(message, 50)) == expected
+
+
+def test_aparse_stream_reader():
+    async def collect():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"UNA:+,? 'FOO+BAR'BAZ+")
+        reader.feed_data(b"QUX'")
+        reader.feed_eof()
+        return [s async for s in Parser().aparse(reader, chunk_size=4)]
+
+    assert asyncio.run(collect()) == [
+        Segment("UNA", ":+,? '"),
+        Segment("FOO", "BAR"),
+        Segment("BAZ", "QUX"),
+    ]
+
+
+def test_aparse_with_executor(path):
+    with open(f"{path}/patient2.edi", encoding="iso8859-1") as f:
+        message = f.read()
+    expected = list(Parser().parse(message))
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        result = _aparse(Parser(), _chunked(message, 512), executor=executor)
+    assert result == expected
@@ -0,0 +1,97 @@
+#    pydifact - a python edifact library
+#    Copyright (C) 2017-2024  Christian González
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import io
+import json
+
+import pytest
+
+from pydifact.exceptions import EDISyntaxError
+from pydifact.parser import Parser, ParserCheckpoint, segment_boundaries
+from pydifact.segments import Segment
+
+
+@pytest.fixture
+def message(path) -> bytes:
+    with open(f"{path}/wikipedia_en.edi", "rb") as f:
+        return f.read()
+
+
+def test_segment_boundaries():
+    data = "A+1'B+??'C+?''\nD'"
+    assert list(segment_boundaries(data, "'", "?")) == [4, 9, 14, 17]
+    assert list(segment_boundaries(data.encode(), b"'", b"?")) == [4, 9, 14, 17]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 16, 65536])
+def test_parse_stream_equals_parse(message, chunk_size):
+    expected = list(Parser().parse(message.decode("iso8859-1")))
+    result = list(Parser().parse_stream(io.BytesIO(message), chunk_size=chunk_size))
+    assert result == expected
+
+
+def test_parse_stream_checkpoint_offsets(message):
+    parser = Parser()
+    for segment in parser.parse_stream(io.BytesIO(message)):
+        if segment.tag == "UNA":
+            continue
+        # the checkpoint always points right after the segment terminator
+        assert message[parser.checkpoint.offset - 1 : parser.checkpoint.offset] == b"'"
+    assert parser.checkpoint.offset == len(message.rstrip())
+
+
+def test_parse_stream_message_context(message):
+    parser = Parser()
+    for segment in parser.parse_stream(io.BytesIO(message)):
+        if segment.tag == "MSG":
+            break
+    checkpoint = parser.checkpoint
+    assert checkpoint.version == "1"
+    assert checkpoint.syntax_identifier == "IATB"
+    assert checkpoint.message_reference == "1"
+    assert checkpoint.message_identifier == ["PAORES", "93", "1", "IA"]
+    assert checkpoint.message_segment_count == 2
+
+
+def test_parse_stream_resume(message):
+    expected = list(Parser().parse_stream(io.BytesIO(message)))
+
+    for stop in range(1, len(expected)):
+        parser = Parser()
+        segments = parser.parse_stream(io.BytesIO(message))
+        head = [next(segments) for _ in range(stop)]
+        # persist and restore checkpoint, like a crashed worker would do.
+        checkpoint = ParserCheckpoint.from_dict(
+            json.loads(json.dumps(parser.checkpoint.to_dict()))
+        )
+
+        resumed = Parser()
+        tail = list(resumed.parse_stream(io.BytesIO(message), checkpoint=checkpoint))
+        assert head + tail == expected
+        assert resumed.version == "1"
+
+
+def test_parse_stream_custom_characters():
+    stream = io.BytesIO(b'UNA:+.? "FOO+B?"AR"\nBAZ+1.5"')
+    assert list(Parser().parse_stream(stream, chunk_size=3)) == [
+        Segment("UNA", ':+.? "'),
+        Segment("FOO", 'B"AR'),
+        Segment("BAZ", "1.5"),
+    ]
+
+
+def test_parse_stream_unterminated():
+    with pytest.raises(EDISyntaxError):
+        list(Parser().parse_stream(io.BytesIO(b"FOO+BAR'BAZ+QUX")))
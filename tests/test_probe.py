@@ -0,0 +1,183 @@
+#    pydifact - a python edifact library
+#    Copyright (C) 2017-2024  Christian González
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import io
+import threading
+
+import pytest
+
+from pydifact.duplicates import MemoryDuplicateIndex, SQLiteDuplicateIndex
+from pydifact.exceptions import EDISyntaxError
+from pydifact.probe import peek, read_header
+from pydifact.segmentcollection import Interchange
+
+EDI = (
+    "UNA:+.? '\r\n"
+    "UNB+UNOC:3+SENDER:14+RECEIVER+240101:1200+REF?+1'\r\n"
+    "UNH+1+ORDERS:D:96A:UN'\r\n"
+    "UNT+2+1'\r\n"
+    "UNZ+1+REF?+1'\r\n"
+).encode()
+
+
+def test_read_header_from_bytes():
+    header = read_header(EDI)
+    assert header.has_una_segment
+    assert header.characters.decimal_point == "."
+    assert (header.syntax_identifier, header.syntax_version) == ("UNOC", "3")
+    assert header.sender == ["SENDER", "14"]
+    assert header.recipient == "RECEIVER"
+    assert header.preparation == ["240101", "1200"]
+    assert header.control_reference == "REF+1"
+    assert header.key == ("SENDER", "RECEIVER", "REF+1")
+    assert EDI[: header.size].endswith(b"REF?+1'")
+
+
+def test_read_header_reads_only_the_header():
+    stream = io.BytesIO(EDI + b"garbage" * 10000)
+    header = read_header(stream, chunk_size=16)
+    assert header.key == ("SENDER", "RECEIVER", "REF+1")
+    assert stream.tell() < 100
+
+
+def test_read_header_without_una(tmp_path):
+    path = tmp_path / "order.edi"
+    path.write_bytes(EDI[EDI.index(b"UNB") :])
+    header = read_header(path)
+    assert not header.has_una_segment
+    assert header.key == ("SENDER", "RECEIVER", "REF+1")
+
+
+def test_read_header_from_file():
+    header = read_header("tests/data/huge_file2.edi")
+    assert header.key == ("6XPPC", "LHPPC", "1")
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"UNH+1+ORDERS:D:96A:UN'",
+        b"UNB+UNOC:3+SENDER+RECEIVER",
+        b"UNB+UNOC:3+S+R'",
+        b"UNB+UNOC:3+S+R+240101:1200'",
+    ],
+)
+def test_read_header_errors(data):
+    with pytest.raises(EDISyntaxError):
+        read_header(data)
+
+
+@pytest.mark.filterwarnings("ignore::pydifact.exceptions.MissingImplementationWarning")
+def test_read_header_incomplete_unb_without_definitions():
+    # there are no service segment definitions for syntax version 9, so the UNB
+    # segment is not validated while parsing
+    with pytest.raises(EDISyntaxError, match="incomplete"):
+        read_header(b"UNB+UNOC:9+S+R'")
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def duplicate_index(request, tmp_path):
+    if request.param == "memory":
+        index = MemoryDuplicateIndex()
+    else:
+        index = SQLiteDuplicateIndex(tmp_path / "index.sqlite")
+    yield index
+    index.close()
+
+
+def test_duplicate_index(duplicate_index):
+    key = read_header(EDI).key
+    assert key not in duplicate_index
+    assert duplicate_index.add(key)
+    assert key in duplicate_index
+    assert not duplicate_index.add(key)
+    assert duplicate_index.add(("SENDER", "RECEIVER", "REF2"))
+    assert len(duplicate_index) == 2
+    duplicate_index.discard(key)
+    assert key not in duplicate_index
+    assert len(duplicate_index) == 1
+
+
+def test_duplicate_index_add_is_atomic(duplicate_index):
+    results = []
+
+    def add():
+        results.append(duplicate_index.add(("S", "R", "1")))
+
+    threads = [threading.Thread(target=add) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [False] * 7 + [True]
+
+
+def test_sqlite_duplicate_index_is_persistent(tmp_path):
+    with SQLiteDuplicateIndex(tmp_path / "index.sqlite") as index:
+        index.add(("S", "R", "1"))
+    with SQLiteDuplicateIndex(tmp_path / "index.sqlite") as index:
+        assert ("S", "R", "1") in index
+        assert not index.add(("S", "R", "1"))
+        assert index.prune(older_than=-1) == 1
+        assert len(index) == 0
+
+
+ROUTING_EDI = (
+    "UNA:+.? '\n"
+    "UNB+UNOC:3+SENDER:14+RECEIVER+240101:1200+REF'\n"
+    "UNH+1+ORDERS:D:96A:UN'\n"
+    "FTX+AAA+++UNH+ UNZ+ ?'UNH+2+INVOIC:D:96A:UN'\n"
+    "UNT+3+1'\n"
+    "UNH+2+INVOIC:D:96A:UN'\n"
+    "UNT+2+2'\n"
+    "UNH+3+ORDERS:D:01B:UN'\n"
+    "UNT+2+3'\n"
+    "UNZ+3+REF'\n"
+).encode()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+def test_peek(chunk_size):
+    info = peek(io.BytesIO(ROUTING_EDI), chunk_size=chunk_size)
+    assert info.header.key == ("SENDER", "RECEIVER", "REF")
+    assert info.message_types == {"ORDERS": 2, "INVOIC": 1}
+    assert info.message_count == 3
+    assert info.segment_count == 9
+    assert info.declared_count == 3
+    assert info.trailer_reference == "REF"
+    assert info.complete
+    assert info.size == len(ROUTING_EDI)
+
+
+def test_peek_incomplete_interchange():
+    data = ROUTING_EDI[: ROUTING_EDI.index(b"UNH+3")] + b"UNH+3+ORDERS:D:01B"
+    info = peek(data)
+    assert info.message_types == {"ORDERS": 2, "INVOIC": 1}
+    assert info.segment_count == 7
+    assert info.declared_count is None
+    assert not info.complete
+
+
+def test_peek_equals_parse():
+    path = "tests/data/invoice1.edi"
+    interchange = Interchange.from_file(path)
+    info = peek(path)
+    messages = list(interchange.get_messages())
+    assert info.message_count == len(messages)
+    assert list(info.message_types) == [message.type for message in messages]
+    # plus UNB and UNZ
+    assert info.segment_count == len(interchange.segments) + 2
+    assert info.header.key[2] == interchange.control_reference
@@ -16,7 +16,7 @@
 import pytest
 
 from pydifact.exceptions import MissingImplementationWarning
-from pydifact.segments import Segment
+from pydifact.segments import Segment, SegmentFactory
 
 elements = ["field1", ["field2", "extra"], "stuff"]
 
@@ -101,3 +101,20 @@ def test_has_plugin():
             pass
 
     assert TestSegment in Segment.plugins
+
+
+def test_replaced_plugin_is_used():
+    def plugin(name):
+        return type(name, (Segment,), {"tag": "TER", "__omitted__": False})
+
+    first = plugin("FirstSegment")
+    try:
+        assert type(SegmentFactory.create_segment("TER", validate=False)) is first
+        # replace the plugin, the number of plugins stays the same
+        Segment.plugins.remove(first)
+        second = plugin("SecondSegment")
+        assert type(SegmentFactory.create_segment("TER", validate=False)) is second
+        Segment.plugins[Segment.plugins.index(second)] = first
+        assert type(SegmentFactory.create_segment("TER", validate=False)) is first
+    finally:
+        Segment.plugins.remove(first)
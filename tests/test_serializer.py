@@ -18,6 +18,7 @@ import datetime
 
 import pytest
 
+from pydifact.control import Characters
 from pydifact.segmentcollection import Interchange, RawSegmentCollection
 from pydifact.segments import Segment
 from pydifact.serializer import Serializer
@@ -149,6 +150,12 @@ def test_escape_sequence(serializer):
     )
 
 
+def test_escape_multichar_control_character():
+    characters = Characters(segment_terminator="'\n")
+    serializer = Serializer(characters)
+    assert serializer.escape("a'\nb:c") == "a?'\nb?:c"
+
+
 def test_no_mutation(serializer):
     segments1 = [Segment("ERC", [":+?'"])]
     segments2 = copy.deepcopy(segments1)
@@ -0,0 +1,219 @@
+#    pydifact - a python edifact library
+#    Copyright (C) 2017-2024  Christian González
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import pydifact.definitions
+from pydifact.batch import parse_interchanges
+from pydifact.definitions import (
+    LRUDefinitionsCache,
+    get_definitions_cache,
+    load_segment_definitions,
+    set_definitions_cache,
+)
+from pydifact.exceptions import EDISyntaxError
+from pydifact.segments import Segment, SegmentFactory
+
+FREE_THREADED = not getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def _edi(number: int, messages: int = 5) -> bytes:
+    body = "".join(
+        f"UNH+{n}+ORDERS:D:24A:UN'BGM+220+PO{number}-{n}+9'"
+        f"LIN+1++5020436373085:EN'QTY+21:{n}'UNT+5+{n}'"
+        for n in range(messages)
+    )
+    return (
+        f"UNA:+.? 'UNB+UNOC:3+SENDER+RECEIVER+240101:1200+{number}'{body}"
+        f"UNZ+{messages}+{number}'"
+    ).encode()
+
+
+@pytest.fixture
+def cache():
+    previous = get_definitions_cache()
+    cache = LRUDefinitionsCache()
+    set_definitions_cache(cache)
+    yield cache
+    set_definitions_cache(previous)
+
+
+def test_parse_interchanges_in_order():
+    sources = [_edi(n) for n in range(50)]
+    interchanges = list(parse_interchanges(sources, max_workers=8))
+    assert [i.control_reference for i in interchanges] == [str(n) for n in range(50)]
+    for source, interchange in zip(sources, interchanges):
+        assert interchange.serialize().encode() == source
+
+
+def test_parse_interchanges_from_files(tmp_path):
+    paths = []
+    for n in range(5):
+        path = tmp_path / f"{n}.edi"
+        path.write_bytes(_edi(n))
+        paths.append(path)
+    assert [i.control_reference for i in parse_interchanges(paths)] == [
+        "0",
+        "1",
+        "2",
+        "3",
+        "4",
+    ]
+
+
+def test_parse_interchanges_errors():
+    sources = [_edi(0), b"XYZ+1'", _edi(2)]
+    with pytest.raises(EDISyntaxError):
+        list(parse_interchanges(sources))
+    results = list(parse_interchanges(sources, return_exceptions=True))
+    assert isinstance(results[1], EDISyntaxError)
+    assert results[2].control_reference == "2"
+
+
+def test_concurrent_loads_compile_once(cache, monkeypatch):
+    calls = []
+    compile_segments_xml = pydifact.definitions.compile_segments_xml
+
+    def counting_compile(root):
+        calls.append(root)
+        time.sleep(0.05)  # make the threads overlap
+        return compile_segments_xml(root)
+
+    monkeypatch.setattr(pydifact.definitions, "compile_segments_xml", counting_compile)
+    barrier = threading.Barrier(8)
+
+    def load(_):
+        barrier.wait()
+        return load_segment_definitions("d24a")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(load, range(8)))
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_concurrent_load_errors_are_raised_in_all_threads(cache):
+    barrier = threading.Barrier(4)
+
+    def load(_):
+        barrier.wait()
+        try:
+            load_segment_definitions("d00x")
+        except FileNotFoundError:
+            return True
+        return False
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert all(executor.map(load, range(4)))
+
+
+def test_waiting_threads_raise_own_exceptions(cache, monkeypatch):
+    def failing_compile(root):
+        time.sleep(0.05)  # make the threads overlap
+        raise ValueError("broken segments.xml")
+
+    monkeypatch.setattr(pydifact.definitions, "compile_segments_xml", failing_compile)
+    barrier = threading.Barrier(4)
+
+    def load(_):
+        barrier.wait()
+        try:
+            load_segment_definitions("d24a")
+        except ValueError as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        errors = list(executor.map(load, range(4)))
+    assert len({id(e) for e in errors}) == 4
+    [original] = [e for e in errors if e.__cause__ is None]
+    assert all(e.__cause__ is original for e in errors if e is not original)
+    assert all(str(e) == "broken segments.xml" for e in errors)
+
+
+def test_plugin_registration_while_creating_segments():
+    stop = threading.Event()
+    errors = []
+
+    def create():
+        try:
+            while not stop.is_set():
+                assert (
+                    type(SegmentFactory.create_segment("BGM", "220", validate=False))
+                    is Segment
+                )
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+
+    threads = [threading.Thread(target=create) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    plugins = []
+    try:
+        for n in range(20):
+            plugins.append(
+                type(
+                    f"Z{n:02}Segment",
+                    (Segment,),
+                    {"tag": f"Z{n:02}", "__omitted__": False},
+                )
+            )
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    assert not errors
+    assert type(SegmentFactory.create_segment("Z07", "1", validate=False)) is plugins[7]
+    for plugin in plugins:
+        Segment.plugins.remove(plugin)
+
+
+def test_stress_parse_and_validate_on_threads():
+    sources = [_edi(n, messages=20) for n in range(40)]
+    expected = [i.serialize() for i in parse_interchanges(sources, max_workers=1)]
+
+    def work(source):
+        interchange = next(parse_interchanges([source], max_workers=1))
+        interchange.validate()
+        return interchange.serialize()
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        for _ in range(3):
+            assert list(executor.map(work, sources)) == expected
+
+
+@pytest.mark.skipif(
+    not FREE_THREADED or (os.cpu_count() or 1) < 4,
+    reason="needs a free-threaded Python build and at least 4 CPUs",
+)
+def test_parsing_scales_on_free_threaded_python():
+    sources = [_edi(n, messages=200) for n in range(32)]
+
+    def run(workers: int) -> float:
+        start = time.perf_counter()
+        for _ in parse_interchanges(sources, max_workers=workers):
+            pass
+        return time.perf_counter() - start
+
+    run(4)  # warm up
+    single = run(1)
+    parallel = run(4)
+    # linear would be 4x, leave room for noisy machines
+    assert single / parallel > 2.5
@@ -0,0 +1,119 @@
+#    pydifact - a python edifact library
+#    Copyright (C) 2017-2024  Christian González
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from pydifact.exceptions import MissingImplementationWarning, ValidationError
+from pydifact.parser import Parser
+from pydifact.segmentcollection import Interchange
+from pydifact.validation import ValidationIssue
+
+
+def _message(reference: str, release: str, bgm: str, count: int = 3) -> str:
+    return f"UNH+{reference}+ORDERS:D:{release}:UN'{bgm}'UNT+{count}+{reference}'"
+
+
+# BGM has 6 elements in D.24A, so this one is invalid there
+INVALID_BGM = "BGM+220+PO2+9+A+B+C+D+E"
+
+
+def _interchange(*messages: str) -> Interchange:
+    return Interchange.from_str(
+        "UNB+UNOC:3+SENDER+RECEIVER+240101:1200+1'"
+        + "".join(messages)
+        + f"UNZ+{len(messages)}+1'"
+    )
+
+
+def test_valid_interchange():
+    interchange = _interchange(
+        _message("1", "24A", "BGM+220+PO1+9"), _message("2", "21A", "BGM+220+PO2+9")
+    )
+    report = interchange.validation_report()
+    assert report.valid
+    assert report.unavailable_directories == []
+    interchange.validate()
+
+
+def test_issues_are_reported_in_order():
+    interchange = _interchange(
+        _message("1", "24A", INVALID_BGM),
+        _message("2", "24A", "BGM+220+PO2+9", count=5),
+        _message("3", "24A", "BGM+220+PO3+9"),
+        _message("4", "24A", INVALID_BGM),
+    )
+    report = interchange.validation_report(batch_size=1)
+    assert [(i.position, i.tag, i.message_reference) for i in report.issues] == [
+        (1, "BGM", "1"),
+        (5, "UNT", "2"),
+        (10, "BGM", "4"),
+    ]
+    assert "Too many elements" in report.issues[0].error
+    with pytest.raises(ValidationError, match="Segment 5 \\(UNT\\)"):
+        interchange.validate()
+
+
+def test_unavailable_directory_validates_service_segments_only():
+    interchange = _interchange(
+        _message("1", "96A", INVALID_BGM), _message("2", "96A", INVALID_BGM)
+    )
+    with pytest.warns(MissingImplementationWarning, match="d96a"):
+        report = interchange.validation_report()
+    assert report.valid
+    assert report.unavailable_directories == ["d96a"]
+
+
+def test_unavailable_directory_falls_back_like_the_parser():
+    interchange = _interchange(
+        _message("1", "96A", INVALID_BGM), _message("2", "24A", "BGM+220+PO2+9")
+    )
+    with pytest.warns(MissingImplementationWarning):
+        report = interchange.validation_report(directory="d24a")
+    assert [(i.position, i.tag) for i in report.issues] == [(1, "BGM")]
+    assert report.unavailable_directories == ["d96a"]
+
+    with pytest.warns(MissingImplementationWarning):
+        parser = Parser(directory="d24a", detect_directory=True)
+        with pytest.raises(ValidationError):
+            list(parser.parse(str(interchange.serialize())))
+    assert parser.unavailable_directories == ["d96a"]
+
+
+def test_fixed_directory():
+    interchange = _interchange(
+        _message("1", "24A", "BGM+220+PO1+9"), _message("2", "96A", INVALID_BGM)
+    )
+    report = interchange.validation_report(directory="d24a", detect_directory=False)
+    assert report.issues == [
+        ValidationIssue(4, "BGM", "2", report.issues[0].error),
+    ]
+    assert report.unavailable_directories == []
+
+
+@pytest.mark.parametrize("executor_class", [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_parallel_validation_equals_serial(executor_class):
+    interchange = _interchange(
+        *(
+            _message(str(n), "24A", INVALID_BGM if n % 3 else "BGM+220+PO+9")
+            for n in range(20)
+        )
+    )
+    expected = interchange.validation_report(batch_size=1)
+    assert len(expected.issues) == 13
+    with executor_class(max_workers=2) as executor:
+        report = interchange.validation_report(executor=executor, batch_size=4)
+    assert report == expected
@@ -0,0 +1,130 @@
+#    pydifact - a python edifact library
+#    Copyright (C) 2017-2024  Christian González
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Lesser General Public License as published
+#    by the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Lesser General Public License for more details.
+#
+#    You should have received a copy of the GNU Lesser General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from pydifact.segmentcollection import Interchange, RawSegmentCollection
+from pydifact.segments import Segment
+from pydifact.values import decode_date, decode_number, get_component
+
+
+@pytest.mark.parametrize(
+    "value,decimal_point,expected",
+    [
+        ("1234,56", ",", Decimal("1234.56")),
+        ("1234.56", ".", Decimal("1234.56")),
+        ("1234.56", ",", Decimal("1234.56")),
+        ("-3", ",", Decimal("-3")),
+        (",5", ",", Decimal("0.5")),
+    ],
+)
+def test_decode_number(value, decimal_point, expected):
+    assert decode_number(value, decimal_point) == expected
+
+
+@pytest.mark.parametrize("value", ["abc", "1,2,3", "NaN", "Infinity", ""])
+def test_decode_invalid_number(value):
+    with pytest.raises(ValueError):
+        decode_number(value, ",")
+
+
+@pytest.mark.parametrize(
+    "value,format_code,expected",
+    [
+        ("20240131", "102", datetime.date(2024, 1, 31)),
+        ("240131", "101", datetime.date(2024, 1, 31)),
+        ("202401311230", "203", datetime.datetime(2024, 1, 31, 12, 30)),
+        ("20240131123059", "204", datetime.datetime(2024, 1, 31, 12, 30, 59)),
+    ],
+)
+def test_decode_date(value, format_code, expected):
+    assert decode_date(value, format_code) == expected
+
+
+def test_decode_invalid_date():
+    with pytest.raises(ValueError):
+        decode_date("20241331", "102")
+    with pytest.raises(ValueError):
+        decode_date("20240131", "718")
+
+
+def test_get_component():
+    assert get_component("abc", None) == "abc"
+    assert get_component("abc", 0) == "abc"
+    assert get_component("abc", 1) is None
+    assert get_component(["203", "12"], 1) == "12"
+    assert get_component(["203"], 1) is None
+    assert get_component(None, 1) is None
+    with pytest.raises(ValueError):
+        get_component(["203", "12"], None)
+
+
+def test_segment_get_number():
+    assert Segment("MOA", ["203", "1234,56", "EUR"]).get_number(0, 1) == Decimal(
+        "1234.56"
+    )
+    assert Segment("QTY", ["21", "2.5"]).get_number(0, 1, ".") == Decimal("2.5")
+    assert Segment("MOA", ["203"]).get_number(0, 1) is None
+    assert Segment("MOA", ["203", ""]).get_number(0, 1) is None
+
+
+def test_segment_get_date():
+    assert Segment("DTM", ["137", "20240131", "102"]).get_date() == datetime.date(
+        2024, 1, 31
+    )
+    assert Segment("DTM", ["137", "20240131"]).get_date() == datetime.date(2024, 1, 31)
+    assert Segment("DTM", ["2", "202401311230", "203"]).get_date() == (
+        datetime.datetime(2024, 1, 31, 12, 30)
+    )
+    assert Segment("DTM", ["137"]).get_date() is None
+
+
+def test_container_get_numbers():
+    collection = RawSegmentCollection.from_str(
+        "MOA+203:10,5'MOA+203:4,5'QTY+21:3'MOA+77:100'MOA+203'"
+    )
+    assert collection.get_numbers("MOA", 0, 1) == [
+        Decimal("10.5"),
+        Decimal("4.5"),
+        Decimal("100"),
+    ]
+    assert sum(
+        collection.get_numbers("MOA", 0, 1, lambda segment: segment[0][0] == "203")
+    ) == Decimal("15")
+    assert collection.get_numbers("QTY", 0, 1) == [Decimal("3")]
+    assert collection.get_numbers("XYZ", 0, 1) == []
+
+
+def test_container_uses_decimal_point():
+    interchange = Interchange.from_str(
+        "UNA:+.? '"
+        "UNB+UNOC:3+1234+3333+200102:2212+42'"
+        "UNH+1+INVOIC:D:96A:UN'"
+        "MOA+203:1234.56'"
+        "MOA+203:0.44'"
+        "DTM+137:20240131:102'"
+        "DTM+2:202401311230:203'"
+        "UNT+5+1'"
+        "UNZ+1+42'"
+    )
+    assert sum(interchange.get_numbers("MOA", 0, 1)) == Decimal("1235")
+    assert interchange.get_dates() == [
+        datetime.date(2024, 1, 31),
+        datetime.datetime(2024, 1, 31, 12, 30),
+    ]
+    assert interchange.get_dates("2") == [datetime.datetime(2024, 1, 31, 12, 30)]